@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.exceptions import HTTPException
 from pydantic import BaseModel
 from Authentication.dependencies import get_current_user
+from Authentication.rate_limit import rate_limit, Limit
 from typing import Optional, List, Dict, Union
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import SystemMessage, HumanMessage, ToolMessage
@@ -16,6 +17,15 @@ from datetime import datetime
 
 ai_chat_router = APIRouter(prefix="/ai", tags=["AI Chatbot"])
 
+# Every chat request costs LLM quota; limited per user, admins get more.
+chat_rate_limit = rate_limit(
+    "ai_chat",
+    Limit(20, 60),
+    identity="user",
+    per_role={"Admin": Limit(60, 60)},
+    policy=get_current_user
+)
+
 class CreateSession(BaseModel):
     title: Optional[str] = "New Chat"
 
@@ -450,7 +460,7 @@ REQUIRED_FIELDS = {
 }
 
 
-@ai_chat_router.post("/chat", response_model=ChatResponse)
+@ai_chat_router.post("/chat", response_model=ChatResponse, dependencies=[Depends(chat_rate_limit)])
 def chat_with_ai(
     payload: ChatRequest,
     request: Request,
@@ -469,6 +479,10 @@ def chat_with_ai(
         - Tokens are injected internally into tool calls.
         - Clients must NOT provide token, emp_id, or customer_id manually.
 
+    Rate Limiting:
+        - 20 requests per minute per user (60 for Admin); excess
+          requests get 429 with a Retry-After header.
+
     Supported Domains:
         CUSTOMER:
             - Fetch all customers
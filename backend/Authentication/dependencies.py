@@ -1,289 +1,174 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-from Authentication.auth import SECRET_KEY, ALGORITHM
-from Authentication.redis_client import redis_client
+from jose import JWTError
+from Authentication.session_store import session_exists, SessionStoreUnavailable
+from Authentication.token_cache import session_cache, decode_token, token_key, revoked_tokens
 
 security = HTTPBearer()
 
-def get_current_user(credentials=Depends(security)):
-    """
-    Retrieve and validate the current user from a JWT access token.
-
-    This function extracts the JWT from the provided credentials, verifies
-    its validity, and checks that the token is still active in Redis (to
-    protect against logout). If valid, it decodes the token payload and
-    returns it.
+# One bit per role; policies compare the caller's bit against a mask
+# computed once when the policy is declared.
+ROLE_BITS = {
+    "Admin": 1 << 0,
+    "Agent": 1 << 1,
+    "Service Person": 1 << 2,
+    "Customer": 1 << 3,
+}
+ALL_ROLES = sum(ROLE_BITS.values())
 
-    Dependencies:
-    - security: FastAPI dependency providing the Authorization header.
-    - redis_client: Redis instance used to track active tokens.
-    - SECRET_KEY and ALGORITHM: Used for JWT decoding.
 
-    Args:
-    - credentials (Depends): FastAPI security dependency providing token.
-
-    Returns:
-    - dict: Decoded JWT payload containing user information and claims.
-
-    Raises:
-    - HTTPException (401): If the token is expired, logged out, or invalid.
+def role_mask(roles):
     """
-
-    token = credentials.credentials
-
-    # Redis check (LOGOUT protection)
-    if not redis_client.exists(token):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Session expired or logged out"
-        )
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-def customer_required(credentials=Depends(security)):
-    """
-    Authorize that the current user is a customer.
-
-    This function decodes a JWT access token from the provided credentials
-    and ensures that the user's role is "Customer". It raises an
-    HTTPException if the token is invalid or if the user does not have
-    customer privileges.
-
-    Dependencies:
-    - security: FastAPI security dependency providing the Authorization header.
-    - SECRET_KEY and ALGORITHM: Used for JWT decoding.
+    Combine role names into a bitmask.
 
     Args:
-    - credentials (Depends): FastAPI security dependency providing token.
+    - roles (Iterable[str] | None): Role names; None means every role.
 
     Returns:
-    - dict: Decoded JWT payload containing user information and claims.
+    - int: Bitmask of the given roles.
 
     Raises:
-    - HTTPException (401): If the JWT token is invalid.
-    - HTTPException (403): If the user is authenticated but not a customer.
+    - ValueError: If a role name is unknown.
     """
 
-    token = credentials.credentials
+    if roles is None:
+        return ALL_ROLES
+    mask = 0
+    for role in roles:
+        if role not in ROLE_BITS:
+            raise ValueError(f"Unknown role: {role}")
+        mask |= ROLE_BITS[role]
+    return mask
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
-        if payload.get("role") != "Customer":
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Customer access only"
-            )
-
-        return payload
-
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-def admin_agent_customer_required(credentials=Depends(security)):
+async def authenticate(request: Request, token: str, check_session: bool = True):
     """
-    Authorize that the current user is a Customer, Agent, or Admin.
+    Validate a bearer token once per request.
+
+    The decoded claims are stored on `request.state.user`, so further
+    policies evaluated for the same request reuse them instead of
+    decoding the token again.
 
-    This function decodes a JWT access token from the provided credentials
-    and ensures that the user's role is one of "Customer", "Agent", or "Admin".
-    It raises an HTTPException if the token is invalid or if the user does not
-    have the required role.
+    Verified claims are kept in a per-process LRU keyed by the token hash,
+    so repeated requests with the same token skip both the Redis lookup
+    and the signature check. Entries expire with the token and are
+    evicted on logout through Redis pub/sub revocation messages. Misses
+    check the session through the pooled async Redis client, so the
+    event loop is never blocked on Redis.
 
-    Dependencies:
-    - security: FastAPI security dependency providing the Authorization header.
-    - SECRET_KEY and ALGORITHM: Used for JWT decoding.
+    When Redis is slow or down (the session circuit breaker is open), the
+    token is accepted on its signature and expiry alone, unless it is on
+    the local list of recently revoked tokens; `request.state.degraded`
+    is set for such requests. Normal checks resume automatically once
+    Redis recovers.
 
     Args:
-    - credentials (Depends): FastAPI security dependency providing token.
+    - request (Request): Current request.
+    - token (str): Encoded JWT from the Authorization header.
+    - check_session (bool): Also require an active session in Redis
+      (logout protection).
 
     Returns:
     - dict: Decoded JWT payload containing user information and claims.
 
     Raises:
-    - HTTPException (401): If the JWT token is invalid.
-    - HTTPException (403): If the user is authenticated but does not have
-      one of the allowed roles.
+    - HTTPException (401): If the token is expired, logged out, or invalid.
     """
 
-    token = credentials.credentials
-
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user = getattr(request.state, "user", None)
+    if user is not None and (request.state.session_checked or not check_session):
+        return user
 
-        if payload.get("role") not in ["Customer", "Agent","Admin"]:
+    degraded = False
+    if check_session:
+        user = session_cache.get(token)
+        if user is None:
+            # Redis check (LOGOUT protection)
+            try:
+                active = await session_exists(token)
+            except SessionStoreUnavailable:
+                active = degraded = token_key(token) not in revoked_tokens
+            if not active:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Session expired or logged out"
+                )
+            try:
+                user = decode_token(token)
+            except JWTError:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid token"
+                )
+            if not degraded:
+                session_cache.put(token, user)
+    else:
+        try:
+            user = decode_token(token)
+        except JWTError:
             raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Customer access only"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token"
             )
 
-        return payload
-
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid token"
-        )
-
-def admin_required(user=Depends(get_current_user)):
-    """
-    Authorize that the current user is an Admin.
-
-    This function checks the role in the decoded JWT payload (retrieved
-    from the `get_current_user` dependency) and ensures that the user
-    has an Admin role. If not, it raises an HTTPException.
-
-    Dependencies:
-    - get_current_user: Dependency that retrieves and validates the current
-      user from JWT.
-
-    Args:
-    - user (dict, Depends): Decoded JWT payload from the current user.
-
-    Returns:
-    - dict: The decoded JWT payload of the Admin user.
+    request.state.user = user
+    request.state.role_bit = ROLE_BITS.get(user.get("role"), 0)
+    request.state.session_checked = check_session
+    request.state.degraded = degraded
+    return user
 
-    Raises:
-    - HTTPException (403): If the user is authenticated but does not have
-      the Admin role.
-    - HTTPException (500): If an unexpected error occurs.
-    """
 
-    try:
-        if user["role"] != "Admin":
-            raise HTTPException(
-                status_code=403,
-                detail="Admin access required"
-            )
-        return user
-    except Exception as e:
-        raise HTTPException(
-        status_code=500,
-        detail=str(e)
-    )
-
-def admin_agent_required(user=Depends(get_current_user)):
+def require(roles=None, check_session=True, detail="Access denied"):
     """
-    Authorize that the current user is an Admin or Agent.
+    Declare an authorization policy for a route.
 
-    This function checks the role in the decoded JWT payload (retrieved
-    from the `get_current_user` dependency) and ensures that the user
-    has either the Admin or Agent role. If not, it raises an HTTPException.
+    Returns a FastAPI dependency that authenticates the request exactly
+    once (see `authenticate`) and checks the caller's role against a
+    bitmask precomputed here, so evaluating the policy is a single AND.
 
-    Dependencies:
-    - get_current_user: Dependency that retrieves and validates the current
-      user from JWT.
+    Example:
+        @router.get("/all_employees")
+        def fetch_all_employees(user=Depends(require(roles={"Admin"}))):
+            ...
 
     Args:
-    - user (dict, Depends): Decoded JWT payload of the current user.
+    - roles (Iterable[str], optional): Allowed roles; None allows every
+      authenticated user.
+    - check_session (bool): Require an active Redis session.
+    - detail (str): Error detail returned when the role is not allowed.
 
     Returns:
-    - dict: The decoded JWT payload of the Admin or Agent user.
+    - callable: Dependency returning the decoded JWT payload.
 
     Raises:
-    - HTTPException (403): If the user is authenticated but does not have
-      Admin or Agent role.
-    - HTTPException (500): If an unexpected error occurs.
+    - ValueError: If a role name is unknown.
     """
 
-    try:
-        if user["role"] not in ["Admin","Agent"]:
-            raise HTTPException(
-                status_code=403,
-                detail="Admin or Agent access required"
-            )
-        return user
-    except Exception as e:
-        raise HTTPException(
-        status_code=500,
-        detail=str(e)
-    )
-
-def service_person_required(user=Depends(get_current_user)):
-    """
-    Authorize that the current user is a Service Person.
-
-    This function checks the role in the decoded JWT payload (retrieved
-    from the `get_current_user` dependency) and ensures that the user
-    has the "Service Person" role. It raises an HTTPException if the user
-    does not have the required role.
+    allowed = role_mask(roles)
 
-    Dependencies:
-    - get_current_user: Dependency that retrieves and validates the current
-      user from JWT.
-
-    Args:
-    - user (dict, Depends): Decoded JWT payload of the current user.
-
-    Returns:
-    - dict: The decoded JWT payload of the Service Person user.
-
-    Raises:
-    - HTTPException (403): If the user is authenticated but does not have
-      the Service Person role.
-    - HTTPException (500): If an unexpected error occurs.
-    """
-    try:
-        if user["role"] != "Service Person":
+    async def policy(request: Request, credentials: HTTPAuthorizationCredentials = Depends(security)):
+        user = await authenticate(request, credentials.credentials, check_session)
+        if not request.state.role_bit & allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Service Person access required"
+                detail=detail
             )
         return user
-    except Exception as e:
-        raise HTTPException(
-        status_code=500,
-        detail=str(e)
-    )
-
-def employee_create_permission(user=Depends(get_current_user)):
-    """
-    Authorize that the current user can create employee records.
-
-    This function checks the role in the decoded JWT payload (retrieved
-    from the `get_current_user` dependency) and ensures that the user
-    has either the Admin or Agent role. Only these roles are allowed
-    to create new employees. An HTTPException is raised if the role
-    is not permitted.
-
-    Dependencies:
-    - get_current_user: Dependency that retrieves and validates the current
-      user from JWT.
-
-    Args:
-    - user (dict, Depends): Decoded JWT payload of the current user.
 
-    Returns:
-    - dict: The decoded JWT payload of the authorized user.
+    return policy
 
-    Raises:
-    - HTTPException (403): If the user is authenticated but not allowed
-      to create employees.
-    - HTTPException (500): If an unexpected error occurs.
-    """
 
-    try:
-        role = user["role"]
+# Any authenticated employee. Customers also have sessions now, so the
+# employee roles are listed explicitly to keep them off staff routes.
+get_current_user = require(roles={"Admin", "Agent", "Service Person"})
 
-        if role not in ["Admin", "Agent"]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Not allowed to create employees"
-            )
+customer_required = require(roles={"Customer"}, detail="Customer access only")
+admin_agent_customer_required = require(
+    roles={"Customer", "Agent", "Admin"},
+    detail="Customer, Agent or Admin access required"
+)
 
-        return user
-    except Exception as e:
-        raise HTTPException(
-        status_code=500,
-        detail=str(e)
-    )
+admin_required = require(roles={"Admin"}, detail="Admin access required")
+admin_agent_required = require(roles={"Admin", "Agent"}, detail="Admin or Agent access required")
+service_person_required = require(roles={"Service Person"}, detail="Service Person access required")
+employee_create_permission = require(roles={"Admin", "Agent"}, detail="Not allowed to create employees")
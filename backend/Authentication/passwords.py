@@ -0,0 +1,149 @@
+import asyncio
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+
+# argon2id cost, calibrated to ~50 ms per hash on one core (see
+# benchmarks/bench_passwords.py). memory_cost is in KiB.
+PASSWORD_HASH_TIME_COST = int(os.getenv("PASSWORD_HASH_TIME_COST", "2"))
+PASSWORD_HASH_MEMORY_KIB = int(os.getenv("PASSWORD_HASH_MEMORY_KIB", "19456"))
+PASSWORD_HASH_PARALLELISM = int(os.getenv("PASSWORD_HASH_PARALLELISM", "1"))
+
+# Hashing is CPU-bound and argon2 releases the GIL, so a few dedicated
+# threads use the cores without starving the default threadpool that
+# serves sync routes. Work beyond the queue limit is rejected instead of
+# queued, so a credential-stuffing burst cannot grow login latency
+# without bound.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.getenv("PASSWORD_HASH_QUEUE_LIMIT", str(PASSWORD_HASH_WORKERS * 8)))
+
+password_hasher = PasswordHasher(
+    time_cost=PASSWORD_HASH_TIME_COST,
+    memory_cost=PASSWORD_HASH_MEMORY_KIB,
+    parallelism=PASSWORD_HASH_PARALLELISM,
+)
+
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_pending = 0
+_pending_lock = threading.Lock()
+
+# Verified when the user does not exist, so a missing account takes as
+# long as a wrong password.
+_DUMMY_HASH = password_hasher.hash("dummy password")
+
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hashing queue is full.
+    """
+
+
+def _admit():
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_QUEUE_LIMIT:
+            raise PasswordHasherBusy("Password hashing queue is full")
+        _pending += 1
+
+
+def _done(_future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _submit(fn, *args):
+    _admit()
+    try:
+        future = _executor.submit(fn, *args)
+    except BaseException:
+        _done()
+        raise
+    future.add_done_callback(_done)
+    return future
+
+
+def is_password_hash(stored):
+    """
+    Tell an argon2 hash from a legacy plaintext password.
+    """
+
+    return bool(stored) and stored.startswith("$argon2")
+
+
+def _verify(stored, password):
+    if stored is None:
+        try:
+            password_hasher.verify(_DUMMY_HASH, password)
+        except VerificationError:
+            pass
+        return False, None
+
+    if not is_password_hash(stored):
+        # legacy plaintext row: upgrade it on the first successful login
+        if hmac.compare_digest(stored.encode(), password.encode()):
+            return True, password_hasher.hash(password)
+        return False, None
+
+    try:
+        password_hasher.verify(stored, password)
+    except (VerificationError, InvalidHashError):
+        return False, None
+    if password_hasher.check_needs_rehash(stored):
+        return True, password_hasher.hash(password)
+    return True, None
+
+
+def hash_password(password):
+    """
+    Hash a password on the password executor, blocking the calling thread.
+
+    For sync routes, which already run in the threadpool.
+
+    Args:
+    - password (str): Plaintext password.
+
+    Returns:
+    - str: argon2id hash.
+
+    Raises:
+    - PasswordHasherBusy: If the hashing queue is full.
+    """
+
+    return _submit(password_hasher.hash, password).result()
+
+
+async def verify_password(stored, password):
+    """
+    Verify a password on the password executor without blocking the loop.
+
+    Accepts argon2 hashes and legacy plaintext values. When the stored
+    value is plaintext or was hashed with older cost parameters, a fresh
+    hash is returned so the caller can store it (rehash on login).
+
+    Args:
+    - stored (str | None): Stored password value; None when the user
+      does not exist (a dummy hash is verified to keep timing uniform).
+    - password (str): Password supplied by the user.
+
+    Returns:
+    - tuple: (matches, new_hash). new_hash is None unless the stored
+      value should be replaced.
+
+    Raises:
+    - PasswordHasherBusy: If the hashing queue is full.
+    """
+
+    return await asyncio.wrap_future(_submit(_verify, stored, password))
+
+
+def queue_depth():
+    """
+    Return the number of hash/verify calls queued or running.
+    """
+
+    with _pending_lock:
+        return _pending
@@ -0,0 +1,164 @@
+import logging
+import math
+from dataclasses import dataclass
+from fastapi import Depends, HTTPException, Request, status
+from prometheus_client import Counter
+from Authentication.redis_client import async_redis_client
+
+logger = logging.getLogger(__name__)
+
+IDENTITIES = ("ip", "user", "role")
+
+_rejected = Counter(
+    "rate_limit_rejected_total",
+    "Requests rejected with 429 by the rate limiter",
+    ["scope"]
+)
+
+# Token bucket stored as a hash {tokens, ts}. Refill, take and expiry
+# happen in one script call, so concurrent workers cannot overspend the
+# bucket and each request costs a single round trip. Redis TIME is used
+# so worker clock skew does not matter.
+_take_token = async_redis_client.register_script("""
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+""")
+
+
+@dataclass(frozen=True)
+class Limit:
+    """
+    Token-bucket limit: `requests` per `period` seconds, allowing bursts
+    of up to `burst` requests (defaults to `requests`).
+    """
+
+    requests: int
+    period: float
+    burst: int | None = None
+
+    @property
+    def rate(self):
+        return self.requests / self.period
+
+    @property
+    def capacity(self):
+        return self.burst or self.requests
+
+
+def client_ip(request: Request):
+    """
+    Return the client address of a request.
+
+    Run uvicorn with --proxy-headers behind a reverse proxy so this is the
+    real client and not the proxy.
+    """
+
+    return request.client.host if request.client else "unknown"
+
+
+async def hit(scope, identity, limit):
+    """
+    Take one token from a bucket.
+
+    Redis errors fail open: throttling must never take the endpoint down
+    with it.
+
+    Args:
+    - scope (str): Route name the limit belongs to.
+    - identity (str): Caller identity (IP, user or role).
+    - limit (Limit): Limit to apply.
+
+    Returns:
+    - float: 0 if the request is allowed, otherwise seconds until a token
+      is available.
+    """
+
+    try:
+        retry_after = await _take_token(
+            keys=[f"rate_limit:{scope}:{identity}"],
+            args=[limit.rate, limit.capacity]
+        )
+    except Exception:
+        logger.exception("Rate limiter unavailable, allowing request")
+        return 0.0
+    return float(retry_after)
+
+
+def rate_limit(scope, limit, identity="ip", per_role=None, policy=None):
+    """
+    Declare a rate limit for a route.
+
+    Returns a FastAPI dependency that raises 429 with a Retry-After
+    header once the caller's bucket is empty.
+
+    Example:
+        @router.post("/chat", dependencies=[Depends(rate_limit(
+            "ai_chat", Limit(20, 60), identity="user", policy=get_current_user
+        ))])
+
+    Args:
+    - scope (str): Name of the limited route; buckets are per scope.
+    - limit (Limit): Default limit.
+    - identity (str): What a bucket is keyed by: "ip", "user" (JWT emp_id
+      and role) or "role".
+    - per_role (dict[str, Limit], optional): Limits overriding `limit`
+      for specific roles.
+    - policy (callable, optional): Authorization policy (see
+      `Authentication.dependencies.require`) providing the user. Required
+      for "user" and "role" identities and `per_role`. FastAPI caches it
+      per request, so the route's own policy is not evaluated twice.
+
+    Returns:
+    - callable: Dependency enforcing the limit.
+
+    Raises:
+    - ValueError: If `identity` is unknown or needs a missing `policy`.
+    """
+
+    if identity not in IDENTITIES:
+        raise ValueError(f"identity must be one of {IDENTITIES}")
+    if (identity != "ip" or per_role) and policy is None:
+        raise ValueError("user, role and per_role limits need a policy")
+    per_role = dict(per_role or {})
+
+    async def check(request: Request, user):
+        if identity == "ip":
+            key = client_ip(request)
+        elif identity == "user":
+            key = f"{user.get('role')}:{user.get('emp_id')}"
+        else:
+            key = str(user.get("role"))
+        applied = per_role.get(user.get("role"), limit) if user else limit
+
+        retry_after = await hit(scope, key, applied)
+        if retry_after > 0:
+            _rejected.labels(scope).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(retry_after))}
+            )
+
+    if policy is None:
+        async def limiter(request: Request):
+            await check(request, None)
+    else:
+        async def limiter(request: Request, user=Depends(policy)):
+            await check(request, user)
+
+    return limiter
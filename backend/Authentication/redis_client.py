@@ -1,8 +1,73 @@
+import os
 import redis
+import redis.asyncio
 
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
+# Session checks sit on every authenticated request: fail fast rather
+# than hang the request when Redis stalls.
+REDIS_SOCKET_TIMEOUT = 0.5
+REDIS_CONNECT_TIMEOUT = 0.5
+REDIS_HEALTH_CHECK_INTERVAL = 30
+REDIS_MAX_CONNECTIONS = 50
+
+# Synchronous client for the pub/sub listeners only. No socket timeout:
+# pub/sub reads block by design.
 redis_client = redis.Redis(
-    host="localhost",
-    port=6379,
+    connection_pool=redis.ConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=0,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
+)
+
+# Synchronous client for commands from threads (HubSpot read cache,
+# contact ID map, webhook queue). A stalled Redis fails the command
+# instead of hanging the worker; callers fall back to MySQL or HubSpot.
+redis_cache_client = redis.Redis(
+    connection_pool=redis.ConnectionPool(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=0,
+        decode_responses=True,
+        max_connections=REDIS_MAX_CONNECTIONS,
+        socket_timeout=REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+        health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    )
+)
+
+# Used by login, logout and session validation on the event loop.
+async_redis_pool = redis.asyncio.BlockingConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
     db=0,
-    decode_responses=True
+    decode_responses=True,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_CONNECT_TIMEOUT,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
+    health_check_interval=REDIS_HEALTH_CHECK_INTERVAL,
+    retry_on_timeout=False,
 )
+async_redis_client = redis.asyncio.Redis(connection_pool=async_redis_pool)
+
+
+def pool_stats():
+    """
+    Return connection usage of the async Redis pool.
+
+    Returns:
+    - dict: `max_connections`, `in_use` and `idle` connection counts.
+    """
+
+    return {
+        "max_connections": async_redis_pool.max_connections,
+        "in_use": len(async_redis_pool._in_use_connections),
+        "idle": len(async_redis_pool._available_connections),
+    }
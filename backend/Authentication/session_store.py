@@ -0,0 +1,365 @@
+import asyncio
+import logging
+import time
+from prometheus_client import Gauge
+from redis.exceptions import RedisError
+from Authentication.redis_client import async_redis_client, pool_stats
+from Authentication.token_cache import REVOCATION_CHANNEL, token_key, evict_token
+from utils.circuit_breaker import CircuitBreaker, CLOSED
+
+logger = logging.getLogger(__name__)
+
+SESSION_TTL_SECONDS = 1800
+SESSION_CLEANUP_INTERVAL_SECONDS = 300
+
+# Hard bound on a session check; slower answers count as failures.
+SESSION_CHECK_TIMEOUT_SECONDS = 0.25
+# Logouts made while Redis was unreachable, replayed once it recovers.
+MAX_UNSYNCED_REVOCATIONS = 10000
+
+# Every user with sessions has a sorted set of their tokens scored by
+# expiry; the set of those index keys lets the cleanup job avoid SCAN.
+SESSION_INDEX_REGISTRY = "session_indexes"
+
+_pool_connections = Gauge(
+    "redis_session_pool_connections",
+    "Connections of the async Redis session pool",
+    ["state"]
+)
+_pool_connections.labels("in_use").set_function(lambda: pool_stats()["in_use"])
+_pool_connections.labels("idle").set_function(lambda: pool_stats()["idle"])
+_pool_connections.labels("max").set_function(lambda: pool_stats()["max_connections"])
+
+# Each session key stores its index key, so a token can be removed from
+# its user's index without knowing who it belongs to.
+_revoke_tokens = async_redis_client.register_script("""
+local revoked = 0
+for _, token in ipairs(KEYS) do
+    local index = redis.call('GET', token)
+    if index then
+        redis.call('DEL', token)
+        redis.call('ZREM', index, token)
+        revoked = revoked + 1
+    end
+end
+return revoked
+""")
+
+_revoke_user = async_redis_client.register_script("""
+local tokens = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, token in ipairs(tokens) do
+    redis.call('DEL', token)
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', KEYS[2], KEYS[1])
+return tokens
+""")
+
+
+class SessionStoreUnavailable(Exception):
+    """
+    Raised when Redis is down, slow, or the session circuit is open.
+    """
+
+
+_unsynced_revocations = set()
+# (scope, user_id) of "log out everywhere" calls made while Redis was
+# unreachable
+_unsynced_user_revocations = set()
+
+
+def _on_breaker_state_change(old, new):
+    if new == CLOSED and (_unsynced_revocations or _unsynced_user_revocations):
+        asyncio.get_running_loop().create_task(_replay_revocations())
+
+
+session_breaker = CircuitBreaker(
+    "session_store",
+    failure_threshold=5,
+    reset_timeout=10,
+    on_state_change=_on_breaker_state_change
+)
+
+
+async def _guarded(make_call):
+    # Run one Redis call through the session circuit breaker.
+    if not session_breaker.allow():
+        raise SessionStoreUnavailable("Session store circuit is open")
+    try:
+        result = await asyncio.wait_for(make_call(), SESSION_CHECK_TIMEOUT_SECONDS)
+    except (RedisError, OSError, asyncio.TimeoutError) as e:
+        session_breaker.record_failure()
+        raise SessionStoreUnavailable(str(e)) from e
+    except BaseException:
+        # cancelled, or a bug in the call: no verdict on Redis, but a
+        # half-open probe must not stay in flight
+        session_breaker.cancel()
+        raise
+    session_breaker.record_success()
+    return result
+
+
+async def _replay_revocations():
+    tokens = list(_unsynced_revocations)
+    _unsynced_revocations.difference_update(tokens)
+    try:
+        await revoke_sessions(tokens)
+    except SessionStoreUnavailable:
+        logger.warning("Could not replay %d revocations, will retry", len(tokens))
+        return
+
+    users = list(_unsynced_user_revocations)
+    _unsynced_user_revocations.difference_update(users)
+    for scope, user_id in users:
+        try:
+            await revoke_user_sessions(scope, user_id)
+        except SessionStoreUnavailable:
+            logger.warning("Could not replay session revocation of %s %s, will retry", scope, user_id)
+            return
+
+
+def session_index_key(scope, user_id):
+    """
+    Return the Redis key of a user's session index.
+
+    Args:
+    - scope (str): "employee" or "customer" (their IDs overlap).
+    - user_id (int): Employee or customer ID.
+
+    Returns:
+    - str: Sorted-set key holding the user's tokens.
+    """
+
+    return f"user_sessions:{scope}:{user_id}"
+
+
+async def create_session(token, user_id, ttl=SESSION_TTL_SECONDS, scope="employee"):
+    """
+    Store an active session for a newly issued token.
+
+    The session key and the user's session index are written in one
+    MULTI/EXEC transaction, so the index never misses a live session.
+
+    Args:
+    - token (str): Encoded JWT.
+    - user_id (int): Employee or customer ID the token belongs to.
+    - ttl (int): Session lifetime in seconds.
+    - scope (str): "employee" or "customer".
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable.
+    """
+
+    index = session_index_key(scope, user_id)
+
+    async def write():
+        async with async_redis_client.pipeline(transaction=True) as pipe:
+            pipe.setex(token, ttl, index)
+            pipe.zadd(index, {token: time.time() + ttl})
+            pipe.expire(index, ttl)
+            pipe.sadd(SESSION_INDEX_REGISTRY, index)
+            await pipe.execute()
+
+    await _guarded(write)
+
+
+async def session_exists(token):
+    """
+    Check whether a token still has an active session.
+
+    Args:
+    - token (str): Encoded JWT.
+
+    Returns:
+    - bool: True if the session exists (not expired or logged out).
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable; callers fall back
+      to degraded validation.
+    """
+
+    return bool(await _guarded(lambda: async_redis_client.exists(token)))
+
+
+async def revoke_sessions(tokens):
+    """
+    Revoke several sessions in one pipelined round trip.
+
+    Deletes each session, removes it from its user's index and publishes
+    its token hash on the revocation channel, so every worker evicts it
+    from the verified-token cache.
+
+    The tokens are always revoked locally first. If Redis is unavailable
+    they are kept and replayed when the session circuit closes again.
+
+    Args:
+    - tokens (Iterable[str]): Encoded JWTs to revoke.
+
+    Returns:
+    - int: Number of sessions that existed and were deleted.
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable.
+    """
+
+    tokens = list(tokens)
+    if not tokens:
+        return 0
+    for token in tokens:
+        evict_token(token_key(token))
+
+    async def revoke():
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            await _revoke_tokens(keys=tokens, client=pipe)
+            for token in tokens:
+                pipe.publish(REVOCATION_CHANNEL, token_key(token))
+            return (await pipe.execute())[0]
+
+    try:
+        return await _guarded(revoke)
+    except SessionStoreUnavailable:
+        if len(_unsynced_revocations) < MAX_UNSYNCED_REVOCATIONS:
+            _unsynced_revocations.update(tokens)
+        raise
+
+
+async def revoke_session(token):
+    """
+    Revoke a single session (logout).
+
+    Args:
+    - token (str): Encoded JWT.
+
+    Returns:
+    - bool: True if the session existed.
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable (the token is
+      still revoked locally).
+    """
+
+    return bool(await revoke_sessions([token]))
+
+
+async def list_user_sessions(scope, user_id):
+    """
+    List a user's active sessions.
+
+    Tokens are never returned; each session is identified by its token
+    hash, which is also what the revocation channel carries.
+
+    Args:
+    - scope (str): "employee" or "customer".
+    - user_id (int): Employee or customer ID.
+
+    Returns:
+    - list[dict]: `session_id` (token hash) and `expires_at` (epoch
+      seconds), soonest expiry first.
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable.
+    """
+
+    sessions = await _guarded(lambda: async_redis_client.zrangebyscore(
+        session_index_key(scope, user_id), time.time(), "+inf", withscores=True
+    ))
+    return [
+        {"session_id": token_key(token), "expires_at": int(expires_at)}
+        for token, expires_at in sessions
+    ]
+
+
+async def revoke_user_sessions(scope, user_id):
+    """
+    Log a user out everywhere.
+
+    The index and every session in it are deleted atomically by a Lua
+    script, then the revocations are published in one pipeline. If Redis
+    is unavailable the user is kept and replayed when the session
+    circuit closes again.
+
+    Args:
+    - scope (str): "employee" or "customer".
+    - user_id (int): Employee or customer ID.
+
+    Returns:
+    - int: Number of sessions revoked.
+
+    Raises:
+    - SessionStoreUnavailable: If Redis is unavailable.
+    """
+
+    async def revoke():
+        tokens = await _revoke_user(keys=[session_index_key(scope, user_id), SESSION_INDEX_REGISTRY])
+        if tokens:
+            async with async_redis_client.pipeline(transaction=False) as pipe:
+                for token in tokens:
+                    key = token_key(token)
+                    evict_token(key)
+                    pipe.publish(REVOCATION_CHANNEL, key)
+                await pipe.execute()
+        return tokens
+
+    try:
+        return len(await _guarded(revoke))
+    except SessionStoreUnavailable:
+        if len(_unsynced_user_revocations) < MAX_UNSYNCED_REVOCATIONS:
+            _unsynced_user_revocations.add((scope, user_id))
+        raise
+
+
+async def revoke_user_sessions_after_commit(scope, user_id):
+    """
+    Log a user out everywhere after a committed change (password, role,
+    deletion).
+
+    The change cannot be rolled back anymore, so a Redis outage is
+    logged instead of raised; `revoke_user_sessions` has queued the user
+    and the revocation is replayed when the session circuit closes.
+
+    Args:
+    - scope (str): "employee" or "customer".
+    - user_id (int): Employee or customer ID.
+    """
+
+    try:
+        await revoke_user_sessions(scope, user_id)
+    except SessionStoreUnavailable as e:
+        logger.warning("Session revocation of %s %s queued for replay: %s", scope, user_id, e)
+
+
+async def prune_expired_sessions():
+    """
+    Drop expired members from every session index.
+
+    Returns:
+    - int: Number of expired index members removed.
+    """
+
+    removed = 0
+    now = time.time()
+    async for index in async_redis_client.sscan_iter(SESSION_INDEX_REGISTRY, count=500):
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            pipe.zremrangebyscore(index, "-inf", now)
+            pipe.zcard(index)
+            pruned, remaining = await pipe.execute()
+        removed += pruned
+        if not remaining:
+            await async_redis_client.srem(SESSION_INDEX_REGISTRY, index)
+    return removed
+
+
+async def run_session_cleanup(interval=SESSION_CLEANUP_INTERVAL_SECONDS):
+    """
+    Periodically prune expired sessions from the per-user indexes.
+
+    Args:
+    - interval (int): Seconds between cleanup passes.
+    """
+
+    while True:
+        try:
+            await prune_expired_sessions()
+        except Exception:
+            logger.exception("Session index cleanup failed")
+        await asyncio.sleep(interval)
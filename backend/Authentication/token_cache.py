@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from jose import jwt
+from Authentication.auth import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from Authentication.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+REVOCATION_CHANNEL = "session_revocations"
+TOKEN_CACHE_SIZE = 10000
+
+# Upper bound on how long a revoked token can still be accepted by a
+# worker that missed the pub/sub revocation message.
+MAX_CACHE_AGE_SECONDS = 30
+
+# Revoked token hashes are remembered for one token lifetime, so they
+# can be rejected while sessions are validated without Redis.
+REVOCATION_LIST_SIZE = 100000
+REVOCATION_LIST_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+def token_key(token):
+    """
+    Return the cache key for a token (the raw token is never stored).
+
+    Args:
+    - token (str): Encoded JWT.
+
+    Returns:
+    - str: Hex SHA-256 digest of the token.
+    """
+
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified token claims, keyed by token hash.
+
+    An entry is served until the earliest of the token's `exp` claim and
+    MAX_CACHE_AGE_SECONDS after it was cached, so a cache hit needs no
+    Redis call and no signature check.
+    """
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE, max_age=MAX_CACHE_AGE_SECONDS):
+        self._maxsize = maxsize
+        self._max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """
+        Return cached claims for a token, or None on a miss.
+        """
+
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, valid_until = entry
+            if valid_until <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token, claims):
+        """
+        Cache verified claims for a token.
+        """
+
+        valid_until = time.time() + self._max_age
+        if claims.get("exp") is not None:
+            valid_until = min(valid_until, float(claims["exp"]))
+        with self._lock:
+            self._entries[token_key(token)] = (claims, valid_until)
+            self._entries.move_to_end(token_key(token))
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        """
+        Drop a token from the cache by its token hash.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationList:
+    """
+    Bounded, time-limited set of recently revoked token hashes.
+
+    Filled from local logouts and revocation messages; consulted only in
+    degraded mode, when sessions cannot be checked in Redis.
+    """
+
+    def __init__(self, maxsize=REVOCATION_LIST_SIZE, ttl=REVOCATION_LIST_TTL_SECONDS):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._entries[key] = time.time() + self._ttl
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            expires_at = self._entries.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= time.time():
+                del self._entries[key]
+                return False
+            return True
+
+
+# claims whose session was also confirmed in Redis
+session_cache = TokenCache()
+# claims that only passed signature and expiry checks
+claims_cache = TokenCache()
+revoked_tokens = RevocationList()
+
+
+def decode_token(token):
+    """
+    Verify a JWT's signature and expiry, serving repeats from `claims_cache`.
+
+    Args:
+    - token (str): Encoded JWT.
+
+    Returns:
+    - dict: Decoded claims.
+
+    Raises:
+    - JWTError: If the token is invalid or expired.
+    """
+
+    claims = claims_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        claims_cache.put(token, claims)
+    return claims
+
+
+def evict_token(key):
+    """
+    Evict a token hash from every local cache and remember it as revoked.
+    """
+
+    session_cache.evict(key)
+    claims_cache.evict(key)
+    revoked_tokens.add(key)
+
+
+def _listen_for_revocations():
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(REVOCATION_CHANNEL)
+            # messages sent while we were disconnected are lost
+            session_cache.clear()
+            claims_cache.clear()
+            for message in pubsub.listen():
+                if message["type"] == "message":
+                    evict_token(message["data"])
+        except Exception:
+            logger.exception("Token revocation listener disconnected, reconnecting")
+            time.sleep(1)
+
+
+def start_revocation_listener():
+    """
+    Start the background thread that applies revocations from other workers.
+    """
+
+    thread = threading.Thread(target=_listen_for_revocations, name="token-revocations", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,261 @@
+import asyncio
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+import httpx
+import requests
+from Hubspot.client import (
+    hubspot_client,
+    record_call,
+    HubSpotUnavailable,
+    HubSpotDeadlineExceeded,
+    HUBSPOT_BASE_URL,
+    HUBSPOT_TIMEOUT,
+    IDEMPOTENT_POST_SUFFIXES,
+)
+from Hubspot.scheduler import hubspot_scheduler, retry_after_seconds, record_retry, HUBSPOT_MAX_RETRIES, RateBudgetExhausted
+
+# Requests one client keeps in flight; further calls wait on its
+# semaphore (in order) before they ask the scheduler for rate budget.
+HUBSPOT_ASYNC_CONCURRENCY = int(os.getenv("HUBSPOT_ASYNC_CONCURRENCY", "20"))
+
+# loop.time() by which the HubSpot calls of the current task must finish;
+# tasks started inside `deadline()` inherit it
+_deadline = ContextVar("hubspot_async_deadline", default=None)
+
+
+class AsyncHubSpotClient:
+    """
+    asyncio HubSpot API client built on `httpx.AsyncClient`.
+
+    Behaves like `HubSpotClient`, but calls are awaited, so one event loop
+    can keep up to `concurrency` requests in flight without a thread per
+    call. Calls share the process's rate budget (`scheduler`) and the
+    per-family circuit breakers of `hubspot_client`, so sync and async
+    traffic are paced and tripped together.
+
+    Errors match the sync client, so callers handle both alike: transport
+    errors and timeouts are raised as `requests.ConnectionError` /
+    `requests.Timeout`, an open circuit as `HubSpotUnavailable`, a passed
+    `deadline()` as `HubSpotDeadlineExceeded`. Responses are
+    `httpx.Response` objects (`status_code`, `json()`, `headers`, `text`).
+
+    Cancelling a call (e.g. `asyncio.wait_for` or task cancellation)
+    aborts the request and returns its concurrency slot and rate-budget
+    slot. A client is bound to the event loop it is first used on; call
+    `aclose()` on that loop when done.
+    """
+
+    def __init__(
+        self,
+        base_url=HUBSPOT_BASE_URL,
+        token=None,
+        timeout=HUBSPOT_TIMEOUT,
+        concurrency=HUBSPOT_ASYNC_CONCURRENCY,
+        scheduler=hubspot_scheduler,
+        breakers=hubspot_client,
+        max_retries=HUBSPOT_MAX_RETRIES
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.scheduler = scheduler
+        self.breakers = breakers
+        self.max_retries = max_retries
+        self._token = token
+        self._http = None
+        self._semaphore = None
+        self._loop = None
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        if self._http is None:
+            token = self._token or os.getenv("HUBSPOT_TOKEN")
+            if not token:
+                raise RuntimeError("HUBSPOT_TOKEN is not configured")
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"},
+                limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        elif loop is not self._loop:
+            raise RuntimeError("AsyncHubSpotClient is bound to another event loop")
+        return self._http
+
+    async def aclose(self):
+        """
+        Close the pooled connections.
+        """
+
+        if self._http is not None:
+            await self._http.aclose()
+        self._http = None
+        self._semaphore = None
+        self._loop = None
+
+    @staticmethod
+    @contextmanager
+    def deadline(seconds):
+        """
+        Bound every HubSpot call of the current task (and of tasks it
+        starts) inside the block.
+
+        Args:
+        - seconds (float): Time budget from now; nested deadlines can only
+          shorten it.
+        """
+
+        deadline = asyncio.get_running_loop().time() + seconds
+        previous = _deadline.get()
+        token = _deadline.set(deadline if previous is None else min(previous, deadline))
+        try:
+            yield
+        finally:
+            _deadline.reset(token)
+
+    @staticmethod
+    def _remaining():
+        deadline = _deadline.get()
+        return None if deadline is None else deadline - asyncio.get_running_loop().time()
+
+    async def request(self, method, path, endpoint, **kwargs):
+        """
+        Send a request to the HubSpot API.
+
+        Args:
+        - method (str): HTTP method.
+        - path (str): Path below the base URL, e.g. "/crm/v3/objects/contacts".
+        - endpoint (str): Logical endpoint name used as the metric label;
+          the part before the first dot is the breaker family.
+        - **kwargs: Passed to `httpx.AsyncClient.request` (json, params, ...).
+
+        Returns:
+        - httpx.Response: Response from HubSpot; a 429 or 5xx only once
+          retries are used up.
+
+        Raises:
+        - RuntimeError: If HUBSPOT_TOKEN is not configured.
+        - HubSpotUnavailable: If the endpoint family's circuit is open.
+        - HubSpotDeadlineExceeded: If the deadline passes first.
+        - RateBudgetExhausted: If the daily budget is used up.
+        - requests.RequestException: On connection errors or timeouts.
+        """
+
+        http = self._client()
+        breaker = self.breakers.breaker(endpoint)
+        if not breaker.allow():
+            record_call(endpoint, method, "circuit_open")
+            raise HubSpotUnavailable(f"HubSpot {endpoint.split('.', 1)[0]} API unavailable (circuit open)")
+        try:
+            async with self._semaphore:
+                response = await self._send(http, method, path, endpoint, kwargs)
+        except (RateBudgetExhausted, HubSpotDeadlineExceeded):
+            # never reached HubSpot, or gave up before it answered
+            breaker.cancel()
+            raise
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # cancelled
+            breaker.cancel()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    async def _acquire(self, search):
+        delay = self.scheduler.try_acquire(search=search)
+        if not delay:
+            return
+        # deferred: counted in the scheduler's queue depth like a blocked
+        # sync caller until it acquires, fails or is cancelled
+        self.scheduler.add_waiter()
+        try:
+            while delay:
+                remaining = self._remaining()
+                if remaining is not None and delay >= remaining:
+                    raise HubSpotDeadlineExceeded("Deadline passed waiting for HubSpot rate budget")
+                await asyncio.sleep(delay)
+                delay = self.scheduler.try_acquire(search=search)
+        finally:
+            self.scheduler.remove_waiter()
+
+    async def _send(self, http, method, path, endpoint, kwargs):
+        search = endpoint.endswith(".search")
+        retry_5xx = method != "POST" or endpoint.endswith(IDEMPOTENT_POST_SUFFIXES)
+        connect, read = self.timeout
+        attempt = 0
+        while True:
+            remaining = self._remaining()
+            if remaining is not None and remaining <= 0:
+                raise HubSpotDeadlineExceeded(f"Deadline passed before calling HubSpot {endpoint}")
+            await self._acquire(search)
+
+            remaining = self._remaining()
+            timeout = httpx.Timeout(read, connect=connect)
+            if remaining is not None:
+                timeout = httpx.Timeout(min(read, remaining), connect=min(connect, remaining))
+            start = time.perf_counter()
+            try:
+                call = http.request(method, path, timeout=timeout, **kwargs)
+                # httpx timeouts are per phase; the deadline bounds the whole call
+                response = await (call if remaining is None else asyncio.wait_for(call, max(remaining, 0)))
+            except asyncio.TimeoutError:
+                self.scheduler.release()
+                record_call(endpoint, method, "error", time.perf_counter() - start)
+                raise HubSpotDeadlineExceeded(f"Deadline passed during HubSpot {endpoint}")
+            except httpx.TimeoutException as e:
+                self.scheduler.release()
+                record_call(endpoint, method, "error", time.perf_counter() - start)
+                raise requests.Timeout(f"HubSpot {endpoint} timed out: {e}") from e
+            except httpx.HTTPError as e:
+                self.scheduler.release()
+                record_call(endpoint, method, "error", time.perf_counter() - start)
+                raise requests.ConnectionError(f"HubSpot {endpoint} failed: {e}") from e
+            except BaseException:
+                self.scheduler.release()
+                raise
+            record_call(endpoint, method, str(response.status_code), time.perf_counter() - start)
+
+            status = response.status_code
+            retryable = status == 429 or (status >= 500 and retry_5xx)
+            if not retryable or attempt >= self.max_retries:
+                self.scheduler.release(response.headers)
+                return response
+            attempt += 1
+            delay = retry_after_seconds(response, attempt)
+            remaining = self._remaining()
+            if remaining is not None and delay >= remaining:
+                # the retry could not finish in time; hand back this response
+                self.scheduler.release(response.headers)
+                return response
+            record_retry("429" if status == 429 else "5xx")
+            if status == 429:
+                # every caller backs off, not just this one
+                self.scheduler.release(response.headers, retry_after=delay)
+            else:
+                self.scheduler.release(response.headers)
+                await asyncio.sleep(delay)
+
+    async def get(self, path, endpoint, **kwargs):
+        return await self.request("GET", path, endpoint, **kwargs)
+
+    async def post(self, path, endpoint, **kwargs):
+        return await self.request("POST", path, endpoint, **kwargs)
+
+    async def patch(self, path, endpoint, **kwargs):
+        return await self.request("PATCH", path, endpoint, **kwargs)
+
+    async def delete(self, path, endpoint, **kwargs):
+        return await self.request("DELETE", path, endpoint, **kwargs)
+
+
+# Used by async routes, on the application's event loop; background
+# threads with their own loop create their own client.
+async_hubspot_client = AsyncHubSpotClient()
@@ -0,0 +1,243 @@
+from requests.exceptions import RequestException
+from Hubspot.client import hubspot_client
+from Hubspot.read_cache import hubspot_read_cache
+
+# HubSpot accepts at most 100 inputs per batch call
+BATCH_LIMIT = 100
+
+
+class BatchItemResult:
+    """
+    Outcome of one input of a batch call.
+
+    Attributes:
+    - key: Key the caller gave the input (object ID, `id_property`
+      value, or list index for creates).
+    - ok (bool): Whether HubSpot applied the input.
+    - id (str | None): HubSpot object ID (for creates, the new ID).
+    - data (dict | None): Object returned by HubSpot, if any.
+    - error (str | None): Error message when not ok.
+    - status (int | None): HTTP status of the failed call or item, used
+      by callers to tell retryable failures (429, 5xx) from permanent ones.
+    """
+
+    __slots__ = ("key", "ok", "id", "data", "error", "status")
+
+    def __init__(self, key, ok, id=None, data=None, error=None, status=None):
+        self.key = key
+        self.ok = ok
+        self.id = id
+        self.data = data
+        self.error = error
+        self.status = status
+
+    def __repr__(self):
+        return f"BatchItemResult(key={self.key!r}, ok={self.ok}, id={self.id!r}, error={self.error!r})"
+
+
+def chunks(items, size=BATCH_LIMIT):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _error_keys(error, field):
+    # HubSpot reports which inputs an error covers in its context, under
+    # the plural key ("ids") for ID-addressed calls
+    context = error.get("context") or {}
+    keys = context.get(f"{field}s")
+    if keys is None:
+        keys = context.get(field, [])
+    return [str(k) for k in keys]
+
+
+def _error_status(error):
+    # per-input errors arrive in a 207; only "not found" is permanent
+    return 404 if error.get("category") == "OBJECT_NOT_FOUND" else 207
+
+
+def _send(object_type, action, body, client):
+    """
+    Send one batch call.
+
+    Returns:
+    - tuple: (response JSON or {}, None) on 200/201/204/207, or
+      (None, (status, message)) when the whole call failed.
+    """
+
+    try:
+        response = client.post(
+            f"/crm/v3/objects/{object_type}/batch/{action}",
+            f"{object_type}.batch_{action}",
+            json=body
+        )
+    except RequestException as e:
+        return None, (None, f"HubSpot batch {action} failed: {e}")
+    if response.status_code in (200, 201, 207):
+        return response.json(), None
+    if response.status_code == 204:
+        return {}, None
+    return None, (response.status_code, response.text)
+
+
+def _map_by_id(keys, data, failure, id_field="id"):
+    """
+    Map a batch response back to per-input results by object ID.
+    """
+
+    if failure:
+        status, message = failure
+        return {key: BatchItemResult(key, False, id=key, error=message, status=status) for key in keys}
+
+    results = {}
+    for error in data.get("errors", []):
+        for key in _error_keys(error, id_field):
+            results[key] = BatchItemResult(key, False, id=key, error=error.get("message"), status=_error_status(error))
+    for obj in data.get("results", []):
+        results[str(obj["id"])] = BatchItemResult(str(obj["id"]), True, id=str(obj["id"]), data=obj)
+    for key in keys:
+        # inputs HubSpot neither returned nor reported as errors
+        results.setdefault(key, BatchItemResult(
+            key, not data.get("errors"), id=key,
+            error="Missing from HubSpot batch response" if data.get("errors") else None,
+            status=207 if data.get("errors") else None
+        ))
+    return results
+
+
+def batch_create(object_type, inputs, client=hubspot_client):
+    """
+    Create objects with `/batch/create`, 100 per call.
+
+    Each input is tagged with `objectWriteTraceId` (its list index), which
+    HubSpot echoes in results and errors, so partial failures map back to
+    the input that caused them.
+
+    Args:
+    - object_type (str): "contacts", "tickets", ...
+    - inputs (list[dict]): Create inputs ({"properties": ..., "associations": ...}).
+    - client (HubSpotClient, optional): Client to call HubSpot with.
+
+    Returns:
+    - list[BatchItemResult]: One result per input, in input order; `id`
+      is the new HubSpot ID.
+    """
+
+    results = [None] * len(inputs)
+    for chunk in chunks(list(range(len(inputs)))):
+        body = {"inputs": [dict(inputs[i], objectWriteTraceId=str(i)) for i in chunk]}
+        data, failure = _send(object_type, "create", body, client)
+        if failure:
+            status, message = failure
+            for i in chunk:
+                results[i] = BatchItemResult(i, False, error=message, status=status)
+            continue
+        for error in data.get("errors", []):
+            for trace in _error_keys(error, "objectWriteTraceId"):
+                results[int(trace)] = BatchItemResult(int(trace), False, error=error.get("message"), status=207)
+        for obj in data.get("results", []):
+            trace = obj.get("objectWriteTraceId")
+            if trace is not None:
+                results[int(trace)] = BatchItemResult(int(trace), True, id=str(obj["id"]), data=obj)
+        for i in chunk:
+            if results[i] is None:
+                results[i] = BatchItemResult(i, False, error="Missing from HubSpot batch response", status=207)
+    return results
+
+
+def batch_update(object_type, inputs, client=hubspot_client):
+    """
+    Update objects with `/batch/update`, 100 per call.
+
+    Args:
+    - object_type (str): "contacts", "tickets", ...
+    - inputs (list[dict]): {"id": <HubSpot ID>, "properties": {...}}. IDs
+      must be unique.
+    - client (HubSpotClient, optional): Client to call HubSpot with.
+
+    Returns:
+    - dict[str, BatchItemResult]: Result per HubSpot ID.
+    """
+
+    results = {}
+    for chunk in chunks(inputs):
+        keys = [str(item["id"]) for item in chunk]
+        data, failure = _send(object_type, "update", {"inputs": chunk}, client)
+        for key in keys:
+            hubspot_read_cache.invalidate(object_type, key)
+        results.update(_map_by_id(keys, data, failure))
+    return results
+
+
+def batch_read(object_type, ids, properties=None, id_property=None, client=hubspot_client):
+    """
+    Read objects with `/batch/read`, 100 per call.
+
+    Args:
+    - object_type (str): "contacts", "tickets", ...
+    - ids (Iterable): HubSpot IDs, or values of `id_property`.
+    - properties (list[str], optional): Properties to return.
+    - id_property (str, optional): Unique property the IDs refer to
+      (e.g. "email"); defaults to the HubSpot object ID.
+    - client (HubSpotClient, optional): Client to call HubSpot with.
+
+    Returns:
+    - dict[str, BatchItemResult]: Result per requested ID. Objects that do
+      not exist are returned with ok=False and status 404; other per-input
+      errors keep status 207, so callers can retry them.
+    """
+
+    keys = list(dict.fromkeys(str(i) for i in ids))
+    results = {}
+    for chunk in chunks(keys):
+        body = {"inputs": [{"id": key} for key in chunk], "properties": properties or []}
+        if id_property:
+            body["idProperty"] = id_property
+        data, failure = _send(object_type, "read", body, client)
+        if failure:
+            results.update(_map_by_id(chunk, None, failure))
+            continue
+        found = {}
+        for error in data.get("errors", []):
+            for key in _error_keys(error, "id"):
+                found[key] = BatchItemResult(
+                    key, False, id=None if id_property else key,
+                    error=error.get("message"), status=_error_status(error)
+                )
+        for obj in data.get("results", []):
+            key = str(obj["id"]) if not id_property else str(obj.get("properties", {}).get(id_property))
+            found[key] = BatchItemResult(key, True, id=str(obj["id"]), data=obj)
+        for key in chunk:
+            results[key] = found.get(key) or BatchItemResult(
+                key, False, id=None if id_property else key,
+                # neither returned nor reported: absent only when HubSpot
+                # reported no errors at all
+                error="Not found" if not data.get("errors") else "Missing from HubSpot batch response",
+                status=404 if not data.get("errors") else 207
+            )
+    return results
+
+
+def batch_archive(object_type, ids, client=hubspot_client):
+    """
+    Archive (delete) objects with `/batch/archive`, 100 per call.
+
+    HubSpot answers 204 without per-input results, and IDs that do not
+    exist count as archived.
+
+    Args:
+    - object_type (str): "contacts", "tickets", ...
+    - ids (Iterable): HubSpot IDs.
+    - client (HubSpotClient, optional): Client to call HubSpot with.
+
+    Returns:
+    - dict[str, BatchItemResult]: Result per HubSpot ID.
+    """
+
+    keys = list(dict.fromkeys(str(i) for i in ids))
+    results = {}
+    for chunk in chunks(keys):
+        data, failure = _send(object_type, "archive", {"inputs": [{"id": key} for key in chunk]}, client)
+        for key in chunk:
+            hubspot_read_cache.invalidate(object_type, key)
+        results.update(_map_by_id(chunk, data, failure))
+    return results
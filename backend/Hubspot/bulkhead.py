@@ -0,0 +1,106 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException, status
+from prometheus_client import Counter, Gauge
+from Hubspot.client import hubspot_client
+
+# Routes that call HubSpot while the client waits run on these threads
+# instead of the shared threadpool that serves every sync route, so a
+# slow HubSpot can hold at most HUBSPOT_BULKHEAD_WORKERS threads. Work
+# beyond the queue limit is rejected instead of queued.
+HUBSPOT_BULKHEAD_WORKERS = int(os.getenv("HUBSPOT_BULKHEAD_WORKERS", "8"))
+HUBSPOT_BULKHEAD_QUEUE_LIMIT = int(os.getenv("HUBSPOT_BULKHEAD_QUEUE_LIMIT", str(HUBSPOT_BULKHEAD_WORKERS * 2)))
+# Upper bound on the HubSpot time of one request, including rate-limit
+# waits and retries.
+HUBSPOT_CALL_DEADLINE_SECONDS = float(os.getenv("HUBSPOT_CALL_DEADLINE_SECONDS", "15"))
+
+_executor = ThreadPoolExecutor(max_workers=HUBSPOT_BULKHEAD_WORKERS, thread_name_prefix="hubspot-bulkhead")
+_pending = 0
+_pending_lock = threading.Lock()
+
+_in_use = Gauge(
+    "hubspot_bulkhead_pending",
+    "Requests running or queued in the HubSpot bulkhead"
+)
+_in_use.set_function(lambda: _pending)
+_rejected = Counter(
+    "hubspot_bulkhead_rejected_total",
+    "Requests rejected because the HubSpot bulkhead was full"
+)
+
+
+class HubSpotBusy(Exception):
+    """
+    Raised when the HubSpot bulkhead queue is full.
+    """
+
+
+def _admit():
+    global _pending
+    with _pending_lock:
+        if _pending >= HUBSPOT_BULKHEAD_QUEUE_LIMIT:
+            _rejected.inc()
+            raise HubSpotBusy("Too many HubSpot requests in progress")
+        _pending += 1
+
+
+def _done(_future=None):
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _call(fn, args, kwargs):
+    with hubspot_client.deadline(HUBSPOT_CALL_DEADLINE_SECONDS):
+        return fn(*args, **kwargs)
+
+
+async def run_in_bulkhead(fn, *args, **kwargs):
+    """
+    Run a blocking function that calls HubSpot on the bulkhead executor.
+
+    Args:
+    - fn (callable): Function to run; its HubSpot calls share a deadline
+      of HUBSPOT_CALL_DEADLINE_SECONDS.
+
+    Returns:
+    - Any: The function's result.
+
+    Raises:
+    - HubSpotBusy: If the bulkhead queue is full.
+    """
+
+    _admit()
+    try:
+        future = _executor.submit(_call, fn, args, kwargs)
+    except BaseException:
+        _done()
+        raise
+    future.add_done_callback(_done)
+    return await asyncio.wrap_future(future)
+
+
+def hubspot_bulkhead(route):
+    """
+    Run a sync route that calls HubSpot on the bulkhead executor.
+
+    Place between the router decorator and the function; the signature is
+    kept, so FastAPI resolves parameters and dependencies as before. A
+    full bulkhead answers 503 with Retry-After.
+    """
+
+    @functools.wraps(route)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await run_in_bulkhead(route, *args, **kwargs)
+        except HubSpotBusy as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=str(e),
+                headers={"Retry-After": "1"}
+            )
+
+    return wrapper
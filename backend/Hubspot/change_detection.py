@@ -0,0 +1,89 @@
+import json
+import threading
+import xxhash
+from prometheus_client import Counter, Gauge
+
+# object type -> (table, key column) holding `hubspot_sync_hash`
+SYNC_HASH_TABLES = {
+    "contact": ("customer", "customer_id"),
+    "ticket": ("ticket", "ticket_id"),
+}
+
+_checks = Counter(
+    "hubspot_sync_checks_total",
+    "HubSpot property syncs by whether the call was sent or skipped as unchanged",
+    ["object_type", "outcome"]
+)
+_skip_ratio = Gauge(
+    "hubspot_sync_skip_ratio",
+    "Share of HubSpot property syncs skipped because nothing changed (since start)",
+    ["object_type"]
+)
+
+_lock = threading.Lock()
+_totals = {object_type: {"sent": 0, "skipped": 0} for object_type in SYNC_HASH_TABLES}
+
+
+def _ratio(object_type):
+    counts = _totals[object_type]
+    total = counts["sent"] + counts["skipped"]
+    return counts["skipped"] / total if total else 0.0
+
+
+for _object_type in SYNC_HASH_TABLES:
+    _skip_ratio.labels(_object_type).set_function(lambda object_type=_object_type: _ratio(object_type))
+
+
+def property_hash(properties):
+    """
+    Return a stable hash of HubSpot properties.
+
+    Values are compared as HubSpot stores them (strings), and keys are
+    sorted, so the hash only changes when a sent value would.
+
+    Args:
+    - properties (dict): Property name -> value.
+
+    Returns:
+    - str: 16-character hex xxh3-64 digest.
+    """
+
+    canonical = json.dumps(
+        {key: str(value) for key, value in properties.items() if value is not None},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return xxhash.xxh3_64_hexdigest(canonical.encode())
+
+
+def record_check(object_type, skipped):
+    """
+    Count one sync decision for the skip metrics.
+    """
+
+    outcome = "skipped" if skipped else "sent"
+    _checks.labels(object_type, outcome).inc()
+    with _lock:
+        _totals[object_type][outcome] += 1
+
+
+def store_sync_hash(db, object_type, object_id, digest):
+    """
+    Remember the hash of the properties last sent for an object.
+
+    Args:
+    - db: Database connection object.
+    - object_type (str): "contact" or "ticket".
+    - object_id (int): Local customer ID or ticket ID.
+    - digest (str | None): Hash from `property_hash`; None forces the
+      next sync to be sent.
+    """
+
+    table, key = SYNC_HASH_TABLES[object_type]
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET hubspot_sync_hash = %s WHERE {key} = %s",
+            (digest, object_id)
+        )
+    db.commit()
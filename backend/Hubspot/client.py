@@ -0,0 +1,277 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from prometheus_client import Counter, Histogram
+from Hubspot.scheduler import hubspot_scheduler, retry_after_seconds, record_retry, HUBSPOT_MAX_RETRIES, RateBudgetExhausted
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+load_dotenv()
+HUBSPOT_BASE_URL = os.getenv("HUBSPOT_BASE_URL", "https://api.hubapi.com")
+
+# (connect, read) seconds; HubSpot calls run inside request handlers, so
+# a hung socket must not hold a worker thread indefinitely.
+HUBSPOT_TIMEOUT = (3.05, 10)
+HUBSPOT_POOL_SIZE = 20
+
+# POST endpoints that are safe to repeat after a 5xx (a repeated create
+# could duplicate the object; 429s are retried for every endpoint since
+# HubSpot did not process the call)
+IDEMPOTENT_POST_SUFFIXES = (".search", ".batch_read", ".batch_update", ".batch_archive")
+
+# One breaker per endpoint family ("contacts", "tickets", ...): an
+# outage of one HubSpot API does not stop calls to the others.
+HUBSPOT_BREAKER_FAILURES = 5
+HUBSPOT_BREAKER_RESET_SECONDS = 30
+
+_latency = Histogram(
+    "hubspot_request_duration_seconds",
+    "HubSpot API call latency",
+    ["endpoint", "method"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+_requests = Counter(
+    "hubspot_requests_total",
+    "HubSpot API calls by outcome",
+    ["endpoint", "status"]
+)
+
+
+def record_call(endpoint, method, outcome, seconds=None):
+    """
+    Record one HubSpot API call in the request metrics.
+
+    Args:
+    - endpoint (str): Logical endpoint name.
+    - method (str): HTTP method.
+    - outcome (str): Status code, "error" for connection errors or
+      "circuit_open".
+    - seconds (float, optional): Call duration, if HubSpot was called.
+    """
+
+    if seconds is not None:
+        _latency.labels(endpoint, method).observe(seconds)
+    _requests.labels(endpoint, outcome).inc()
+
+
+class HubSpotUnavailable(CircuitOpenError, requests.RequestException):
+    """
+    Raised without calling HubSpot while the endpoint family's circuit is
+    open. A `RequestException`, so callers handle it like a connection
+    error.
+    """
+
+
+class HubSpotDeadlineExceeded(requests.Timeout):
+    """
+    Raised when the caller's deadline (see `HubSpotClient.deadline`)
+    passes before a call could be made.
+    """
+
+
+class HubSpotClient:
+    """
+    Shared HubSpot API client.
+
+    Wraps one `requests.Session`, so every call reuses pooled keep-alive
+    connections instead of opening a new TLS connection. Auth headers are
+    built once, every call gets a default timeout, and latency is
+    recorded per logical endpoint (e.g. "contacts.update") rather than
+    per URL, so object IDs do not explode metric cardinality.
+
+    Calls are paced by `scheduler` (see `Hubspot.scheduler`): they wait
+    for rate budget instead of hitting HubSpot's limits, and 429s (and
+    5xx on idempotent calls) are retried with backoff, honoring
+    Retry-After.
+
+    Each endpoint family has a circuit breaker: after
+    HUBSPOT_BREAKER_FAILURES consecutive connection errors, timeouts or
+    5xx, calls fail fast with `HubSpotUnavailable` until a probe
+    succeeds. Inside `deadline()` every wait, retry and socket timeout is
+    capped by the remaining time.
+
+    Responses are returned as-is; callers keep their own status handling
+    (`raise_for_status()` etc.). Connection errors and timeouts raise
+    `requests.RequestException` as before.
+    """
+
+    def __init__(
+        self,
+        base_url=HUBSPOT_BASE_URL,
+        token=None,
+        timeout=HUBSPOT_TIMEOUT,
+        pool_size=HUBSPOT_POOL_SIZE,
+        scheduler=hubspot_scheduler,
+        max_retries=HUBSPOT_MAX_RETRIES
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.max_retries = max_retries
+        self._token = token
+        self._breakers = {}
+        self._breakers_lock = threading.Lock()
+        self._local = threading.local()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({"Content-Type": "application/json"})
+
+    def _ensure_auth(self):
+        # read on first use so a token set after import is picked up
+        if "Authorization" not in self.session.headers:
+            token = self._token or os.getenv("HUBSPOT_TOKEN")
+            if not token:
+                raise RuntimeError("HUBSPOT_TOKEN is not configured")
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def breaker(self, endpoint):
+        """
+        Return the circuit breaker of an endpoint's family.
+        """
+
+        family = endpoint.split(".", 1)[0]
+        with self._breakers_lock:
+            breaker = self._breakers.get(family)
+            if breaker is None:
+                breaker = self._breakers[family] = CircuitBreaker(
+                    f"hubspot_{family}",
+                    failure_threshold=HUBSPOT_BREAKER_FAILURES,
+                    reset_timeout=HUBSPOT_BREAKER_RESET_SECONDS
+                )
+            return breaker
+
+    @contextmanager
+    def deadline(self, seconds):
+        """
+        Bound every HubSpot call made by this thread inside the block.
+
+        Args:
+        - seconds (float): Time budget from now; nested deadlines can only
+          shorten it.
+        """
+
+        previous = getattr(self._local, "deadline", None)
+        deadline = time.monotonic() + seconds
+        self._local.deadline = deadline if previous is None else min(previous, deadline)
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
+    def _remaining(self):
+        deadline = getattr(self._local, "deadline", None)
+        return None if deadline is None else deadline - time.monotonic()
+
+    def request(self, method, path, endpoint, max_wait=None, **kwargs):
+        """
+        Send a request to the HubSpot API.
+
+        Args:
+        - method (str): HTTP method.
+        - path (str): Path below the base URL, e.g. "/crm/v3/objects/contacts".
+        - endpoint (str): Logical endpoint name used as the metric label;
+          the part before the first dot is the breaker family.
+        - max_wait (float, optional): Longest time to wait for rate budget
+          per attempt; waits as long as needed by default.
+        - **kwargs: Passed to `requests.Session.request` (json, params, ...).
+
+        Returns:
+        - requests.Response: Response from HubSpot; a 429 or 5xx only once
+          retries are used up.
+
+        Raises:
+        - RuntimeError: If HUBSPOT_TOKEN is not configured.
+        - HubSpotUnavailable: If the endpoint family's circuit is open.
+        - RateBudgetExhausted: If no rate budget is available in time.
+        - requests.RequestException: On connection errors or timeouts.
+        """
+
+        self._ensure_auth()
+        breaker = self.breaker(endpoint)
+        if not breaker.allow():
+            _requests.labels(endpoint, "circuit_open").inc()
+            raise HubSpotUnavailable(f"HubSpot {endpoint.split('.', 1)[0]} API unavailable (circuit open)")
+        try:
+            response = self._send(method, path, endpoint, max_wait, kwargs)
+        except (RateBudgetExhausted, HubSpotDeadlineExceeded):
+            # never reached HubSpot
+            breaker.cancel()
+            raise
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.cancel()
+            raise
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def _send(self, method, path, endpoint, max_wait, kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        search = endpoint.endswith(".search")
+        retry_5xx = method != "POST" or endpoint.endswith(IDEMPOTENT_POST_SUFFIXES)
+        attempt = 0
+        while True:
+            remaining = self._remaining()
+            wait = max_wait
+            timeout = kwargs["timeout"]
+            if remaining is not None:
+                if remaining <= 0:
+                    raise HubSpotDeadlineExceeded(f"Deadline passed before calling HubSpot {endpoint}")
+                wait = remaining if max_wait is None else min(max_wait, remaining)
+                timeout = tuple(min(t, remaining) for t in timeout) if isinstance(timeout, tuple) else min(timeout, remaining)
+
+            self.scheduler.acquire(search=search, max_wait=wait)
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", **dict(kwargs, timeout=timeout))
+            except requests.RequestException:
+                self.scheduler.release()
+                _requests.labels(endpoint, "error").inc()
+                raise
+            finally:
+                _latency.labels(endpoint, method).observe(time.perf_counter() - start)
+            _requests.labels(endpoint, str(response.status_code)).inc()
+
+            status = response.status_code
+            retryable = status == 429 or (status >= 500 and retry_5xx)
+            if not retryable or attempt >= self.max_retries:
+                self.scheduler.release(response.headers)
+                return response
+            attempt += 1
+            delay = retry_after_seconds(response, attempt)
+            remaining = self._remaining()
+            if remaining is not None and delay >= remaining:
+                # the retry could not finish in time; hand back this response
+                self.scheduler.release(response.headers)
+                return response
+            record_retry("429" if status == 429 else "5xx")
+            if status == 429:
+                # every caller backs off, not just this one
+                self.scheduler.release(response.headers, retry_after=delay)
+            else:
+                self.scheduler.release(response.headers)
+                time.sleep(delay)
+
+    def get(self, path, endpoint, **kwargs):
+        return self.request("GET", path, endpoint, **kwargs)
+
+    def post(self, path, endpoint, **kwargs):
+        return self.request("POST", path, endpoint, **kwargs)
+
+    def patch(self, path, endpoint, **kwargs):
+        return self.request("PATCH", path, endpoint, **kwargs)
+
+    def delete(self, path, endpoint, **kwargs):
+        return self.request("DELETE", path, endpoint, **kwargs)
+
+
+hubspot_client = HubSpotClient()
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from Authentication.redis_client import redis_cache_client
+
+logger = logging.getLogger(__name__)
+
+CONTACT_ID_CACHE_SIZE = 10000
+# Local entries are short-lived so a mapping dropped by another worker
+# (e.g. after a 404) is not served for long; Redis holds them longer.
+CONTACT_ID_LOCAL_TTL_SECONDS = 300
+CONTACT_ID_REDIS_TTL_SECONDS = 7 * 24 * 3600
+
+_lookups = Counter(
+    "hubspot_contact_id_lookups_total",
+    "HubSpot contact ID lookups by where the ID was found",
+    ["source"]
+)
+
+
+def contact_key(email):
+    return f"hubspot_contact_id:{email.strip().lower()}"
+
+
+def record_lookup(source):
+    """
+    Count a contact ID lookup ("memory", "redis", "db", "search" or "miss").
+    """
+
+    _lookups.labels(source).inc()
+
+
+class ContactIdCache:
+    """
+    Email -> HubSpot contact ID mapping, in a bounded local LRU in front
+    of Redis.
+
+    Redis is only a cache here (the `customer.hubspot_contact_id` column
+    is the stored mapping), so Redis errors are logged and treated as a
+    miss.
+    """
+
+    def __init__(self, maxsize=CONTACT_ID_CACHE_SIZE, local_ttl=CONTACT_ID_LOCAL_TTL_SECONDS):
+        self._maxsize = maxsize
+        self._local_ttl = local_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            contact_id, valid_until = entry
+            if valid_until <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return contact_id
+
+    def _put_local(self, key, contact_id):
+        with self._lock:
+            self._entries[key] = (contact_id, time.monotonic() + self._local_ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, email):
+        """
+        Return the cached contact ID for an email, or None on a miss.
+        """
+
+        key = contact_key(email)
+        contact_id = self._get_local(key)
+        if contact_id is not None:
+            record_lookup("memory")
+            return contact_id
+        try:
+            contact_id = redis_cache_client.get(key)
+        except RedisError as e:
+            logger.warning("Contact ID cache read failed: %s", e)
+            return None
+        if contact_id is not None:
+            self._put_local(key, contact_id)
+            record_lookup("redis")
+        return contact_id
+
+    def put(self, email, contact_id):
+        """
+        Cache the contact ID of an email.
+        """
+
+        key = contact_key(email)
+        self._put_local(key, str(contact_id))
+        try:
+            redis_cache_client.set(key, str(contact_id), ex=CONTACT_ID_REDIS_TTL_SECONDS)
+        except RedisError as e:
+            logger.warning("Contact ID cache write failed: %s", e)
+
+    def forget(self, email):
+        """
+        Drop the cached contact ID of an email.
+        """
+
+        key = contact_key(email)
+        with self._lock:
+            self._entries.pop(key, None)
+        try:
+            redis_cache_client.delete(key)
+        except RedisError as e:
+            logger.warning("Contact ID cache delete failed: %s", e)
+
+
+contact_id_cache = ContactIdCache()
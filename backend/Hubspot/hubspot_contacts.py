@@ -1,55 +1,86 @@
+import asyncio
 from fastapi import status,HTTPException
-import os,requests
 from requests.exceptions import RequestException
+from Hubspot.client import hubspot_client
+from Hubspot.async_client import async_hubspot_client
+from Hubspot.contact_map import contact_id_cache, record_lookup
+from Hubspot.change_detection import property_hash, record_check, store_sync_hash
+from Hubspot.read_cache import hubspot_read_cache
 
-url = "https://api.hubapi.com"
 
-def create_contact_from_db(customer):
+class ContactNotFound(LookupError):
+    """
+    Raised when HubSpot answers 404 for a stored contact ID (the contact
+    was deleted or merged).
     """
-    Create a new HubSpot contact from a customer record in the database.
 
-    This function sends a request to the HubSpot CRM API to create a contact
-    with the customer's details. Returns the HubSpot contact ID for internal use.
+def contact_properties(customer):
+    """
+    Map a customer record to HubSpot contact properties.
 
     Args:
-    - customer (dict): Customer record containing all relevant fields.
+    - customer (dict): Customer record.
 
     Returns:
-    - str: HubSpot contact ID of the newly created contact.
+    - dict: HubSpot contact properties.
+    """
+
+    return {
+        "email": customer["customer_email"],
+
+        "customer_id": customer["customer_id"],
+        "customer_name": customer["customer_name"],
+        "customer_email": customer["customer_email"],
+        "customer_mobile_number": customer["customer_mobile_number"],
+        "customer_company_name": customer["customer_company_name"],
+        "customer_city": customer["customer_city"],
+        "customer_state": customer["customer_state"],
+        "customer_country": customer["customer_country"],
+        "customer_address": customer["customer_address"],
+    }
+
+
+def contact_sync_properties(customer):
+    """
+    Return the non-empty contact properties, as sent by updates and
+    hashed by change detection.
+    """
+
+    return {k: v for k, v in contact_properties(customer).items() if v}
+
+
+def contact_search_payload(email):
+    """
+    Return the body of a contact search by email.
+    """
+
+    return {
+        "filterGroups": [{
+            "filters": [{
+                "propertyName": "email",
+                "operator": "EQ",
+                "value": email
+            }]
+        }],
+        "properties": ["email"],
+        "limit": 1
+    }
+
+
+def contact_id_from_search(response):
+    """
+    Return the contact ID from a contact search response (sync or async
+    client), or None if nothing matched.
 
     Raises:
-    - RuntimeError: If the HubSpot API request fails.
+    - RuntimeError: If the search failed.
     """
 
-    try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "properties": {
-                "email": customer["customer_email"],
-
-                "customer_id": customer["customer_id"],
-                "customer_name": customer["customer_name"],
-                "customer_email": customer["customer_email"],
-                "customer_mobile_number": customer["customer_mobile_number"],
-                "customer_company_name": customer["customer_company_name"],
-                "customer_city": customer["customer_city"],
-                "customer_state": customer["customer_state"],
-                "customer_country": customer["customer_country"],
-                "customer_address": customer["customer_address"],
-            }
-        }
+    if response.status_code != 200:
+        raise RuntimeError(f"HubSpot contact search failed: {response.status_code} {response.text}")
+    results = response.json().get("results", [])
+    return results[0]["id"] if results else None
 
-        response = requests.post(f"{url}/crm/v3/objects/contacts", json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        return data["id"]  # ✅ internal use only
-    except RequestException as e:
-        raise RuntimeError(f"HubSpot API request failed: {e}")
 
 def get_contact_id_by_email(email):
     """
@@ -72,29 +103,8 @@ def get_contact_id_by_email(email):
     """
 
     try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        payload = {
-            "filterGroups": [{
-                "filters": [{
-                    "propertyName": "email",
-                    "operator": "EQ",
-                    "value": email
-                }]
-            }],
-            "properties": ["email"],
-            "limit": 1
-        }
-
-        response = requests.post(f"{url}/crm/v3/objects/contacts/search", json=payload, headers=headers)
-        response.raise_for_status()
-
-        results = response.json().get("results", [])
-        return results[0]["id"] if results else None
+        response = hubspot_client.post("/crm/v3/objects/contacts/search", "contacts.search", json=contact_search_payload(email))
+        return contact_id_from_search(response)
 
     except Exception as e:
         raise HTTPException(
@@ -102,68 +112,213 @@ def get_contact_id_by_email(email):
             detail=str(e)
         )
 
-def update_contact(contact_id, customer):
+def save_contact_id(db, customer_id, email, contact_id):
     """
-    Update an existing HubSpot contact with new customer data.
+    Store a customer's HubSpot contact ID in the database and the cache.
 
-    Sends a PATCH request to the HubSpot CRM API to update the contact's
-    properties. Only non-empty values are sent in the request.
+    Args:
+    - db: Database connection object.
+    - customer_id (int): Local customer ID.
+    - email (str): Customer email (cache key).
+    - contact_id (str): HubSpot contact ID.
+    """
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE customer SET hubspot_contact_id = %s WHERE customer_id = %s",
+            (contact_id, customer_id)
+        )
+    db.commit()
+    contact_id_cache.put(email, contact_id)
+
+
+def forget_contact_id(db, email, contact_id):
+    """
+    Drop a contact ID HubSpot no longer knows from the database and the
+    cache, so the next lookup searches again.
+
+    Only rows still holding `contact_id` are cleared, so a mapping another
+    worker already replaced is kept.
+    """
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE customer SET hubspot_contact_id = NULL, hubspot_sync_hash = NULL WHERE customer_email = %s AND hubspot_contact_id = %s",
+            (email, contact_id)
+        )
+    db.commit()
+    contact_id_cache.forget(email)
+
+
+def resolve_contact_id(email, db):
+    """
+    Return the HubSpot contact ID of a customer email.
+
+    Looks in the contact ID cache, then `customer.hubspot_contact_id`, and
+    only searches HubSpot when neither has it; a found ID is stored for
+    the next call.
+
+    Args:
+    - email (str): Customer email.
+    - db: Database connection object.
+
+    Returns:
+    - str | None: HubSpot contact ID, or None if HubSpot has no contact
+      with this email.
+
+    Raises:
+    - HTTPException (500): If the HubSpot search fails.
+    """
+
+    contact_id, customer = _stored_contact_id(email, db)
+    if contact_id:
+        return contact_id
+    return _remember_found_contact(db, customer, email, get_contact_id_by_email(email))
+
+
+def _stored_contact_id(email, db):
+    # (contact ID from the cache or the customer row, customer row)
+    contact_id = contact_id_cache.get(email)
+    if contact_id:
+        return contact_id, None
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT customer_id, hubspot_contact_id FROM customer WHERE customer_email = %s",
+            (email,)
+        )
+        customer = cursor.fetchone()
+    if customer and customer["hubspot_contact_id"]:
+        record_lookup("db")
+        contact_id_cache.put(email, customer["hubspot_contact_id"])
+        return customer["hubspot_contact_id"], customer
+    return None, customer
+
+
+def _remember_found_contact(db, customer, email, contact_id):
+    # store the result of a search for the next lookup
+    if not contact_id:
+        record_lookup("miss")
+        return None
+    record_lookup("search")
+    if customer:
+        save_contact_id(db, customer["customer_id"], email, contact_id)
+    else:
+        contact_id_cache.put(email, contact_id)
+    return contact_id
+
+
+def _store_synced(db, customer, contact_id, digest):
+    # after an update of a stored or cached contact ID
+    if customer.get("hubspot_contact_id") != contact_id:
+        save_contact_id(db, customer["customer_id"], customer["customer_email"], contact_id)
+    store_sync_hash(db, "contact", customer["customer_id"], digest)
+
+
+async def async_get_contact_id_by_email(email, client=async_hubspot_client):
+    """
+    Async `get_contact_id_by_email`.
+
+    Returns:
+    - str | None: The HubSpot contact ID, or None if not found.
+
+    Raises:
+    - RuntimeError: If the HubSpot search fails.
+    """
+
+    response = await client.post("/crm/v3/objects/contacts/search", "contacts.search", json=contact_search_payload(email))
+    return contact_id_from_search(response)
+
+
+async def async_resolve_contact_id(email, db, client=async_hubspot_client):
+    """
+    Async `resolve_contact_id`; the cache and database lookups run in a
+    worker thread.
+
+    Raises:
+    - RuntimeError: If the HubSpot search fails.
+    """
+
+    contact_id, customer = await asyncio.to_thread(_stored_contact_id, email, db)
+    if contact_id:
+        return contact_id
+    contact_id = await async_get_contact_id_by_email(email, client)
+    return await asyncio.to_thread(_remember_found_contact, db, customer, email, contact_id)
+
+
+async def async_update_contact(contact_id, customer, client=async_hubspot_client):
+    """
+    Update an existing HubSpot contact with the customer's non-empty
+    properties.
 
     Args:
     - contact_id (str): HubSpot contact ID to update.
     - customer (dict): Customer record with updated data.
+    - client (AsyncHubSpotClient, optional): Client bound to the running
+      loop.
 
     Returns:
     - dict: JSON response from HubSpot API.
 
     Raises:
-    - RuntimeError: If the HubSpot API request fails.
+    - ContactNotFound: If HubSpot has no contact with this ID.
+    - RuntimeError: If the update fails.
     """
 
-    try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        properties = {
-                "email": customer["customer_email"],
-
-                "customer_id": customer["customer_id"],
-                "customer_name": customer["customer_name"],
-                "customer_email": customer["customer_email"],
-                "customer_mobile_number": customer["customer_mobile_number"],
-                "customer_company_name": customer["customer_company_name"],
-                "customer_city": customer["customer_city"],
-                "customer_state": customer["customer_state"],
-                "customer_country": customer["customer_country"],
-                "customer_address": customer["customer_address"],
-            }
+    payload = {"properties": contact_sync_properties(customer)}
+    response = await client.patch(f"/crm/v3/objects/contacts/{contact_id}", "contacts.update", json=payload)
+    await asyncio.to_thread(hubspot_read_cache.invalidate, "contacts", contact_id)
+    if response.status_code == 404:
+        raise ContactNotFound(contact_id)
+    if response.status_code != 200:
+        raise RuntimeError(f"HubSpot contact update failed: {response.status_code} {response.text}")
+    return response.json()
 
-        properties = {k: v for k, v in properties.items() if v}
 
-        payload = {"properties": properties}
-        response = requests.patch(f"{url}/crm/v3/objects/contacts/{contact_id}", json=payload, headers=headers)
-        response.raise_for_status()
-        return response.json()
-    except RequestException as e:
-        raise RuntimeError(f"HubSpot API request failed: {e}")
+async def async_create_contact(customer, client=async_hubspot_client):
+    """
+    Create a new HubSpot contact from a customer record.
+
+    Args:
+    - customer (dict): Customer record containing all relevant fields.
+    - client (AsyncHubSpotClient, optional): Client bound to the running
+      loop.
+
+    Returns:
+    - str: HubSpot contact ID of the new contact.
+
+    Raises:
+    - RuntimeError: If the create fails.
+    """
+
+    response = await client.post("/crm/v3/objects/contacts", "contacts.create", json={"properties": contact_properties(customer)})
+    if response.status_code != 201:
+        raise RuntimeError(f"HubSpot contact create failed: {response.status_code} {response.text}")
+    return response.json()["id"]
 
 
-def sync_contact(customer, db):
+async def async_sync_contact(customer, db, client=async_hubspot_client):
     """
     Synchronize a customer record with HubSpot.
 
     This function ensures that a customer is represented in HubSpot:
-    1. If the HubSpot contact ID exists, it updates the contact.
+    1. If the HubSpot contact ID is stored (or cached), it updates the
+       contact, unless the mapped properties are unchanged since the last
+       sync (`hubspot_sync_hash`); a 404 drops the stale ID and falls
+       through.
     2. Else, it searches for an existing contact by email.
     3. If not found, it creates a new contact.
 
-    After syncing, the HubSpot contact ID is saved in the local database.
+    After syncing, the HubSpot contact ID and the hash of the synced
+    properties are saved in the local database. HubSpot calls are
+    awaited on `client`; database and cache access run in a worker
+    thread, so the event loop is never blocked.
 
     Args:
     - customer (dict): Customer record to sync.
-    - db: Database connection object.
+    - db: Database connection object, used by one task at a time.
+    - client (AsyncHubSpotClient, optional): Client bound to the running
+      loop.
 
     Returns:
     - str: HubSpot contact ID.
@@ -174,38 +329,33 @@ def sync_contact(customer, db):
 
     try:
         email = customer["customer_email"]
+        digest = property_hash(contact_sync_properties(customer))
 
-        contact_id = customer.get("hubspot_contact_id")
         # 1️⃣ If ID already stored → update directly
-        # if contact_id:
-        #     update_contact(contact_id, customer)
-        #     return contact_id
+        contact_id = customer.get("hubspot_contact_id") or await asyncio.to_thread(contact_id_cache.get, email)
+        if contact_id:
+            if customer.get("hubspot_contact_id") == contact_id and customer.get("hubspot_sync_hash") == digest:
+                record_check("contact", skipped=True)
+                return contact_id
+            try:
+                await async_update_contact(contact_id, customer, client)
+                record_check("contact", skipped=False)
+                await asyncio.to_thread(_store_synced, db, customer, contact_id, digest)
+                return contact_id
+            except ContactNotFound:
+                await asyncio.to_thread(forget_contact_id, db, email, contact_id)
 
         # 2️⃣ Else try search
-        contact_id = get_contact_id_by_email(email)
-
+        contact_id = await async_get_contact_id_by_email(email, client)
         if contact_id:
-            # save ID
-            with db.cursor() as cursor:
-                cursor.execute(
-                    "UPDATE customer SET hubspot_contact_id = %s WHERE customer_id = %s",
-                    (contact_id, customer["customer_id"])
-                )
-                db.commit()
-
-            update_contact(contact_id, customer)
-            return contact_id
-
-        # 3️⃣ Else create
-        contact_id = create_contact_from_db(customer)
-
-        with db.cursor() as cursor:
-            cursor.execute(
-                "UPDATE customer SET hubspot_contact_id = %s WHERE customer_id = %s",
-                (contact_id, customer["customer_id"])
-            )
-            db.commit()
-
+            await asyncio.to_thread(save_contact_id, db, customer["customer_id"], email, contact_id)
+            await async_update_contact(contact_id, customer, client)
+        else:
+            # 3️⃣ Else create
+            contact_id = await async_create_contact(customer, client)
+            await asyncio.to_thread(save_contact_id, db, customer["customer_id"], email, contact_id)
+        record_check("contact", skipped=False)
+        await asyncio.to_thread(store_sync_hash, db, "contact", customer["customer_id"], digest)
         return contact_id
     except RequestException as e:
         raise RuntimeError(f"HubSpot API request failed: {e}")
@@ -216,7 +366,8 @@ def fetch_contact_by_id(contact_id: str):
 
     This function retrieves a contact record from the HubSpot CRM using the
     contact's unique HubSpot ID and returns the contact data including
-    custom customer-related properties.
+    custom customer-related properties. Reads are served from the HubSpot
+    read cache when possible.
 
     Args:
     - contact_id (str): Unique HubSpot contact ID.
@@ -230,18 +381,14 @@ def fetch_contact_by_id(contact_id: str):
       HubSpot API request fails.
     """
 
+    return hubspot_read_cache.get("contacts", contact_id, lambda: _fetch_contact(contact_id))
+
+
+def _fetch_contact(contact_id):
     try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-        if not HUBSPOT_TOKEN:
-            raise RuntimeError("HUBSPOT_TOKEN is not configured")
-
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        res = requests.get(
-            f"{url}/crm/v3/objects/contacts/{contact_id}",
-            headers=headers,
+        res = hubspot_client.get(
+            f"/crm/v3/objects/contacts/{contact_id}",
+            "contacts.get",
             params={
                 "properties": [
                     "email",
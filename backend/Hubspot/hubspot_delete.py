@@ -1,6 +1,6 @@
-import requests,os
-
-HUBSPOT_BASE_URL = "https://api.hubapi.com"
+import requests
+from Hubspot.client import hubspot_client
+from Hubspot.read_cache import hubspot_read_cache
 
 def delete_hubspot_object(object_type: str, object_id: str):
     """
@@ -23,15 +23,11 @@ def delete_hubspot_object(object_type: str, object_id: str):
     """
 
     try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-        url = f"{HUBSPOT_BASE_URL}/crm/v3/objects/{object_type}/{int(object_id)}"
-        
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.delete(url, headers=headers)
+        response = hubspot_client.delete(
+            f"/crm/v3/objects/{object_type}/{int(object_id)}",
+            f"{object_type}.delete"
+        )
+        hubspot_read_cache.invalidate(object_type, object_id)
 
         if response.status_code == 204:
             return {"status": "success", "message": "Deleted successfully"}
@@ -1,11 +1,14 @@
 from fastapi import APIRouter, HTTPException,status, Depends
 from database.database import access_db
 from pydantic import BaseModel
-import requests, os
 from requests.exceptions import RequestException
 from enum import Enum
 from dotenv import load_dotenv
-from Hubspot.hubspot_contacts import get_contact_id_by_email
+from Hubspot.hubspot_contacts import resolve_contact_id
+from Hubspot.client import hubspot_client
+from Hubspot.scheduler import hubspot_scheduler
+from Hubspot.read_cache import hubspot_read_cache
+from Hubspot.bulkhead import hubspot_bulkhead
 # from ticket import TicketRegister,Depends,admin_agent_required
 from Authentication.dependencies import admin_agent_required
 
@@ -13,9 +16,12 @@ hubspot_ticket_router = APIRouter(prefix="/hubspot", tags=["HubSpot Ticket"])
 router  = hubspot_ticket_router
 SUPPORT_PIPELINE_ID = "0"
 STAGE_NEW = "1"
+HUBSPOT_STATUS_STAGE = {"Open": 1, "In_Progress": 3, "Close": 4}
+# Custom HubSpot ticket property holding the local ticket ID, set on
+# create so a retried create can find a ticket HubSpot already made
+LOCAL_TICKET_ID_PROPERTY = "local_ticket_id"
 
 load_dotenv()
-BASE_URL = "https://api.hubapi.com"
 class TicketPriority(str,Enum):
     Low = "Low"
     Medium = "Medium"
@@ -42,20 +48,13 @@ def hubspot_create_ticket(payload):
     """
 
     try:
-        url = "https://api.hubapi.com/crm/v3/objects/tickets"
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-
-        headers = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-
-        return requests.post(url, headers=headers, json=payload)
+        return hubspot_client.post("/crm/v3/objects/tickets", "tickets.create", json=payload)
     except RequestException as e:
         raise RuntimeError(f"HubSpot API request failed: {e}")
 
 
 @hubspot_ticket_router.post("/hubspot_ticket_registration", tags=["Hubspot Ticket"])
+@hubspot_bulkhead
 def hubspot_ticket_registration(data:HubspotTicketRegister,user=Depends(admin_agent_required),db = Depends(access_db)):
     """
     Register a new ticket in HubSpot for a customer.
@@ -89,7 +88,7 @@ def hubspot_ticket_registration(data:HubspotTicketRegister,user=Depends(admin_ag
                 if customer:
                     customer = cursor.fetchone()
                     # 3️⃣ Prepare ticket payload for HubSpot
-                    hubspot_contact_id = get_contact_id_by_email(data.customer_email)
+                    hubspot_contact_id = resolve_contact_id(data.customer_email, db)
                     ticket_payload = {
                         "properties": {
                             "subject": data.issue_title,
@@ -138,6 +137,7 @@ def hubspot_ticket_registration(data:HubspotTicketRegister,user=Depends(admin_ag
 
 
 @router.post("/ticket/create/{ticket_id}")
+@hubspot_bulkhead
 def create_ticket_in_hubspot_from_db(ticket_id: int):
     """
     Sync a ticket from the local database to HubSpot.
@@ -181,7 +181,7 @@ def create_ticket_in_hubspot_from_db(ticket_id: int):
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
 
-        hubspot_contact_id = get_contact_id_by_email(customer["customer_email"])
+        hubspot_contact_id = resolve_contact_id(customer["customer_email"], conn)
         HUBSPOT_STATUS_MAP = {
             "Open": 1,
             "In_Progress": 3,
@@ -235,82 +235,25 @@ def create_ticket_in_hubspot_from_db(ticket_id: int):
     )
 
 
-def hubspot_update_ticket(hubspot_ticket_id, data):
+def ticket_sync_properties(ticket):
     """
-    Update an existing HubSpot ticket.
-
-    Updates ticket properties such as priority, pipeline stage, and reason.
+    Map a ticket record to the HubSpot properties kept in sync after
+    creation (priority, pipeline stage and reason).
 
     Args:
-    - hubspot_ticket_id (str): ID of the HubSpot ticket.
-    - data (object): Ticket update data, may include priority, status, and reason.
-
-    Raises:
-    - HTTPException (500): If the HubSpot API request fails.
-    """
-
-    try:
-        url = "https://api.hubapi.com/crm/v3/objects/tickets"
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-
-        HEADERS = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "properties": {}
-        }
-
-        if data.priority:
-            payload["properties"]["hs_ticket_priority"] = data.priority.value.upper()
+    - ticket (dict): Ticket record.
 
-        if data.ticket_status:
-            payload["properties"]["hs_pipeline_stage"] = 1 if data.ticket_status=="Open" else 3
-
-        if data.reason:
-            payload["properties"]["reason"] = data.reason
-
-        r = requests.patch(
-            f"{url}/{hubspot_ticket_id}",
-            headers=HEADERS,
-            json=payload
-        )
-
-        r.raise_for_status() 
-    except RequestException as e:
-        raise RuntimeError(f"HubSpot API request failed: {e}")
-
-def hubspot_close_ticket(hubspot_ticket_id):
-    """
-    Close a HubSpot ticket by updating its pipeline stage to 'Closed'.
-
-    Args:
-    - hubspot_ticket_id (str): ID of the HubSpot ticket.
-
-    Raises:
-    - HTTPException (500): If the HubSpot API request fails.
+    Returns:
+    - dict: HubSpot ticket properties.
     """
 
-    try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
-
-        HEADERS = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "properties": {
-                "hs_pipeline_stage": 4
-            }
-        }
-
-        requests.patch(
-            f"{BASE_URL}/crm/v3/objects/tickets/{hubspot_ticket_id}",
-            headers=HEADERS,
-            json=payload
-        ) 
-    except RequestException as e:
-        raise RuntimeError(f"HubSpot API request failed: {e}")
+    properties = {
+        "hs_ticket_priority": ticket["priority"].upper(),
+        "hs_pipeline_stage": HUBSPOT_STATUS_STAGE[ticket["ticket_status"]],
+    }
+    if ticket.get("reason"):
+        properties["reason"] = ticket["reason"]
+    return properties
 
 
 def fetch_ticket_by_id(ticket_id: str):
@@ -320,6 +263,8 @@ def fetch_ticket_by_id(ticket_id: str):
     Args:
     - ticket_id (str): HubSpot ticket ID.
 
+    Reads are served from the HubSpot read cache when possible.
+
     Returns:
     - dict: HubSpot ticket object including properties:
         - subject
@@ -332,16 +277,14 @@ def fetch_ticket_by_id(ticket_id: str):
     - HTTPException (500): If the HubSpot API request fails.
     """
 
-    try:
-        HUBSPOT_TOKEN = os.getenv("HUBSPOT_TOKEN")
+    return hubspot_read_cache.get("tickets", ticket_id, lambda: _fetch_ticket(ticket_id))
 
-        HEADERS = {
-            "Authorization": f"Bearer {HUBSPOT_TOKEN}",
-            "Content-Type": "application/json"
-        }
-        res = requests.get(
-            f"{BASE_URL}/crm/v3/objects/tickets/{ticket_id}",
-            headers=HEADERS,
+
+def _fetch_ticket(ticket_id):
+    try:
+        res = hubspot_client.get(
+            f"/crm/v3/objects/tickets/{ticket_id}",
+            "tickets.get",
             params={
                 "properties": [
                     "subject",
@@ -358,6 +301,7 @@ def fetch_ticket_by_id(ticket_id: str):
         raise RuntimeError(f"HubSpot API request failed: {e}")
 
 @router.get("/ticket/{ticket_id}")
+@hubspot_bulkhead
 def get_ticket_from_hubspot(ticket_id: int):
     """
     Retrieve a ticket from HubSpot for a given local ticket ID.
@@ -396,3 +340,25 @@ def get_ticket_from_hubspot(ticket_id: int):
         status_code=500,
         detail=str(e)
     )
+
+
+@hubspot_ticket_router.get("/rate_budget", tags=["Hubspot Ticket"])
+def hubspot_rate_budget(user=Depends(admin_agent_required)):
+    """
+    Report the HubSpot request budget left and how many calls are waiting.
+
+    Args:
+    - user (dict, Depends): Authenticated user (Admin or Agent).
+
+    Returns:
+    - dict: {
+        "window_remaining": int,   # requests left in the 10-second window
+        "search_remaining": int,   # search requests left this second
+        "daily_remaining": int,
+        "in_flight": int,
+        "queue_depth": int,        # calls waiting for budget or a slot
+        "paused_for": float        # seconds until a 429 backoff ends
+    }
+    """
+
+    return hubspot_scheduler.status()
@@ -0,0 +1,115 @@
+from Hubspot.hubspot_tickets import HUBSPOT_STATUS_STAGE
+from Ticketing.events import ticket_state
+from Ticketing.history import record_ticket_event
+
+# HubSpot contact properties written to `customer` by pulls. Email and
+# mobile number identify the customer at login, so they are only ever
+# pushed, never taken from HubSpot.
+CONTACT_PULL_FIELDS = (
+    "customer_name",
+    "customer_company_name",
+    "customer_city",
+    "customer_state",
+    "customer_country",
+    "customer_address",
+)
+
+HUBSPOT_STAGE_STATUS = {str(stage): status for status, stage in HUBSPOT_STATUS_STAGE.items()}
+HUBSPOT_PRIORITIES = {"HIGH": "High", "MEDIUM": "Medium", "LOW": "Low"}
+
+# HubSpot properties kept in sync (the keys of `contact_properties` and
+# `ticket_sync_properties`)
+CONTACT_PROPERTIES = (
+    "email",
+    "customer_id",
+    "customer_name",
+    "customer_email",
+    "customer_mobile_number",
+    "customer_company_name",
+    "customer_city",
+    "customer_state",
+    "customer_country",
+    "customer_address",
+)
+TICKET_PROPERTIES = ("hs_ticket_priority", "hs_pipeline_stage", "reason")
+
+
+def remote_contact_properties(properties):
+    """
+    Return the synced properties of a HubSpot contact, in the shape of
+    `contact_sync_properties`, so both hash alike.
+    """
+
+    return {key: properties[key] for key in CONTACT_PROPERTIES if properties.get(key)}
+
+
+def remote_ticket_properties(properties):
+    """
+    Return the synced properties of a HubSpot ticket, in the shape of
+    `ticket_sync_properties`, so both hash alike.
+    """
+
+    return {key: properties[key] for key in TICKET_PROPERTIES if properties.get(key)}
+
+
+def apply_contact(cursor, customer, properties):
+    """
+    Write HubSpot contact properties to a customer row.
+
+    Args:
+    - cursor: Cursor of the open transaction.
+    - customer (dict): Current customer record.
+    - properties (dict): HubSpot contact properties.
+
+    Returns:
+    - list[str]: Customer columns that changed.
+    """
+
+    changes = {
+        field: properties[field]
+        for field in CONTACT_PULL_FIELDS
+        if properties.get(field) and properties[field] != customer.get(field)
+    }
+    if changes:
+        cursor.execute(
+            f"UPDATE customer SET {', '.join(f'{field} = %s' for field in changes)} WHERE customer_id = %s",
+            (*changes.values(), customer["customer_id"])
+        )
+    return list(changes)
+
+
+def apply_ticket(cursor, ticket, properties):
+    """
+    Write HubSpot ticket properties (priority, stage, reason) to a ticket
+    row and record the change in the ticket history.
+
+    Pipeline stages without a local status are ignored.
+
+    Args:
+    - cursor: Cursor of the open transaction.
+    - ticket (dict): Current ticket record.
+    - properties (dict): HubSpot ticket properties.
+
+    Returns:
+    - dict | None: Ticket lifecycle event to publish after commit, or
+      None when nothing changed.
+    """
+
+    priority = HUBSPOT_PRIORITIES.get((properties.get("hs_ticket_priority") or "").upper(), ticket["priority"])
+    ticket_status = HUBSPOT_STAGE_STATUS.get(str(properties.get("hs_pipeline_stage")), ticket["ticket_status"])
+    reason = properties.get("reason") or ticket["reason"]
+    if (priority, ticket_status, reason) == (ticket["priority"], ticket["ticket_status"], ticket["reason"]):
+        return None
+
+    cursor.execute(
+        "update ticket set priority = %s, ticket_status = %s, reason = %s where ticket_id = %s",
+        (priority, ticket_status, reason, ticket["ticket_id"])
+    )
+    updated = dict(ticket, priority=priority, ticket_status=ticket_status, reason=reason)
+    record_ticket_event(cursor, ticket["ticket_id"], ticket_state(ticket), ticket_state(updated))
+    return {
+        "type": "closed" if ticket_status == "Close" and ticket["ticket_status"] != "Close" else "updated",
+        "ticket_id": ticket["ticket_id"],
+        "before": ticket_state(ticket),
+        "after": ticket_state(updated)
+    }
@@ -0,0 +1,675 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from prometheus_client import Counter
+from database.database import access_db
+from Hubspot.hubspot_contacts import (
+    contact_properties, contact_sync_properties, save_contact_id, forget_contact_id,
+    async_resolve_contact_id
+)
+from Hubspot.contact_map import contact_id_cache, record_lookup
+from Hubspot.client import hubspot_client
+from Hubspot.async_client import AsyncHubSpotClient
+from Hubspot.hubspot_tickets import ticket_sync_properties, HUBSPOT_STATUS_STAGE, LOCAL_TICKET_ID_PROPERTY
+from Hubspot.inbound import TICKET_PROPERTIES, remote_ticket_properties
+from Hubspot.change_detection import property_hash, record_check, store_sync_hash
+from Hubspot.batch import batch_create, batch_read, batch_update, batch_archive
+from Hubspot.scheduler import hubspot_scheduler, HUBSPOT_DAILY_LIMIT, HUBSPOT_MAX_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+HUBSPOT_OUTBOX_WORKERS = int(os.getenv("HUBSPOT_OUTBOX_WORKERS", "4"))
+# one claim fills a whole HubSpot batch call
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_SECONDS = 1
+# A claimed row is handed to another worker if not finished in time
+# (e.g. the worker process died mid-call).
+OUTBOX_LEASE_SECONDS = 300
+OUTBOX_MAX_ATTEMPTS = 10
+OUTBOX_MAX_BACKOFF_SECONDS = 3600
+# Ticket creates of one claim are delivered concurrently, up to this many per worker; each delivery
+# holds its own database connection.
+HUBSPOT_OUTBOX_CONCURRENCY = int(os.getenv("HUBSPOT_OUTBOX_CONCURRENCY", "8"))
+# A delivery gives up well before its lease ends
+OUTBOX_DELIVERY_SECONDS = 120
+# Daily requests left for interactive calls; the outbox stops claiming
+# below this and resumes when HubSpot's daily limit resets.
+OUTBOX_DAILY_RESERVE = int(os.getenv("HUBSPOT_OUTBOX_DAILY_RESERVE", str(HUBSPOT_DAILY_LIMIT // 20)))
+
+HUBSPOT_OWNER_ID = 87397359
+
+_processed = Counter(
+    "hubspot_outbox_processed_total",
+    "HubSpot outbox entries processed",
+    ["operation", "outcome"]
+)
+
+
+def enqueue(cursor, object_type, object_id, operation, payload=None):
+    """
+    Queue a HubSpot sync operation in the caller's transaction.
+
+    Must be called with the cursor of the transaction that makes the local
+    change, before it commits: the operation is then queued if and only if
+    the change is committed. Entries of the same object are delivered in
+    insertion order.
+
+    Args:
+    - cursor: Cursor of the open transaction.
+    - object_type (str): "contact" or "ticket".
+    - object_id (int): Local customer ID or ticket ID.
+    - operation (str): One of OPERATIONS.
+    - payload (dict, optional): Operation arguments.
+    """
+
+    if operation not in OPERATIONS:
+        raise ValueError(f"Unknown outbox operation: {operation}")
+    cursor.execute(
+        """
+        insert into hubspot_outbox (object_type, object_id, operation, payload)
+        values (%s, %s, %s, %s)
+        """,
+        (object_type, object_id, operation, json.dumps(payload) if payload is not None else None)
+    )
+
+
+def _customer_sync_state(db, customer_ids):
+    # customer_id -> customer row, with its HubSpot ID and last sync hash
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"select * from customer where customer_id in ({', '.join(['%s'] * len(customer_ids))})",
+            list(customer_ids)
+        )
+        rows = {row["customer_id"]: row for row in cursor.fetchall()}
+    db.commit()
+    return rows
+
+
+def _load_ticket(db, ticket_id):
+    # None when the ticket is gone or already created by an earlier attempt
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            select t.*, c.customer_email
+            from ticket t
+            join customer c on c.customer_id = t.customer_id
+            where t.ticket_id = %s
+            """,
+            (ticket_id,)
+        )
+        ticket = cursor.fetchone()
+    db.commit()
+    return None if not ticket or ticket["hubspot_ticket_id"] else ticket
+
+
+def _ticket_create_payload(ticket, contact_id):
+    return {
+        "properties": {
+            "subject": ticket["issue_title"],
+            "content": ticket["issue_description"],
+            "hs_pipeline": "0",
+            "hs_pipeline_stage": HUBSPOT_STATUS_STAGE[ticket["ticket_status"]],
+            "hs_ticket_priority": ticket["priority"].upper(),
+            "hubspot_owner_id": HUBSPOT_OWNER_ID,
+            LOCAL_TICKET_ID_PROPERTY: str(ticket["ticket_id"]),
+            # the synced properties (see ticket_sync_properties) are all
+            # set here, so the stored hash matches what HubSpot has
+            **({"reason": ticket["reason"]} if ticket["reason"] else {})
+        },
+        "associations": [
+            {
+                "to": {"id": contact_id},
+                "types": [
+                    {
+                        "associationCategory": "HUBSPOT_DEFINED",
+                        "associationTypeId": 16
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def _ticket_created(db, ticket, contact_id, status_code, text, body):
+    if status_code != 201:
+        if status_code in (400, 404) and contact_id:
+            # the association target may be a deleted contact: look it up
+            # again on the retry
+            forget_contact_id(db, ticket["customer_email"], contact_id)
+        raise RuntimeError(f"HubSpot ticket create failed: {status_code} {text}")
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "update ticket set hubspot_ticket_id = %s, hubspot_sync_hash = %s where ticket_id = %s",
+            (body["id"], property_hash(ticket_sync_properties(ticket)), ticket["ticket_id"])
+        )
+    db.commit()
+
+
+def _ticket_found(db, ticket, remote):
+    # link a ticket an earlier attempt created; HubSpot has the state of
+    # that attempt, so a newer local state is queued as an update
+    digest = property_hash(remote_ticket_properties(remote["properties"]))
+    with db.cursor() as cursor:
+        cursor.execute(
+            "update ticket set hubspot_ticket_id = %s, hubspot_sync_hash = %s where ticket_id = %s",
+            (remote["id"], digest, ticket["ticket_id"])
+        )
+        if digest != property_hash(ticket_sync_properties(ticket)):
+            enqueue(cursor, "ticket", ticket["ticket_id"], "ticket.update")
+    db.commit()
+
+
+async def _find_created_ticket(ticket_id, client):
+    # the HubSpot ticket an earlier attempt of this create made, if any
+    response = await client.post("/crm/v3/objects/tickets/search", "tickets.search", json={
+        "filterGroups": [{"filters": [{
+            "propertyName": LOCAL_TICKET_ID_PROPERTY,
+            "operator": "EQ",
+            "value": str(ticket_id)
+        }]}],
+        "properties": list(TICKET_PROPERTIES),
+        "limit": 1
+    })
+    if response.status_code != 200:
+        raise RuntimeError(f"HubSpot ticket search failed: {response.status_code} {response.text}")
+    results = response.json().get("results", [])
+    return results[0] if results else None
+
+
+async def _create_ticket_async(db, ticket_id, payload, client, retry=False):
+    ticket = await asyncio.to_thread(_load_ticket, db, ticket_id)
+    if not ticket:
+        return
+    if retry:
+        # an earlier attempt may have been created in HubSpot before it
+        # failed (lost response, failed link, deadline)
+        remote = await _find_created_ticket(ticket_id, client)
+        if remote:
+            await asyncio.to_thread(_ticket_found, db, ticket, remote)
+            return
+    contact_id = await async_resolve_contact_id(ticket["customer_email"], db, client)
+    response = await client.post("/crm/v3/objects/tickets", "tickets.create", json=_ticket_create_payload(ticket, contact_id))
+    body = response.json() if response.status_code == 201 else None
+    await asyncio.to_thread(_ticket_created, db, ticket, contact_id, response.status_code, response.text, body)
+
+
+def _ticket_sync_state(db, ticket_ids):
+    # ticket_id -> row with the HubSpot ID, mapped fields and last sync hash
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            select ticket_id, hubspot_ticket_id, priority, ticket_status, reason, hubspot_sync_hash
+            from ticket
+            where ticket_id in ({", ".join(["%s"] * len(ticket_ids))})
+            """,
+            list(ticket_ids)
+        )
+        rows = {row["ticket_id"]: row for row in cursor.fetchall()}
+    db.commit()
+    return rows
+
+
+# Delivered on the worker's event loop, concurrently within a claim
+ASYNC_OPERATIONS = {
+    "ticket.create": _create_ticket_async,
+}
+
+# Claimed entries of these are coalesced into HubSpot batch calls by the
+# named OutboxWorkerPool method. Syncs send the object's current mapped
+# state rather than the payload.
+BATCH_OPERATIONS = {
+    "contact.sync": "_deliver_contact_batch",
+    "contact.archive": "_deliver_contact_archives",
+    "ticket.update": "_deliver_ticket_batch",
+    # no longer enqueued (closing is a ticket.update); kept so entries
+    # queued before still deliver
+    "ticket.close": "_deliver_ticket_batch",
+}
+
+OPERATIONS = {*ASYNC_OPERATIONS, *BATCH_OPERATIONS}
+
+
+def retry_delay(attempts):
+    """
+    Return the backoff before retry number `attempts` (full jitter).
+
+    Args:
+    - attempts (int): Attempts made so far (>= 1).
+
+    Returns:
+    - float: Seconds to wait.
+    """
+
+    return random.uniform(0, min(OUTBOX_MAX_BACKOFF_SECONDS, 5 * 2 ** attempts))
+
+
+class OutboxWorkerPool:
+    """
+    Background threads that deliver `hubspot_outbox` entries to HubSpot.
+
+    Workers claim due entries with `FOR UPDATE SKIP LOCKED`, so any number
+    of workers (across processes) never claim the same row; only `o` is
+    locked, so rows seen by the ordering check are not skipped. An entry is
+    only claimable when no earlier entry of the same object is still
+    pending or in flight, which keeps per-object ordering while different
+    objects are delivered in parallel. Contact syncs, contact archives and
+    ticket property changes of one claim are coalesced into HubSpot batch
+    calls; its ticket creates are delivered concurrently on the worker's
+    event loop with an `AsyncHubSpotClient`. Failures are retried with
+    exponential backoff; after OUTBOX_MAX_ATTEMPTS the entry is marked
+    dead and stops blocking its object.
+
+    Workers pace themselves on the HubSpot scheduler: nothing is claimed
+    while HubSpot asked us to back off, while calls already queue for rate
+    budget, or when the daily budget is down to OUTBOX_DAILY_RESERVE.
+    """
+
+    def __init__(self, workers=HUBSPOT_OUTBOX_WORKERS, client=hubspot_client):
+        self._workers = workers
+        # batch calls are made from the worker threads with this client
+        self._client = client
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        """
+        Start the worker threads.
+        """
+
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self._workers):
+            thread = threading.Thread(target=self._run, name=f"hubspot-outbox-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """
+        Stop the worker threads after their current entry.
+        """
+
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=15)
+        self._threads = []
+
+    def _pace(self):
+        # seconds to wait before claiming more work, or 0
+        budget = hubspot_scheduler.status()
+        if budget["paused_for"] > 0:
+            return budget["paused_for"]
+        if budget["daily_remaining"] <= OUTBOX_DAILY_RESERVE:
+            return 60
+        if budget["queue_depth"] >= HUBSPOT_MAX_CONCURRENCY:
+            return OUTBOX_POLL_SECONDS
+        return 0
+
+    def _run(self):
+        # each worker has its own event loop and async client
+        loop = asyncio.new_event_loop()
+        client = AsyncHubSpotClient(concurrency=HUBSPOT_OUTBOX_CONCURRENCY)
+        try:
+            while not self._stop.is_set():
+                wait = self._pace()
+                if wait:
+                    self._stop.wait(wait)
+                    continue
+                try:
+                    db = access_db()
+                    with db:
+                        claimed = self._claim(db)
+                        batches = {}
+                        for entry in claimed:
+                            if entry["operation"] in BATCH_OPERATIONS:
+                                batches.setdefault(BATCH_OPERATIONS[entry["operation"]], []).append(entry)
+                        for method, entries in batches.items():
+                            self._deliver_batch(db, method, entries)
+                        singles = [e for e in claimed if e["operation"] not in BATCH_OPERATIONS]
+                        if singles:
+                            unstarted, failed = loop.run_until_complete(self._deliver_concurrently(singles, client))
+                            if unstarted:
+                                self._release(db, unstarted)
+                            for entry, error in failed:
+                                try:
+                                    self._mark_failed(db, entry, error)
+                                except Exception:
+                                    # its lease expires and it is claimed again
+                                    logger.exception("HubSpot outbox entry %s could not be marked failed", entry["outbox_id"])
+                                    db.rollback()
+                except Exception:
+                    logger.exception("HubSpot outbox worker failed")
+                    claimed = []
+                if not claimed:
+                    self._stop.wait(OUTBOX_POLL_SECONDS)
+        finally:
+            loop.run_until_complete(client.aclose())
+            loop.close()
+
+    def _claim(self, db):
+        with db.cursor() as cursor:
+            # give up leases of workers that died mid-delivery
+            cursor.execute(
+                """
+                update hubspot_outbox
+                set status = 'pending'
+                where status = 'processing' and locked_until < now(3)
+                """
+            )
+            cursor.execute(
+                """
+                select o.outbox_id, o.object_type, o.object_id, o.operation, o.payload, o.attempts
+                from hubspot_outbox o
+                where o.status = 'pending'
+                  and o.next_attempt_at <= now(3)
+                  and not exists (
+                      select 1 from hubspot_outbox p
+                      where p.object_type = o.object_type
+                        and p.object_id = o.object_id
+                        and p.status in ('pending', 'processing')
+                        and p.outbox_id < o.outbox_id
+                  )
+                order by o.outbox_id
+                limit %s
+                for update of o skip locked
+                """,
+                (OUTBOX_BATCH_SIZE,)
+            )
+            claimed = cursor.fetchall()
+            if claimed:
+                cursor.execute(
+                    f"""
+                    update hubspot_outbox
+                    set status = 'processing',
+                        locked_until = now(3) + interval %s second
+                    where outbox_id in ({", ".join(["%s"] * len(claimed))})
+                    """,
+                    (OUTBOX_LEASE_SECONDS, *[entry["outbox_id"] for entry in claimed])
+                )
+        db.commit()
+        return claimed
+
+    def _release(self, db, entries):
+        # hand undelivered claims back without waiting for the lease
+        with db.cursor() as cursor:
+            cursor.execute(
+                f"""
+                update hubspot_outbox
+                set status = 'pending'
+                where status = 'processing' and outbox_id in ({", ".join(["%s"] * len(entries))})
+                """,
+                [entry["outbox_id"] for entry in entries]
+            )
+        db.commit()
+
+    def _mark_done(self, db, entry):
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                update hubspot_outbox
+                set status = 'done', attempts = attempts + 1, processed_at = now(3)
+                where outbox_id = %s
+                """,
+                (entry["outbox_id"],)
+            )
+        db.commit()
+        _processed.labels(entry["operation"], "done").inc()
+
+    def _mark_failed(self, db, entry, error):
+        attempts = entry["attempts"] + 1
+        dead = attempts >= OUTBOX_MAX_ATTEMPTS
+        logger.warning("HubSpot outbox entry %s failed (attempt %s): %s", entry["outbox_id"], attempts, error)
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                update hubspot_outbox
+                set status = %s,
+                    attempts = %s,
+                    next_attempt_at = now(3) + interval %s second,
+                    last_error = %s
+                where outbox_id = %s and status = 'processing'
+                """,
+                ("dead" if dead else "pending", attempts, int(retry_delay(attempts)), str(error)[:500], entry["outbox_id"])
+            )
+        db.commit()
+        _processed.labels(entry["operation"], "dead" if dead else "retry").inc()
+
+    async def _deliver_concurrently(self, entries, client):
+        """
+        Deliver single entries of one claim, up to
+        HUBSPOT_OUTBOX_CONCURRENCY at a time.
+
+        A claim holds at most one entry per object, so they are
+        independent. Each delivery has its own connection and a deadline
+        of OUTBOX_DELIVERY_SECONDS.
+
+        Deliveries are gathered with `return_exceptions=True`: an error
+        escaping one delivery (e.g. its outcome could not be recorded)
+        does not abandon the others, and its entry is failed on its own.
+
+        Returns:
+        - tuple: (entries not started because the pool is stopping or no
+          database connection was available, to be released;
+          [(entry, exception)] of deliveries that raised, to be failed).
+        """
+
+        slots = asyncio.Semaphore(HUBSPOT_OUTBOX_CONCURRENCY)
+
+        async def deliver(entry):
+            async with slots:
+                if self._stop.is_set():
+                    return entry
+                try:
+                    db = await asyncio.to_thread(access_db)
+                except Exception:
+                    logger.exception("HubSpot outbox worker could not connect to the database")
+                    return entry
+                try:
+                    with client.deadline(OUTBOX_DELIVERY_SECONDS):
+                        await self._deliver(db, entry, client)
+                finally:
+                    await asyncio.to_thread(db.close)
+
+        outcomes = await asyncio.gather(*(deliver(e) for e in entries), return_exceptions=True)
+        unstarted, failed = [], []
+        for entry, outcome in zip(entries, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error("HubSpot outbox delivery of entry %s raised", entry["outbox_id"], exc_info=outcome)
+                failed.append((entry, outcome))
+            elif outcome:
+                unstarted.append(outcome)
+        return unstarted, failed
+
+    async def _deliver(self, db, entry, client):
+        payload = json.loads(entry["payload"]) if entry["payload"] else {}
+        try:
+            await ASYNC_OPERATIONS[entry["operation"]](
+                db, entry["object_id"], payload, client, retry=entry["attempts"] > 0
+            )
+        except Exception as e:
+            await asyncio.to_thread(self._fail, db, entry, e)
+            return
+        await asyncio.to_thread(self._mark_done, db, entry)
+
+    def _fail(self, db, entry, error):
+        db.rollback()
+        self._mark_failed(db, entry, error)
+
+    def _deliver_batch(self, db, method, entries):
+        try:
+            getattr(self, method)(db, entries)
+        except Exception as e:
+            # e.g. the database went away mid-batch: retry the whole group
+            logger.exception("HubSpot outbox batch %s failed", method)
+            db.rollback()
+            for entry in entries:
+                self._mark_failed(db, entry, e)
+
+    def _deliver_contact_batch(self, db, entries):
+        """
+        Deliver contact sync entries with HubSpot batch calls.
+
+        Customers whose properties hash to the last synced value are
+        skipped. Customers without a known contact ID are looked up by
+        email in one `/batch/read` (idProperty "email"); misses are
+        created with `/batch/create`, the rest updated with
+        `/batch/update`. A stored ID HubSpot no longer knows is dropped,
+        so the retry searches by email. Failures reported for single
+        inputs are retried individually.
+        """
+
+        customers = _customer_sync_state(db, {entry["object_id"] for entry in entries})
+
+        pending = []
+        for entry in entries:
+            customer = customers.get(entry["object_id"])
+            if not customer:
+                self._mark_done(db, entry)
+                continue
+            digest = property_hash(contact_sync_properties(customer))
+            if customer["hubspot_contact_id"] and digest == customer["hubspot_sync_hash"]:
+                record_check("contact", skipped=True)
+                self._mark_done(db, entry)
+                continue
+            pending.append((entry, customer, digest))
+
+        updates, lookups, creates = [], [], []
+        for item in pending:
+            customer = item[1]
+            contact_id = customer["hubspot_contact_id"] or contact_id_cache.get(customer["customer_email"])
+            if contact_id:
+                updates.append((item, str(contact_id)))
+            else:
+                lookups.append(item)
+
+        if lookups:
+            # HubSpot stores emails lower-cased
+            found = batch_read(
+                "contacts", [customer["customer_email"].lower() for _, customer, _ in lookups],
+                properties=["email"], id_property="email", client=self._client
+            )
+            for item in lookups:
+                entry, customer, _ = item
+                result = found[customer["customer_email"].lower()]
+                if result.ok:
+                    record_lookup("search")
+                    updates.append((item, result.id))
+                elif result.status == 404:
+                    record_lookup("miss")
+                    creates.append(item)
+                else:
+                    self._mark_failed(db, entry, result.error)
+
+        by_contact_id = {}
+        for item, contact_id in updates:
+            if contact_id in by_contact_id:
+                # IDs of one batch must be unique; sent on the retry
+                self._mark_failed(db, item[0], f"Contact {contact_id} already updated in this batch")
+                continue
+            by_contact_id[contact_id] = item
+        if by_contact_id:
+            inputs = [
+                {"id": contact_id, "properties": contact_sync_properties(customer)}
+                for contact_id, (_, customer, _) in by_contact_id.items()
+            ]
+            for contact_id, result in batch_update("contacts", inputs, client=self._client).items():
+                if contact_id not in by_contact_id:
+                    continue
+                entry, customer, digest = by_contact_id[contact_id]
+                if result.ok:
+                    self._contact_synced(db, entry, customer, contact_id, digest)
+                else:
+                    if result.status == 404:
+                        forget_contact_id(db, customer["customer_email"], contact_id)
+                    self._mark_failed(db, entry, result.error)
+
+        if creates:
+            results = batch_create(
+                "contacts", [{"properties": contact_properties(customer)} for _, customer, _ in creates],
+                client=self._client
+            )
+            for (entry, customer, digest), result in zip(creates, results):
+                if result.ok:
+                    self._contact_synced(db, entry, customer, result.id, digest)
+                else:
+                    self._mark_failed(db, entry, result.error)
+
+    def _contact_synced(self, db, entry, customer, contact_id, digest):
+        record_check("contact", skipped=False)
+        if str(customer["hubspot_contact_id"] or "") != contact_id:
+            save_contact_id(db, customer["customer_id"], customer["customer_email"], contact_id)
+        store_sync_hash(db, "contact", customer["customer_id"], digest)
+        self._mark_done(db, entry)
+
+    def _deliver_contact_archives(self, db, entries):
+        """
+        Deliver contact archive entries with HubSpot `/batch/archive`.
+
+        The payload holds the HubSpot ID and email to archive; once
+        archived, the ID is dropped from the customer row and the cache.
+        """
+
+        targets = {}
+        for entry in entries:
+            payload = json.loads(entry["payload"]) if entry["payload"] else {}
+            targets[entry["outbox_id"]] = (str(payload["hubspot_contact_id"]), payload["email"])
+
+        results = batch_archive("contacts", [contact_id for contact_id, _ in targets.values()], client=self._client)
+        for entry in entries:
+            contact_id, email = targets[entry["outbox_id"]]
+            result = results[contact_id]
+            if result.ok:
+                forget_contact_id(db, email, contact_id)
+                self._mark_done(db, entry)
+            else:
+                self._mark_failed(db, entry, result.error)
+
+    def _deliver_ticket_batch(self, db, entries):
+        """
+        Deliver ticket update/close entries with HubSpot batch updates.
+
+        Each ticket's current priority, stage and reason are sent, and
+        tickets whose properties hash to the last synced value are skipped.
+        A claim holds at most one entry per ticket (see `_claim`), so the
+        HubSpot IDs of one batch are unique; failures reported for single
+        inputs are retried individually.
+        """
+
+        tickets = _ticket_sync_state(db, {entry["object_id"] for entry in entries})
+
+        inputs = []
+        by_hubspot_id = {}
+        for entry in entries:
+            ticket = tickets.get(entry["object_id"])
+            if not ticket or not ticket["hubspot_ticket_id"]:
+                # deleted, or not linked to HubSpot
+                self._mark_done(db, entry)
+                continue
+            properties = ticket_sync_properties(ticket)
+            digest = property_hash(properties)
+            if digest == ticket["hubspot_sync_hash"]:
+                record_check("ticket", skipped=True)
+                self._mark_done(db, entry)
+                continue
+            inputs.append({"id": str(ticket["hubspot_ticket_id"]), "properties": properties})
+            by_hubspot_id[str(ticket["hubspot_ticket_id"])] = (entry, digest)
+
+        if not inputs:
+            return
+        for hubspot_ticket_id, result in batch_update("tickets", inputs, client=self._client).items():
+            if hubspot_ticket_id not in by_hubspot_id:
+                continue
+            entry, digest = by_hubspot_id[hubspot_ticket_id]
+            if result.ok:
+                record_check("ticket", skipped=False)
+                store_sync_hash(db, "ticket", entry["object_id"], digest)
+                self._mark_done(db, entry)
+            else:
+                self._mark_failed(db, entry, result.error)
+
+
+outbox_workers = OutboxWorkerPool()
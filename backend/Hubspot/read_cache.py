@@ -0,0 +1,210 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from Authentication.redis_client import redis_client, redis_cache_client
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "hubspot_cache_invalidations"
+READ_CACHE_SIZE = 2000
+# The local tier is kept short: other processes drop their copies on
+# pub/sub invalidations, and this bounds staleness if one is missed.
+READ_CACHE_LOCAL_TTL_SECONDS = 30
+READ_CACHE_REDIS_TTL_SECONDS = 300
+
+_reads = Counter(
+    "hubspot_read_cache_total",
+    "HubSpot object reads by cache result",
+    ["object_type", "result"]
+)
+
+
+def cache_key(object_type, object_id):
+    return f"hubspot_object:{object_type}:{object_id}"
+
+
+class HubSpotReadCache:
+    """
+    Two-tier cache of HubSpot object reads: a bounded in-process LRU in
+    front of Redis, both with a TTL.
+
+    Concurrent misses for the same object are coalesced into one HubSpot
+    call (single-flight per process). Writes to an object must call
+    `invalidate`, which drops it from Redis and from the local tier of
+    every process; a fetch that was already running when the object was
+    invalidated does not store its (possibly stale) result.
+
+    Redis is only a cache here: its errors are logged and treated as a
+    miss.
+    """
+
+    def __init__(
+        self,
+        maxsize=READ_CACHE_SIZE,
+        local_ttl=READ_CACHE_LOCAL_TTL_SECONDS,
+        redis_ttl=READ_CACHE_REDIS_TTL_SECONDS
+    ):
+        self._maxsize = maxsize
+        self._local_ttl = local_ttl
+        self._redis_ttl = redis_ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def _get_local(self, key):
+        # caller holds self._lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, valid_until = entry
+        if valid_until <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _put_local(self, key, value):
+        # caller holds self._lock
+        self._entries[key] = (value, time.monotonic() + self._local_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def get(self, object_type, object_id, fetch):
+        """
+        Return an object from the cache, fetching it on a miss.
+
+        Args:
+        - object_type (str): "contacts", "tickets", ...
+        - object_id (str): HubSpot object ID.
+        - fetch (callable): Loads the object from HubSpot; its exceptions
+          propagate to every caller waiting for the same object and are
+          not cached.
+
+        Returns:
+        - dict: HubSpot object.
+        """
+
+        key = cache_key(object_type, object_id)
+        with self._lock:
+            value = self._get_local(key)
+            if value is not None:
+                _reads.labels(object_type, "memory").inc()
+                return value
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                generation = self._generations.get(key, 0)
+
+        if not leader:
+            _reads.labels(object_type, "coalesced").inc()
+            return future.result()
+
+        try:
+            value = self._get_redis(key)
+            from_redis = value is not None
+            if from_redis:
+                _reads.labels(object_type, "redis").inc()
+            else:
+                _reads.labels(object_type, "miss").inc()
+                value = fetch()
+            with self._lock:
+                current = self._generations.get(key, 0) == generation
+                if current:
+                    self._put_local(key, value)
+            if current and not from_redis:
+                self._put_redis(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def _get_redis(self, key):
+        try:
+            raw = redis_cache_client.get(key)
+        except RedisError as e:
+            logger.warning("HubSpot read cache get failed: %s", e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    def _put_redis(self, key, value):
+        try:
+            redis_cache_client.set(key, json.dumps(value), ex=self._redis_ttl)
+        except RedisError as e:
+            logger.warning("HubSpot read cache set failed: %s", e)
+
+    def evict_local(self, key):
+        """
+        Drop a key from this process's local tier.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            # later callers start a fresh fetch instead of joining one
+            # that may return the old object
+            self._inflight.pop(key, None)
+            if len(self._generations) > self._maxsize * 4:
+                self._generations.clear()
+
+    def invalidate(self, object_type, object_id):
+        """
+        Drop an object from every tier, in every process.
+
+        Call after writing to the object in HubSpot.
+        """
+
+        key = cache_key(object_type, object_id)
+        self.evict_local(key)
+        try:
+            pipe = redis_cache_client.pipeline(transaction=False)
+            pipe.delete(key)
+            pipe.publish(INVALIDATION_CHANNEL, key)
+            pipe.execute()
+        except RedisError as e:
+            logger.warning("HubSpot read cache invalidation failed: %s", e)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+hubspot_read_cache = HubSpotReadCache()
+
+
+def _listen_for_invalidations():
+    while True:
+        try:
+            pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            # invalidations sent while we were disconnected are lost
+            hubspot_read_cache.clear()
+            for message in pubsub.listen():
+                if message["type"] == "message":
+                    hubspot_read_cache.evict_local(message["data"])
+        except Exception:
+            logger.exception("HubSpot cache invalidation listener disconnected, reconnecting")
+            time.sleep(1)
+
+
+def start_invalidation_listener():
+    """
+    Start the background thread that applies invalidations from other
+    workers.
+    """
+
+    thread = threading.Thread(target=_listen_for_invalidations, name="hubspot-cache-invalidations", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,511 @@
+import logging
+import sys
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Literal
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, status
+from database.database import access_db
+from Authentication.dependencies import admin_required
+from Hubspot.client import hubspot_client
+from Hubspot.hubspot_contacts import contact_sync_properties
+from Hubspot.hubspot_tickets import ticket_sync_properties
+from Hubspot.change_detection import property_hash, store_sync_hash
+from Hubspot.inbound import (
+    CONTACT_PROPERTIES, TICKET_PROPERTIES,
+    remote_contact_properties, remote_ticket_properties,
+    apply_contact, apply_ticket
+)
+from Hubspot.outbox import enqueue
+from Ticketing.events import publish
+
+logger = logging.getLogger(__name__)
+
+hubspot_reconcile_router = APIRouter(prefix="/hubspot", tags=["HubSpot Sync"])
+
+# HubSpot search returns at most 100 objects per page
+RECONCILE_PAGE_SIZE = 100
+# local rows read per keyset page of the local pass
+RECONCILE_LOCAL_PAGE_SIZE = 500
+# differences listed in a report (counts always cover everything)
+RECONCILE_REPORT_LIMIT = 200
+# Runs started from the API execute here, one thread per object type,
+# outside the request threadpool. Finished jobs are kept this long.
+RECONCILE_JOB_TTL_SECONDS = 3600
+
+_job_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hubspot-reconcile")
+_jobs = TTLCache(maxsize=100, ttl=RECONCILE_JOB_TTL_SECONDS)
+_jobs_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ReconcileSpec:
+    """
+    How one HubSpot object type maps to a local table.
+    """
+
+    object_type: str
+    table: str
+    key: str
+    hubspot_key: str
+    modified_property: str
+    properties: tuple
+    operation: str
+    local_properties: Callable
+    remote_properties: Callable
+    apply: Callable
+
+
+SPECS = {
+    "contacts": ReconcileSpec(
+        object_type="contact",
+        table="customer",
+        key="customer_id",
+        hubspot_key="hubspot_contact_id",
+        modified_property="lastmodifieddate",
+        properties=CONTACT_PROPERTIES,
+        operation="contact.sync",
+        local_properties=contact_sync_properties,
+        remote_properties=remote_contact_properties,
+        apply=apply_contact,
+    ),
+    "tickets": ReconcileSpec(
+        object_type="ticket",
+        table="ticket",
+        key="ticket_id",
+        hubspot_key="hubspot_ticket_id",
+        modified_property="hs_lastmodifieddate",
+        properties=TICKET_PROPERTIES,
+        operation="ticket.update",
+        local_properties=ticket_sync_properties,
+        remote_properties=remote_ticket_properties,
+        apply=apply_ticket,
+    ),
+}
+
+
+class ReconcileBusy(Exception):
+    """
+    Raised when another reconciliation of the same object type is running.
+    """
+
+
+def _epoch_ms(value):
+    # HubSpot returns ISO-8601 timestamps ("2024-05-01T10:00:00.123Z")
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+def _iso(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat() if ms else None
+
+
+def search_modified_since(hubspot_type, spec, since_ms, after=None):
+    """
+    Fetch one page of objects modified at or after `since_ms`, oldest
+    first.
+
+    Returns:
+    - tuple: (results, next `after` cursor or None).
+
+    Raises:
+    - RuntimeError: If the HubSpot search fails.
+    """
+
+    body = {
+        "filterGroups": [{
+            "filters": [{
+                "propertyName": spec.modified_property,
+                "operator": "GTE",
+                "value": str(since_ms)
+            }]
+        }],
+        "sorts": [{"propertyName": spec.modified_property, "direction": "ASCENDING"}],
+        "properties": [*spec.properties, spec.modified_property],
+        "limit": RECONCILE_PAGE_SIZE,
+    }
+    if after:
+        body["after"] = after
+    response = hubspot_client.post(f"/crm/v3/objects/{hubspot_type}/search", f"{hubspot_type}.search", json=body)
+    if response.status_code != 200:
+        raise RuntimeError(f"HubSpot search failed: {response.status_code} {response.text}")
+    data = response.json()
+    return data.get("results", []), ((data.get("paging") or {}).get("next") or {}).get("after")
+
+
+def _load_state(db, hubspot_type):
+    with db.cursor() as cursor:
+        cursor.execute(
+            "select watermark_ms, after_cursor, local_cursor from hubspot_reconcile_state where object_type = %s",
+            (hubspot_type,)
+        )
+        row = cursor.fetchone()
+    db.commit()
+    return row or {"watermark_ms": 0, "after_cursor": None, "local_cursor": 0}
+
+
+def _save_state(db, hubspot_type, state):
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            insert into hubspot_reconcile_state (object_type, watermark_ms, after_cursor, local_cursor)
+            values (%s, %s, %s, %s)
+            on duplicate key update
+                watermark_ms = values(watermark_ms),
+                after_cursor = values(after_cursor),
+                local_cursor = values(local_cursor)
+            """,
+            (hubspot_type, state["watermark_ms"], state["after_cursor"], state["local_cursor"])
+        )
+    db.commit()
+
+
+class Reconciler:
+    """
+    One reconciliation run of a HubSpot object type.
+
+    Each object is compared three ways by hash: local properties, HubSpot
+    properties, and the last synced value (`hubspot_sync_hash`).
+
+    - local == HubSpot: in sync.
+    - only HubSpot changed since the last sync: pull into MySQL.
+    - only MySQL changed: push through the outbox.
+    - both changed (or never synced): conflict, resolved by pushing
+      MySQL, the system of record.
+
+    The HubSpot pass pages through objects by last-modified date from a
+    persisted watermark; the local pass walks linked rows by primary key
+    to find local changes that never reached HubSpot. Both positions are
+    saved after every page, so an interrupted run resumes where it
+    stopped, and only one page is held in memory at a time.
+    """
+
+    def __init__(self, db, hubspot_type, dry_run=False):
+        self.db = db
+        self.hubspot_type = hubspot_type
+        self.spec = SPECS[hubspot_type]
+        self.dry_run = dry_run
+        self.report = {
+            "object_type": hubspot_type,
+            "dry_run": dry_run,
+            "complete": False,
+            "watermark": None,
+            "scanned_remote": 0,
+            "scanned_local": 0,
+            "in_sync": 0,
+            "pulled": 0,
+            "pushed": 0,
+            "conflicts": 0,
+            "remote_only": 0,
+            "errors": 0,
+            "changes": [],
+        }
+
+    def _note(self, action, row, hubspot_id, fields=None, error=None):
+        self.report[action] += 1
+        if len(self.report["changes"]) < RECONCILE_REPORT_LIMIT:
+            change = {
+                "action": action,
+                "id": row[self.spec.key] if row else None,
+                "hubspot_id": hubspot_id,
+            }
+            if fields:
+                change["fields"] = fields
+            if error:
+                change["error"] = error
+            self.report["changes"].append(change)
+
+    def local_rows(self, hubspot_ids):
+        """
+        Return local rows linked to the given HubSpot IDs, by HubSpot ID.
+        """
+
+        with self.db.cursor() as cursor:
+            cursor.execute(
+                f"""
+                select * from {self.spec.table}
+                where {self.spec.hubspot_key} in ({", ".join(["%s"] * len(hubspot_ids))})
+                """,
+                list(hubspot_ids)
+            )
+            rows = {str(row[self.spec.hubspot_key]): row for row in cursor.fetchall()}
+        self.db.commit()
+        return rows
+
+    def _push(self, row):
+        with self.db.cursor() as cursor:
+            enqueue(cursor, self.spec.object_type, row[self.spec.key], self.spec.operation, {})
+        self.db.commit()
+
+    def _pull(self, row, remote, remote_hash):
+        with self.db.cursor() as cursor:
+            event = self.spec.apply(cursor, row, remote)
+        self.db.commit()
+        store_sync_hash(self.db, self.spec.object_type, row[self.spec.key], remote_hash)
+        if isinstance(event, dict):
+            publish(event)
+
+    def _reconcile_object(self, row, remote):
+        hubspot_id = str(row[self.spec.hubspot_key])
+        local = self.spec.local_properties(row)
+        local_hash = property_hash(local)
+        synced_hash = row.get("hubspot_sync_hash")
+
+        if remote is not None:
+            remote_props = self.spec.remote_properties(remote)
+            remote_hash = property_hash(remote_props)
+            if local_hash == remote_hash:
+                if synced_hash != local_hash and not self.dry_run:
+                    store_sync_hash(self.db, self.spec.object_type, row[self.spec.key], local_hash)
+                self.report["in_sync"] += 1
+                return
+            fields = sorted(
+                key for key in local.keys() | remote_props.keys()
+                if str(local.get(key)) != str(remote_props.get(key))
+            )
+            if synced_hash == local_hash:
+                if not self.dry_run:
+                    self._pull(row, remote, remote_hash)
+                self._note("pulled", row, hubspot_id, fields)
+                return
+            action = "pushed" if synced_hash == remote_hash else "conflicts"
+        elif local_hash != synced_hash:
+            # local pass: HubSpot side unknown, only local drift matters
+            action, fields = "pushed", None
+        else:
+            self.report["in_sync"] += 1
+            return
+
+        if not self.dry_run:
+            self._push(row)
+        self._note(action, row, hubspot_id, fields)
+
+    def reconcile_object(self, row, remote, hubspot_id):
+        """
+        Reconcile one linked row with its HubSpot properties (None: local
+        check only). Failures are logged and counted in the report.
+        """
+
+        try:
+            self._reconcile_object(row, remote)
+        except Exception as e:
+            self.db.rollback()
+            logger.warning("Reconciling %s %s failed: %s", self.hubspot_type, hubspot_id, e)
+            self._note("errors", row, hubspot_id, error=str(e)[:200])
+
+    def remote_pass(self, state, max_pages):
+        """
+        Reconcile objects changed in HubSpot since the watermark.
+
+        Returns:
+        - bool: True when the pass reached the newest change.
+        """
+
+        for _ in range(max_pages):
+            results, after = search_modified_since(
+                self.hubspot_type, self.spec, state["watermark_ms"], state["after_cursor"]
+            )
+            if results:
+                rows = self.local_rows({obj["id"] for obj in results})
+                for obj in results:
+                    self.report["scanned_remote"] += 1
+                    row = rows.get(str(obj["id"]))
+                    if row is None:
+                        self._note("remote_only", None, str(obj["id"]))
+                        continue
+                    self.reconcile_object(row, obj.get("properties") or {}, str(obj["id"]))
+
+            last_ms = max(
+                (_epoch_ms(obj["properties"][self.spec.modified_property]) for obj in results
+                 if (obj.get("properties") or {}).get(self.spec.modified_property)),
+                default=state["watermark_ms"]
+            )
+            if last_ms > state["watermark_ms"]:
+                # restart the search from the newest change seen; this keeps
+                # paging below HubSpot's 10,000-result search limit
+                state["watermark_ms"], state["after_cursor"] = last_ms, None
+            else:
+                # a whole page shares one timestamp: page past it
+                state["after_cursor"] = after
+            if not after:
+                state["after_cursor"] = None
+            if not self.dry_run:
+                _save_state(self.db, self.hubspot_type, state)
+            if not after:
+                return True
+        return False
+
+    def local_pass(self, state, max_pages):
+        """
+        Push linked rows changed locally since their last sync.
+
+        Returns:
+        - bool: True when every linked row was checked.
+        """
+
+        for _ in range(max_pages):
+            with self.db.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    select * from {self.spec.table}
+                    where {self.spec.key} > %s and {self.spec.hubspot_key} is not null
+                    order by {self.spec.key}
+                    limit %s
+                    """,
+                    (state["local_cursor"], RECONCILE_LOCAL_PAGE_SIZE)
+                )
+                rows = cursor.fetchall()
+            self.db.commit()
+            for row in rows:
+                self.report["scanned_local"] += 1
+                self.reconcile_object(row, None, str(row[self.spec.hubspot_key]))
+            done = len(rows) < RECONCILE_LOCAL_PAGE_SIZE
+            state["local_cursor"] = 0 if done else rows[-1][self.spec.key]
+            if not self.dry_run:
+                _save_state(self.db, self.hubspot_type, state)
+            if done:
+                return True
+        return False
+
+    def run(self, max_pages):
+        state = _load_state(self.db, self.hubspot_type)
+        remote_done = self.remote_pass(state, max_pages)
+        local_done = remote_done and self.local_pass(state, max_pages)
+        self.report["complete"] = local_done
+        self.report["watermark"] = _iso(state["watermark_ms"])
+        return self.report
+
+
+def reconcile(hubspot_type, dry_run=False, max_pages=50):
+    """
+    Reconcile MySQL with HubSpot for one object type.
+
+    A run stops after `max_pages` pages per pass and resumes from the
+    saved position on the next call; call again until the report says
+    `complete`. A dry run only reports what would be pulled and pushed: it
+    writes nothing and does not move the saved position.
+
+    Args:
+    - hubspot_type (str): "contacts" or "tickets".
+    - dry_run (bool): Report differences without applying them.
+    - max_pages (int): Page budget per pass.
+
+    Returns:
+    - dict: Counts per action (`in_sync`, `pulled`, `pushed`,
+      `conflicts`, `remote_only`, `errors`), objects scanned, the
+      watermark reached, `complete`, and up to RECONCILE_REPORT_LIMIT
+      `changes` with the differing properties.
+
+    Raises:
+    - ReconcileBusy: If a run for this object type is in progress.
+    - RuntimeError: If a HubSpot search fails (progress so far is kept).
+    """
+
+    db = access_db()
+    with db:
+        with db.cursor() as cursor:
+            # one run per object type across all processes; released
+            # when the connection closes
+            cursor.execute("select get_lock(%s, 0) as acquired", (f"hubspot_reconcile:{hubspot_type}",))
+            if not cursor.fetchone()["acquired"]:
+                raise ReconcileBusy(f"Reconciliation of {hubspot_type} is already running")
+        return Reconciler(db, hubspot_type, dry_run).run(max_pages)
+
+
+def _run_job(job_id, object_type, dry_run, max_pages):
+    with _jobs_lock:
+        _jobs[job_id]["status"] = "running"
+    try:
+        report = reconcile(object_type, dry_run=dry_run, max_pages=max_pages)
+        outcome = {"status": "done", "report": report}
+    except ReconcileBusy as e:
+        outcome = {"status": "busy", "error": str(e)}
+    except Exception as e:
+        logger.exception("HubSpot reconciliation job %s failed", job_id)
+        outcome = {"status": "failed", "error": str(e)}
+    with _jobs_lock:
+        _jobs[job_id] = dict(_jobs.get(job_id, {}), **outcome, finished_at=datetime.now(timezone.utc).isoformat())
+
+
+@hubspot_reconcile_router.post("/reconcile/{object_type}", status_code=status.HTTP_202_ACCEPTED)
+def reconcile_hubspot(
+    object_type: Literal["contacts", "tickets"],
+    dry_run: bool = True,
+    max_pages: int = 50,
+    user=Depends(admin_required)
+):
+    """
+    Detect and repair drift between MySQL and HubSpot.
+
+    Starts one bounded slice of the reconciliation (see `reconcile`) in
+    the background and returns at once; poll
+    `/hubspot/reconcile/jobs/{job_id}` for the report, and start again
+    until it says `complete`. Defaults to a dry run.
+
+    Args:
+    - object_type (str): "contacts" or "tickets".
+    - dry_run (bool): Only report differences.
+    - max_pages (int): Page budget per pass.
+    - user (dict, Depends): Authenticated Admin.
+
+    Returns:
+    - dict: `job_id` and `status` ("queued").
+
+    Raises:
+    - HTTPException (409): If a run for this object type is already
+      queued or running in this process.
+    """
+
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job.get("object_type") == object_type and job["status"] in ("queued", "running"):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Reconciliation of {object_type} is already running (job {job['job_id']})"
+                )
+        job_id = uuid.uuid4().hex
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "object_type": object_type,
+            "dry_run": dry_run,
+            "status": "queued",
+            "started_at": datetime.now(timezone.utc).isoformat(),
+        }
+    _job_executor.submit(_run_job, job_id, object_type, dry_run, max(1, min(max_pages, 1000)))
+    return {"job_id": job_id, "status": "queued"}
+
+
+@hubspot_reconcile_router.get("/reconcile/jobs/{job_id}")
+def reconcile_job(job_id: str, user=Depends(admin_required)):
+    """
+    Return the state of a reconciliation job.
+
+    Args:
+    - job_id (str): ID returned when the job was started.
+    - user (dict, Depends): Authenticated Admin.
+
+    Returns:
+    - dict: `status` ("queued", "running", "done", "busy" when another
+      process holds the run, or "failed"), with the `report` once done or
+      the `error` otherwise.
+
+    Raises:
+    - HTTPException (404): If the job is unknown or expired.
+    """
+
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reconciliation job not found")
+        return dict(job)
+
+
+if __name__ == "__main__":
+    # cron entry point: python -m Hubspot.reconcile contacts [--dry-run]
+    logging.basicConfig(level=logging.INFO)
+    hubspot_type = sys.argv[1] if len(sys.argv) > 1 else "contacts"
+    report = reconcile(hubspot_type, dry_run="--dry-run" in sys.argv[2:], max_pages=1000)
+    report.pop("changes")
+    print(report)
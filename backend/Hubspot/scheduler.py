@@ -0,0 +1,298 @@
+import os
+import random
+import threading
+import time
+from prometheus_client import Counter, Gauge
+from requests import RequestException
+
+# Defaults match a Professional private app: 190 requests per 10 s,
+# 625k per day, search endpoints 5 per second. The budget is per
+# process; HubSpot's rate-limit headers correct it towards the
+# account-wide numbers after every response.
+HUBSPOT_REQUESTS_PER_10S = int(os.getenv("HUBSPOT_REQUESTS_PER_10S", "190"))
+HUBSPOT_DAILY_LIMIT = int(os.getenv("HUBSPOT_DAILY_LIMIT", "625000"))
+HUBSPOT_SEARCH_PER_SECOND = int(os.getenv("HUBSPOT_SEARCH_PER_SECOND", "5"))
+HUBSPOT_MAX_CONCURRENCY = int(os.getenv("HUBSPOT_MAX_CONCURRENCY", "10"))
+
+HUBSPOT_MAX_RETRIES = 5
+HUBSPOT_BACKOFF_BASE_SECONDS = 0.5
+HUBSPOT_BACKOFF_MAX_SECONDS = 30
+SLOT_POLL_SECONDS = 0.02
+
+_budget = Gauge(
+    "hubspot_rate_budget",
+    "Requests currently available in each HubSpot rate-limit window",
+    ["window"]
+)
+_queue_depth = Gauge(
+    "hubspot_scheduler_queue_depth",
+    "HubSpot requests waiting for rate budget or a concurrency slot"
+)
+_retries = Counter(
+    "hubspot_retries_total",
+    "HubSpot requests retried by the scheduler",
+    ["reason"]
+)
+
+
+class RateBudgetExhausted(RequestException):
+    """
+    Raised when a request cannot get rate budget within its wait limit.
+
+    A `RequestException`, so callers handle it like any other failed
+    HubSpot call.
+    """
+
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at `capacity / period` per second.
+    """
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        # seconds until one token is available (call after refill)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+def backoff_delay(attempt, base=HUBSPOT_BACKOFF_BASE_SECONDS, cap=HUBSPOT_BACKOFF_MAX_SECONDS):
+    """
+    Full-jitter exponential backoff for retry number `attempt` (>= 1).
+    """
+
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class RateLimitScheduler:
+    """
+    Client-side pacing of HubSpot API calls.
+
+    Every call takes a token from the 10-second bucket (and from the
+    search bucket for search endpoints), counts against the daily budget
+    and holds one of HUBSPOT_MAX_CONCURRENCY slots while in flight. Calls
+    that find no budget wait for it instead of failing. A 429 pauses all
+    calls until its Retry-After has passed.
+
+    `status()` reports the remaining budget and the number of waiting
+    calls, so batch jobs can pace themselves.
+    """
+
+    def __init__(
+        self,
+        per_10s=HUBSPOT_REQUESTS_PER_10S,
+        daily=HUBSPOT_DAILY_LIMIT,
+        search_per_second=HUBSPOT_SEARCH_PER_SECOND,
+        max_concurrency=HUBSPOT_MAX_CONCURRENCY
+    ):
+        self._cond = threading.Condition()
+        self._window = TokenBucket(per_10s, 10)
+        self._search = TokenBucket(search_per_second, 1)
+        self._daily_limit = daily
+        self._daily_remaining = daily
+        self._day = time.gmtime().tm_yday
+        self._max_concurrency = max_concurrency
+        self._slots = max_concurrency
+        self._paused_until = 0.0
+        self._waiting = 0
+
+        _budget.labels("10s").set_function(lambda: self._window.tokens)
+        _budget.labels("search").set_function(lambda: self._search.tokens)
+        _budget.labels("daily").set_function(lambda: self._daily_remaining)
+        _queue_depth.set_function(lambda: self._waiting)
+
+    def _reset_daily(self):
+        # caller holds self._cond; HubSpot's daily limit resets at midnight UTC
+        day = time.gmtime().tm_yday
+        if day != self._day:
+            self._day = day
+            self._daily_remaining = self._daily_limit
+
+    def _delay(self, search, slot_poll=1.0):
+        # caller holds self._cond; seconds to wait before this call may start
+        now = time.monotonic()
+        self._window.refill(now)
+        self._search.refill(now)
+        self._reset_daily()
+        if self._daily_remaining <= 0:
+            return None
+        delay = max(self._paused_until - now, self._window.wait_time())
+        if search:
+            delay = max(delay, self._search.wait_time())
+        if delay <= 0 and self._slots <= 0:
+            # woken by release(); the timeout only bounds a missed notify
+            delay = slot_poll
+        return delay
+
+    def acquire(self, search=False, max_wait=None):
+        """
+        Wait for rate budget and a concurrency slot.
+
+        Args:
+        - search (bool): The call hits a search endpoint.
+        - max_wait (float, optional): Give up after this many seconds.
+
+        Raises:
+        - RateBudgetExhausted: If the daily budget is used up or
+          `max_wait` passed.
+        """
+
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        with self._cond:
+            self._waiting += 1
+            try:
+                while True:
+                    delay = self._delay(search)
+                    if delay is None:
+                        raise RateBudgetExhausted("HubSpot daily request budget exhausted")
+                    if delay <= 0 and self._slots > 0:
+                        break
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise RateBudgetExhausted("Timed out waiting for HubSpot rate budget")
+                        delay = min(delay, remaining)
+                    self._cond.wait(timeout=delay)
+                self._take(search)
+            finally:
+                self._waiting -= 1
+
+    def _take(self, search):
+        # caller holds self._cond
+        self._window.tokens -= 1
+        if search:
+            self._search.tokens -= 1
+        self._daily_remaining -= 1
+        self._slots -= 1
+
+    def try_acquire(self, search=False):
+        """
+        Take rate budget and a concurrency slot if available now.
+
+        For callers that must not block (the async client); they sleep
+        for the returned time and try again, counted with `add_waiter()`
+        while they do.
+
+        Args:
+        - search (bool): The call hits a search endpoint.
+
+        Returns:
+        - float: 0 if acquired (call `release()` afterwards), otherwise
+          seconds to wait before trying again.
+
+        Raises:
+        - RateBudgetExhausted: If the daily budget is used up.
+        """
+
+        with self._cond:
+            # release() cannot wake these callers, so a freed slot is polled for
+            delay = self._delay(search, slot_poll=SLOT_POLL_SECONDS)
+            if delay is None:
+                raise RateBudgetExhausted("HubSpot daily request budget exhausted")
+            if delay > 0:
+                return delay
+            self._take(search)
+            return 0.0
+
+    def add_waiter(self):
+        """
+        Count a `try_acquire` caller that was deferred and will try again
+        in `queue_depth`, until `remove_waiter()`.
+        """
+
+        with self._cond:
+            self._waiting += 1
+
+    def remove_waiter(self):
+        """
+        Stop counting a caller added with `add_waiter()` (it acquired,
+        failed or was cancelled).
+        """
+
+        with self._cond:
+            self._waiting -= 1
+
+    def release(self, headers=None, retry_after=None):
+        """
+        Free the call's concurrency slot and apply what HubSpot reported.
+
+        Args:
+        - headers (Mapping, optional): Response headers; the
+          X-HubSpot-RateLimit-* values lower the local budget when HubSpot
+          has less left than we think (other processes share it).
+        - retry_after (float, optional): Pause every call this long (429).
+        """
+
+        with self._cond:
+            self._slots += 1
+            if headers:
+                remaining = headers.get("X-HubSpot-RateLimit-Remaining")
+                if remaining is not None and remaining.isdigit():
+                    self._window.tokens = min(self._window.tokens, float(remaining))
+                daily = headers.get("X-HubSpot-RateLimit-Daily-Remaining")
+                if daily is not None and daily.isdigit():
+                    self._daily_remaining = min(self._daily_remaining, int(daily))
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def status(self):
+        """
+        Return the current budget and queue depth.
+
+        Returns:
+        - dict: `window_remaining` (10 s bucket), `search_remaining`,
+          `daily_remaining`, `in_flight`, `queue_depth` and `paused_for`
+          (seconds until a 429 pause ends).
+        """
+
+        with self._cond:
+            now = time.monotonic()
+            self._window.refill(now)
+            self._search.refill(now)
+            self._reset_daily()
+            return {
+                "window_remaining": int(self._window.tokens),
+                "search_remaining": int(self._search.tokens),
+                "daily_remaining": self._daily_remaining,
+                "in_flight": self._max_concurrency - self._slots,
+                "queue_depth": self._waiting,
+                "paused_for": max(0.0, self._paused_until - now),
+            }
+
+
+def retry_after_seconds(response, attempt):
+    """
+    Return how long to wait before retrying a 429 or 5xx response.
+
+    Uses Retry-After when HubSpot sends it (seconds), otherwise jittered
+    exponential backoff.
+    """
+
+    value = response.headers.get("Retry-After")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+    if response.status_code == 429:
+        interval = response.headers.get("X-HubSpot-RateLimit-Interval-Milliseconds")
+        if interval and interval.isdigit():
+            # a burst-window 429 clears within one interval
+            return min(int(interval) / 1000, HUBSPOT_BACKOFF_MAX_SECONDS) * random.uniform(0.5, 1)
+    return backoff_delay(attempt)
+
+
+def record_retry(reason):
+    _retries.labels(reason).inc()
+
+
+hubspot_scheduler = RateLimitScheduler()
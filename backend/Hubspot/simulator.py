@@ -0,0 +1,647 @@
+# Local HubSpot API simulator for tests and load benchmarks.
+#
+# Serves the CRM endpoints the Hubspot modules call from an in-memory
+# store, with configurable latency, errors and 429s:
+#
+#     python -m Hubspot.simulator --port 8090 --latency-ms 120 --error-rate 0.02
+#     HUBSPOT_BASE_URL=http://127.0.0.1:8090 HUBSPOT_TOKEN=local uvicorn main:app
+#
+# Any bearer token is accepted. Settings can be changed while it runs
+# with PATCH /_simulator/config; GET /_simulator/stats returns response
+# counts per endpoint and POST /_simulator/reset clears the store.
+import argparse
+import asyncio
+import math
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime, timezone
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+# HubSpot limits search paging to 10,000 results and 200 per page
+SEARCH_MAX_RESULTS = 10000
+SEARCH_PAGE_LIMIT = 200
+
+# associationTypeId -> (from type, to type) for HUBSPOT_DEFINED types
+ASSOCIATION_TYPES = {
+    15: ("contacts", "tickets"),
+    16: ("tickets", "contacts"),
+}
+DEFAULT_ASSOCIATION = {
+    ("contacts", "tickets"): 15,
+    ("tickets", "contacts"): 16,
+}
+MODIFIED_PROPERTY = {
+    "contacts": "lastmodifieddate",
+    "tickets": "hs_lastmodifieddate",
+}
+
+
+@dataclass
+class SimulatorConfig:
+    """
+    Behaviour of the simulator.
+
+    Attributes:
+    - latency_ms (float): Median response latency.
+    - latency_sigma (float): Spread of the lognormal latency distribution;
+      0 makes every call take `latency_ms`. 0.5 gives a p99 of about 3x
+      the median.
+    - search_latency_ms (float): Extra latency of search calls.
+    - error_rate (float): Fraction of calls answered with a random 5xx.
+    - timeout_rate (float): Fraction of calls that hang for
+      `timeout_seconds` before answering (client timeouts).
+    - timeout_seconds (float): How long a hung call takes.
+    - rate_limit_rate (float): Fraction of calls answered with 429
+      regardless of the budget.
+    - requests_per_10s (int): Burst limit; calls beyond it get 429 until
+      the window rolls over. 0 disables it.
+    - daily_limit (int): Daily limit; 0 disables it.
+    - search_per_second (int): Search limit; 0 disables it.
+    - retry_after (bool): Send Retry-After on 429s (HubSpot usually does
+      not; clients must then back off on their own).
+    """
+
+    latency_ms: float = 50
+    latency_sigma: float = 0.5
+    search_latency_ms: float = 50
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout_seconds: float = 30
+    rate_limit_rate: float = 0.0
+    requests_per_10s: int = 190
+    daily_limit: int = 625000
+    search_per_second: int = 5
+    retry_after: bool = False
+
+    def update(self, values):
+        """
+        Apply a dict of settings; unknown keys raise ValueError.
+        """
+
+        unknown = set(values) - {f.name for f in fields(self)}
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        for name, value in values.items():
+            current = getattr(self, name)
+            if isinstance(current, bool) and not isinstance(value, bool):
+                value = str(value).lower() in ("1", "true", "yes")
+            setattr(self, name, type(current)(value))
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class Rejected(Exception):
+    """
+    A call the simulated HubSpot refuses (HubSpot error body fields).
+    """
+
+    def __init__(self, status, message, category="VALIDATION_ERROR"):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.category = category
+
+
+def _error(status, message, category="VALIDATION_ERROR", headers=None, **extra):
+    body = {"status": "error", "message": message, "category": category, **extra}
+    return JSONResponse(body, status_code=status, headers=headers)
+
+
+class RateWindows:
+    """
+    HubSpot's limits as fixed windows: per 10 seconds, per day and per
+    second for search.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._window = (0, 0)
+        self._search = (0, 0)
+        self._day = (0, 0)
+
+    @staticmethod
+    def _take(state, key, limit):
+        start, used = state
+        if start != key:
+            start, used = key, 0
+        if limit and used >= limit:
+            return (start, used), False
+        return (start, used + 1), True
+
+    def check(self, config, search):
+        """
+        Count one call against the limits.
+
+        Returns:
+        - tuple: (policy name of the limit hit or None, headers to send)
+        """
+
+        now = time.time()
+        if search:
+            self._search, ok = self._take(self._search, int(now), config.search_per_second)
+            # HubSpot sends no rate-limit headers on search responses
+            return (None if ok else "SECONDLY"), {}
+
+        self._day, day_ok = self._take(self._day, int(now // 86400), config.daily_limit)
+        self._window, window_ok = self._take(self._window, int(now // 10), config.requests_per_10s)
+        headers = {"X-HubSpot-RateLimit-Interval-Milliseconds": "10000"}
+        if config.requests_per_10s:
+            headers["X-HubSpot-RateLimit-Max"] = str(config.requests_per_10s)
+            headers["X-HubSpot-RateLimit-Remaining"] = str(max(config.requests_per_10s - self._window[1], 0))
+        if config.daily_limit:
+            headers["X-HubSpot-RateLimit-Daily"] = str(config.daily_limit)
+            headers["X-HubSpot-RateLimit-Daily-Remaining"] = str(max(config.daily_limit - self._day[1], 0))
+        if not day_ok:
+            return "DAILY", headers
+        if not window_ok:
+            return "TEN_SECONDLY_ROLLING", headers
+        return None, headers
+
+
+class ObjectStore:
+    """
+    In-memory CRM objects keyed by type and ID.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.objects = {"contacts": {}, "tickets": {}}
+        self.associations = {}
+        self._next_id = 1001
+
+    def new_id(self):
+        object_id = str(self._next_id)
+        self._next_id += 1
+        return object_id
+
+    def find(self, object_type, value, id_property=None):
+        objects = self.objects[object_type]
+        if not id_property or id_property == "hs_object_id":
+            return objects.get(str(value))
+        for obj in objects.values():
+            if obj["properties"].get(id_property) == str(value):
+                return obj
+        return None
+
+    def create(self, object_type, properties, associations=()):
+        """
+        Create an object, with its associations.
+
+        Raises:
+        - Rejected: For a duplicate contact email (409) or a bad
+          association (400).
+        """
+
+        properties = {k: "" if v is None else str(v) for k, v in (properties or {}).items()}
+        if object_type == "contacts" and properties.get("email"):
+            existing = self.find("contacts", properties["email"], "email")
+            if existing:
+                raise Rejected(409, f"Contact already exists. Existing ID: {existing['id']}", "CONFLICT")
+        for association in associations or ():
+            to_id = str((association.get("to") or {}).get("id"))
+            type_ids = [t.get("associationTypeId") for t in association.get("types") or []]
+            targets = [ASSOCIATION_TYPES.get(t) for t in type_ids]
+            if not targets or any(t is None or t[0] != object_type for t in targets):
+                raise Rejected(400, f"Unsupported association types {type_ids} for {object_type}")
+            if to_id not in self.objects[targets[0][1]]:
+                raise Rejected(400, f"{targets[0][1]} {to_id} does not exist", "OBJECT_NOT_FOUND")
+
+        now = _now_iso()
+        object_id = self.new_id()
+        properties.update({
+            "hs_object_id": object_id,
+            "createdate": now,
+            MODIFIED_PROPERTY[object_type]: now,
+        })
+        obj = {"id": object_id, "properties": properties, "createdAt": now, "updatedAt": now, "archived": False}
+        self.objects[object_type][object_id] = obj
+        for association in associations or ():
+            to_type = ASSOCIATION_TYPES[association["types"][0]["associationTypeId"]][1]
+            self.associate(object_type, object_id, to_type, str(association["to"]["id"]))
+        return obj
+
+    def update(self, object_type, obj, properties):
+        now = _now_iso()
+        obj["properties"].update({k: "" if v is None else str(v) for k, v in (properties or {}).items()})
+        obj["properties"][MODIFIED_PROPERTY[object_type]] = now
+        obj["updatedAt"] = now
+        return obj
+
+    def archive(self, object_type, object_id):
+        obj = self.objects[object_type].pop(str(object_id), None)
+        for key in [k for k in self.associations if (k[0], k[1]) == (object_type, str(object_id))]:
+            for to_id in self.associations.pop(key):
+                self.associations.get((key[2], to_id, object_type), set()).discard(str(object_id))
+        return obj
+
+    def associate(self, from_type, from_id, to_type, to_id):
+        self.associations.setdefault((from_type, from_id, to_type), set()).add(to_id)
+        self.associations.setdefault((to_type, to_id, from_type), set()).add(from_id)
+
+    def associated(self, from_type, from_id, to_type):
+        return sorted(self.associations.get((from_type, str(from_id), to_type), ()), key=int)
+
+
+def _view(obj, properties=None):
+    """
+    Return an object with only the requested properties (plus HubSpot's
+    defaults); every property when none are requested.
+    """
+
+    if not properties:
+        return dict(obj, properties=dict(obj["properties"]))
+    wanted = set(properties) | {"hs_object_id", "createdate", "lastmodifieddate", "hs_lastmodifieddate"}
+    return dict(obj, properties={k: v for k, v in obj["properties"].items() if k in wanted})
+
+
+def _requested_properties(request):
+    values = request.query_params.getlist("properties")
+    return [p for value in values for p in value.split(",") if p]
+
+
+def _comparable(value):
+    # HubSpot compares dates given as epoch milliseconds or ISO strings,
+    # and numbers numerically
+    if value is None:
+        return None
+    text = str(value)
+    if text.lstrip("-").isdigit():
+        return float(text)
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp() * 1000
+    except ValueError:
+        return text.lower()
+
+
+def _matches(obj, condition):
+    name = condition.get("propertyName")
+    operator = condition.get("operator", "EQ")
+    actual = obj["properties"].get(name)
+    if operator == "HAS_PROPERTY":
+        return bool(actual)
+    if operator == "NOT_HAS_PROPERTY":
+        return not actual
+    if operator in ("IN", "NOT_IN"):
+        found = str(actual).lower() in {str(v).lower() for v in condition.get("values") or []}
+        return found if operator == "IN" else not found
+    if operator == "CONTAINS_TOKEN":
+        return actual is not None and str(condition.get("value", "")).strip("*").lower() in actual.lower()
+    left, right = _comparable(actual), _comparable(condition.get("value"))
+    if operator == "EQ":
+        return left == right
+    if operator == "NEQ":
+        return left != right
+    if left is None or right is None or type(left) is not type(right):
+        return False
+    return {
+        "GT": left > right,
+        "GTE": left >= right,
+        "LT": left < right,
+        "LTE": left <= right,
+    }.get(operator, False)
+
+
+def _sort_key(prop):
+    def key(obj):
+        value = _comparable(obj["properties"].get(prop))
+        # missing values last, numbers and strings never compared
+        return (value is None, isinstance(value, str), value if value is not None else 0)
+    return key
+
+
+def create_app(config=None):
+    """
+    Build the simulator app.
+
+    Args:
+    - config (SimulatorConfig, optional): Initial behaviour; the app keeps
+      a reference, so changes to it apply immediately.
+
+    Returns:
+    - FastAPI: The app; `app.state.config`, `app.state.store` and
+      `app.state.stats` expose its state to in-process benchmarks.
+    """
+
+    app = FastAPI(title="HubSpot simulator")
+    app.state.config = config or SimulatorConfig()
+    app.state.store = store = ObjectStore()
+    app.state.limits = limits = RateWindows()
+    app.state.stats = stats = Counter()
+
+    def object_type_or_404(object_type):
+        if object_type not in store.objects:
+            return _error(404, f"Unknown object type {object_type}", category="OBJECT_NOT_FOUND")
+        return None
+
+    @app.middleware("http")
+    async def simulate(request: Request, call_next):
+        path = request.url.path
+        if path.startswith("/_simulator"):
+            return await call_next(request)
+        cfg = app.state.config
+        endpoint = f"{request.method} {_endpoint_name(path)}"
+        search = path.endswith("/search")
+
+        auth = request.headers.get("Authorization", "")
+        if not auth.startswith("Bearer ") or len(auth) <= len("Bearer "):
+            response = _error(401, "Authentication credentials not found.", category="INVALID_AUTHENTICATION")
+            stats[(endpoint, 401)] += 1
+            return response
+
+        latency = cfg.latency_ms + (cfg.search_latency_ms if search else 0)
+        if cfg.latency_sigma > 0 and latency > 0:
+            latency *= math.exp(random.gauss(0, cfg.latency_sigma))
+        await asyncio.sleep(latency / 1000)
+
+        policy, headers = limits.check(cfg, search)
+        if policy is None and random.random() < cfg.rate_limit_rate:
+            policy = "TEN_SECONDLY_ROLLING"
+        if policy:
+            if cfg.retry_after:
+                headers["Retry-After"] = "1" if policy != "DAILY" else "3600"
+            response = _error(
+                429, f"You have reached your {policy.lower()} limit.", category="RATE_LIMITS",
+                headers=headers, errorType="RATE_LIMIT", policyName=policy
+            )
+        elif random.random() < cfg.timeout_rate:
+            await asyncio.sleep(cfg.timeout_seconds)
+            response = _error(504, "Gateway timeout", category="TIMEOUT", headers=headers)
+        elif random.random() < cfg.error_rate:
+            code = random.choice((500, 502, 503, 504))
+            response = _error(code, "Simulated HubSpot error", category="INTERNAL_ERROR", headers=headers)
+        else:
+            response = await call_next(request)
+            response.headers.update(headers)
+        stats[(endpoint, response.status_code)] += 1
+        return response
+
+    @app.get("/crm/v3/objects/{object_type}/{object_id}")
+    async def get_object(object_type: str, object_id: str, request: Request):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        obj = store.find(object_type, object_id, request.query_params.get("idProperty"))
+        if not obj:
+            return _error(404, "Object not found", category="OBJECT_NOT_FOUND")
+        result = _view(obj, _requested_properties(request))
+        to_types = [t for value in request.query_params.getlist("associations") for t in value.split(",") if t]
+        if to_types:
+            result["associations"] = {
+                to_type: {"results": [
+                    {"id": to_id, "type": f"{object_type[:-1]}_to_{to_type[:-1]}"}
+                    for to_id in store.associated(object_type, obj["id"], to_type)
+                ]}
+                for to_type in to_types if store.associated(object_type, obj["id"], to_type)
+            }
+        return result
+
+    @app.post("/crm/v3/objects/{object_type}", status_code=201)
+    async def create_object(object_type: str, body: dict):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        try:
+            return _view(store.create(object_type, body.get("properties"), body.get("associations")))
+        except Rejected as e:
+            return _error(e.status, e.message, category=e.category)
+
+    @app.patch("/crm/v3/objects/{object_type}/{object_id}")
+    async def update_object(object_type: str, object_id: str, body: dict, request: Request):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        obj = store.find(object_type, object_id, request.query_params.get("idProperty"))
+        if not obj:
+            return _error(404, "Object not found", category="OBJECT_NOT_FOUND")
+        return _view(store.update(object_type, obj, body.get("properties")))
+
+    @app.delete("/crm/v3/objects/{object_type}/{object_id}")
+    async def delete_object(object_type: str, object_id: str):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        # HubSpot answers 204 for IDs that do not exist as well
+        store.archive(object_type, object_id)
+        return Response(status_code=204)
+
+    @app.post("/crm/v3/objects/{object_type}/search")
+    async def search_objects(object_type: str, body: dict):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        groups = body.get("filterGroups") or []
+        matches = [
+            obj for obj in store.objects[object_type].values()
+            if not groups or any(all(_matches(obj, f) for f in g.get("filters") or []) for g in groups)
+        ]
+        for sort in reversed(body.get("sorts") or [{"propertyName": "hs_object_id", "direction": "ASCENDING"}]):
+            matches.sort(key=_sort_key(sort["propertyName"]), reverse=sort.get("direction") == "DESCENDING")
+        limit = min(int(body.get("limit") or 10), SEARCH_PAGE_LIMIT)
+        start = int(body.get("after") or 0)
+        if start >= SEARCH_MAX_RESULTS:
+            return _error(400, f"Search results are limited to {SEARCH_MAX_RESULTS}")
+        page = matches[start:start + limit]
+        result = {"total": len(matches), "results": [_view(obj, body.get("properties")) for obj in page]}
+        if start + limit < min(len(matches), SEARCH_MAX_RESULTS):
+            result["paging"] = {"next": {"after": str(start + limit)}}
+        return result
+
+    @app.post("/crm/v3/objects/{object_type}/batch/{action}")
+    async def batch(object_type: str, action: str, body: dict):
+        missing = object_type_or_404(object_type)
+        if missing:
+            return missing
+        inputs = body.get("inputs") or []
+        if len(inputs) > 100:
+            return _error(400, "Batch calls accept at most 100 inputs")
+        started = _now_iso()
+        results, errors = [], []
+
+        if action == "create":
+            for item in inputs:
+                trace = item.get("objectWriteTraceId")
+                try:
+                    created = store.create(object_type, item.get("properties"), item.get("associations"))
+                except Rejected as e:
+                    errors.append({
+                        "status": "error", "category": e.category,
+                        "message": e.message, "context": {"objectWriteTraceId": [trace]}
+                    })
+                    continue
+                results.append(dict(_view(created), **({"objectWriteTraceId": trace} if trace is not None else {})))
+        elif action in ("read", "update"):
+            id_property = body.get("idProperty") if action == "read" else None
+            not_found = []
+            for item in inputs:
+                obj = store.find(object_type, item.get("id"), id_property)
+                if not obj:
+                    not_found.append(str(item.get("id")))
+                elif action == "read":
+                    results.append(_view(obj, body.get("properties")))
+                else:
+                    results.append(_view(store.update(object_type, obj, item.get("properties"))))
+            if not_found:
+                errors.append({
+                    "status": "error", "category": "OBJECT_NOT_FOUND",
+                    "message": "Could not get some objects, they may be deleted or not exist.",
+                    "context": {"ids": not_found}
+                })
+        elif action == "archive":
+            for item in inputs:
+                store.archive(object_type, item.get("id"))
+            return Response(status_code=204)
+        else:
+            return _error(404, f"Unknown batch action {action}", category="OBJECT_NOT_FOUND")
+
+        data = {
+            "status": "COMPLETE", "results": results, "startedAt": started, "completedAt": _now_iso()
+        }
+        if errors:
+            data.update(errors=errors, numErrors=len(errors))
+            return JSONResponse(data, status_code=207)
+        return JSONResponse(data, status_code=201 if action == "create" else 200)
+
+    @app.get("/crm/v4/objects/{object_type}/{object_id}/associations/{to_type}")
+    async def list_associations(object_type: str, object_id: str, to_type: str):
+        for t in (object_type, to_type):
+            missing = object_type_or_404(t)
+            if missing:
+                return missing
+        type_id = DEFAULT_ASSOCIATION.get((object_type, to_type))
+        return {"results": [
+            {"toObjectId": int(to_id), "associationTypes": [
+                {"category": "HUBSPOT_DEFINED", "typeId": type_id, "label": None}
+            ]}
+            for to_id in store.associated(object_type, object_id, to_type)
+        ]}
+
+    @app.put("/crm/v4/objects/{object_type}/{object_id}/associations/default/{to_type}/{to_id}")
+    async def create_default_association(object_type: str, object_id: str, to_type: str, to_id: str):
+        for t in (object_type, to_type):
+            missing = object_type_or_404(t)
+            if missing:
+                return missing
+        if not store.find(object_type, object_id) or not store.find(to_type, to_id):
+            return _error(404, "Object not found", category="OBJECT_NOT_FOUND")
+        store.associate(object_type, str(object_id), to_type, str(to_id))
+        return {"status": "COMPLETE", "results": [{
+            "from": {"id": str(object_id)}, "to": {"id": str(to_id)},
+            "associationSpec": {
+                "associationCategory": "HUBSPOT_DEFINED",
+                "associationTypeId": DEFAULT_ASSOCIATION.get((object_type, to_type))
+            }
+        }]}
+
+    @app.get("/_simulator/config")
+    async def get_config():
+        return asdict(app.state.config)
+
+    @app.patch("/_simulator/config")
+    async def update_config(body: dict):
+        try:
+            app.state.config.update(body)
+        except (TypeError, ValueError) as e:
+            return _error(400, str(e))
+        return asdict(app.state.config)
+
+    @app.get("/_simulator/stats")
+    async def get_stats():
+        result = {}
+        for (endpoint, code), count in sorted(stats.items()):
+            result.setdefault(endpoint, {})[str(code)] = count
+        return result
+
+    @app.post("/_simulator/reset")
+    async def reset():
+        store.reset()
+        limits.reset()
+        stats.clear()
+        return {"status": "reset"}
+
+    return app
+
+
+def _endpoint_name(path):
+    # "/crm/v3/objects/tickets/1234" -> "/crm/v3/objects/tickets/{id}", so
+    # stats are per endpoint rather than per object
+    parts = path.rstrip("/").split("/")
+    if len(parts) > 5 and parts[5] not in ("search", "batch"):
+        parts[5] = "{id}"
+    if len(parts) > 8 and parts[7] == "default":
+        parts[9] = "{id}"
+    return "/".join(parts)
+
+
+class SimulatorServer:
+    """
+    Simulator served by uvicorn on a background thread, for benchmarks
+    and tests in the same process.
+
+    Usage:
+        with SimulatorServer(SimulatorConfig(error_rate=0.05)) as sim:
+            client = HubSpotClient(base_url=sim.base_url, token="local")
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        import uvicorn
+
+        self.app = create_app(config)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=host, port=port, log_level="warning"))
+        self._thread = None
+        self.base_url = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.run, name="hubspot-simulator", daemon=True)
+        self._thread.start()
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError("HubSpot simulator failed to start")
+            time.sleep(0.01)
+        host, port = self._server.servers[0].sockets[0].getsockname()[:2]
+        self.base_url = f"http://{host}:{port}"
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    defaults = SimulatorConfig()
+    parser = argparse.ArgumentParser(description="Local HubSpot API simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    for f in fields(SimulatorConfig):
+        flag = "--" + f.name.replace("_", "-")
+        if f.type is bool or isinstance(getattr(defaults, f.name), bool):
+            parser.add_argument(flag, action="store_true", default=getattr(defaults, f.name))
+        else:
+            parser.add_argument(flag, type=type(getattr(defaults, f.name)), default=getattr(defaults, f.name))
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+
+    import uvicorn
+
+    uvicorn.run(create_app(SimulatorConfig(**args)), host=host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
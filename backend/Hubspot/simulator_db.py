@@ -0,0 +1,345 @@
+# In-memory stand-in for the MySQL tables the HubSpot sync reads and
+# writes (customer, ticket, hubspot_outbox), for tests and load
+# benchmarks run against the simulator without a database:
+#
+#     with SimulatorServer() as sim:
+#         database = MemoryDatabase()
+#         database.add_customer(customer_id=1, customer_email="a@example.com")
+#         db = database.connect()
+#
+# Only the statements the Hubspot modules issue are understood; any
+# other statement raises NotImplementedError, so a changed query fails
+# loudly instead of silently doing nothing. There are no transactions:
+# writes apply immediately and rollback() is a no-op.
+import itertools
+import threading
+from datetime import datetime, timedelta
+
+CUSTOMER_DEFAULTS = {
+    "customer_name": "",
+    "customer_mobile_number": "",
+    "customer_company_name": "",
+    "customer_city": "",
+    "customer_state": "",
+    "customer_country": "",
+    "customer_address": "",
+    "hubspot_contact_id": None,
+    "hubspot_sync_hash": None,
+}
+TICKET_DEFAULTS = {
+    "issue_title": "",
+    "issue_description": "",
+    "ticket_status": "Open",
+    "priority": "Medium",
+    "reason": None,
+    "service_person_emp_id": None,
+    "hubspot_ticket_id": None,
+    "hubspot_sync_hash": None,
+}
+
+
+def _normalize(query):
+    return " ".join(query.split()).lower()
+
+
+class MemoryDatabase:
+    """
+    Tables shared by every connection from `connect()`.
+
+    Attributes:
+    - customers (dict): customer_id -> customer row.
+    - tickets (dict): ticket_id -> ticket row.
+    - outbox (dict): outbox_id -> hubspot_outbox row.
+    """
+
+    def __init__(self):
+        self.customers = {}
+        self.tickets = {}
+        self.outbox = {}
+        self._outbox_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def add_customer(self, customer_id, customer_email, **fields):
+        """
+        Insert a customer row; unspecified columns get empty values.
+        """
+
+        self.customers[customer_id] = dict(
+            CUSTOMER_DEFAULTS, customer_id=customer_id, customer_email=customer_email, **fields
+        )
+        return self.customers[customer_id]
+
+    def add_ticket(self, ticket_id, customer_id, **fields):
+        """
+        Insert a ticket row; unspecified columns get defaults.
+        """
+
+        self.tickets[ticket_id] = dict(
+            TICKET_DEFAULTS, ticket_id=ticket_id, customer_id=customer_id,
+            generate_datetime=datetime.now(), **fields
+        )
+        return self.tickets[ticket_id]
+
+    def connect(self):
+        """
+        Return a connection, usable where `access_db()` is.
+        """
+
+        return MemoryConnection(self)
+
+    def _customer_by_email(self, email):
+        # the MySQL collation compares emails case-insensitively
+        return [c for c in self.customers.values() if c["customer_email"].lower() == email.lower()]
+
+    def execute(self, query, args):
+        """
+        Run one statement.
+
+        Returns:
+        - tuple: (rows, rowcount)
+        """
+
+        sql = _normalize(query)
+        args = list(args or ())
+        with self._lock:
+            for prefix, handler in _STATEMENTS:
+                if sql.startswith(prefix):
+                    return handler(self, sql, args)
+        raise NotImplementedError(f"MemoryDatabase does not understand: {sql}")
+
+    # customer
+
+    def _select_contact_id(self, sql, args):
+        rows = [
+            {"customer_id": c["customer_id"], "hubspot_contact_id": c["hubspot_contact_id"]}
+            for c in self._customer_by_email(args[0])
+        ]
+        return rows, len(rows)
+
+    def _select_customers(self, sql, args):
+        rows = [dict(self.customers[i]) for i in args if i in self.customers]
+        return rows, len(rows)
+
+    def _save_contact_id(self, sql, args):
+        contact_id, customer_id = args
+        if customer_id not in self.customers:
+            return [], 0
+        self.customers[customer_id]["hubspot_contact_id"] = contact_id
+        return [], 1
+
+    def _forget_contact_id(self, sql, args):
+        email, contact_id = args
+        changed = 0
+        for customer in self._customer_by_email(email):
+            if str(customer["hubspot_contact_id"]) == str(contact_id):
+                customer.update(hubspot_contact_id=None, hubspot_sync_hash=None)
+                changed += 1
+        return [], changed
+
+    def _customer_sync_hash(self, sql, args):
+        digest, customer_id = args
+        if customer_id not in self.customers:
+            return [], 0
+        self.customers[customer_id]["hubspot_sync_hash"] = digest
+        return [], 1
+
+    # ticket
+
+    def _select_ticket_with_email(self, sql, args):
+        ticket = self.tickets.get(args[0])
+        if not ticket or ticket["customer_id"] not in self.customers:
+            return [], 0
+        return [dict(ticket, customer_email=self.customers[ticket["customer_id"]]["customer_email"])], 1
+
+    def _select_ticket_sync_state(self, sql, args):
+        columns = ("ticket_id", "hubspot_ticket_id", "priority", "ticket_status", "reason", "hubspot_sync_hash")
+        rows = [{k: self.tickets[i][k] for k in columns} for i in args if i in self.tickets]
+        return rows, len(rows)
+
+    def _link_ticket(self, sql, args):
+        hubspot_ticket_id, digest, ticket_id = args
+        if ticket_id not in self.tickets:
+            return [], 0
+        self.tickets[ticket_id].update(hubspot_ticket_id=hubspot_ticket_id, hubspot_sync_hash=digest)
+        return [], 1
+
+    def _unlink_ticket(self, sql, args):
+        if args[0] not in self.tickets:
+            return [], 0
+        self.tickets[args[0]].update(hubspot_ticket_id=None, hubspot_sync_hash=None)
+        return [], 1
+
+    def _ticket_sync_hash(self, sql, args):
+        digest, ticket_id = args
+        if ticket_id not in self.tickets:
+            return [], 0
+        self.tickets[ticket_id]["hubspot_sync_hash"] = digest
+        return [], 1
+
+    # hubspot_outbox
+
+    def _enqueue(self, sql, args):
+        object_type, object_id, operation, payload = args
+        outbox_id = next(self._outbox_ids)
+        now = datetime.now()
+        self.outbox[outbox_id] = {
+            "outbox_id": outbox_id,
+            "object_type": object_type,
+            "object_id": object_id,
+            "operation": operation,
+            "payload": payload,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "locked_until": None,
+            "last_error": None,
+            "created_at": now,
+            "processed_at": None,
+        }
+        return [], 1
+
+    def _expire_leases(self, sql, args):
+        now = datetime.now()
+        expired = [
+            e for e in self.outbox.values()
+            if e["status"] == "processing" and e["locked_until"] and e["locked_until"] < now
+        ]
+        for entry in expired:
+            entry["status"] = "pending"
+        return [], len(expired)
+
+    def _select_claimable(self, sql, args):
+        # due pending entries with no earlier unfinished entry of their object
+        now = datetime.now()
+        blocked, rows = set(), []
+        for entry in sorted(self.outbox.values(), key=lambda e: e["outbox_id"]):
+            key = (entry["object_type"], entry["object_id"])
+            if entry["status"] == "pending" and entry["next_attempt_at"] <= now and key not in blocked:
+                rows.append({k: entry[k] for k in (
+                    "outbox_id", "object_type", "object_id", "operation", "payload", "attempts"
+                )})
+            if entry["status"] in ("pending", "processing"):
+                blocked.add(key)
+        return rows[:args[0]], len(rows[:args[0]])
+
+    def _lease(self, sql, args):
+        seconds, *ids = args
+        for outbox_id in ids:
+            self.outbox[outbox_id].update(
+                status="processing", locked_until=datetime.now() + timedelta(seconds=seconds)
+            )
+        return [], len(ids)
+
+    def _release(self, sql, args):
+        released = [i for i in args if self.outbox[i]["status"] == "processing"]
+        for outbox_id in released:
+            self.outbox[outbox_id]["status"] = "pending"
+        return [], len(released)
+
+    def _mark_done(self, sql, args):
+        entry = self.outbox[args[0]]
+        entry.update(status="done", attempts=entry["attempts"] + 1, processed_at=datetime.now())
+        return [], 1
+
+    def _mark_failed(self, sql, args):
+        status, attempts, delay, error, outbox_id = args
+        entry = self.outbox[outbox_id]
+        if entry["status"] != "processing":
+            return [], 0
+        entry.update(
+            status=status, attempts=attempts, last_error=error,
+            next_attempt_at=datetime.now() + timedelta(seconds=delay)
+        )
+        return [], 1
+
+
+# normalized statement prefix -> handler; longer prefixes of the same
+# table come first
+_STATEMENTS = (
+    ("select customer_id, hubspot_contact_id from customer where customer_email = %s", MemoryDatabase._select_contact_id),
+    ("select * from customer where customer_id in (", MemoryDatabase._select_customers),
+    ("update customer set hubspot_contact_id = %s where customer_id = %s", MemoryDatabase._save_contact_id),
+    ("update customer set hubspot_contact_id = null, hubspot_sync_hash = null "
+     "where customer_email = %s and hubspot_contact_id = %s", MemoryDatabase._forget_contact_id),
+    ("update customer set hubspot_sync_hash = %s where customer_id = %s", MemoryDatabase._customer_sync_hash),
+    ("select t.*, c.customer_email from ticket t join customer c on c.customer_id = t.customer_id "
+     "where t.ticket_id = %s", MemoryDatabase._select_ticket_with_email),
+    ("select ticket_id, hubspot_ticket_id, priority, ticket_status, reason, hubspot_sync_hash from ticket "
+     "where ticket_id in (", MemoryDatabase._select_ticket_sync_state),
+    ("update ticket set hubspot_ticket_id = %s, hubspot_sync_hash = %s where ticket_id = %s", MemoryDatabase._link_ticket),
+    ("update ticket set hubspot_ticket_id = null, hubspot_sync_hash = null where ticket_id = %s", MemoryDatabase._unlink_ticket),
+    ("update ticket set hubspot_sync_hash = %s where ticket_id = %s", MemoryDatabase._ticket_sync_hash),
+    ("insert into hubspot_outbox (object_type, object_id, operation, payload)", MemoryDatabase._enqueue),
+    ("update hubspot_outbox set status = 'pending' where status = 'processing' and locked_until < now(3)",
+     MemoryDatabase._expire_leases),
+    ("select o.outbox_id, o.object_type, o.object_id, o.operation, o.payload, o.attempts from hubspot_outbox o",
+     MemoryDatabase._select_claimable),
+    ("update hubspot_outbox set status = 'processing', locked_until = now(3) + interval %s second "
+     "where outbox_id in (", MemoryDatabase._lease),
+    ("update hubspot_outbox set status = 'pending' where status = 'processing' and outbox_id in (",
+     MemoryDatabase._release),
+    ("update hubspot_outbox set status = 'done', attempts = attempts + 1", MemoryDatabase._mark_done),
+    ("update hubspot_outbox set status = %s, attempts = %s, next_attempt_at = now(3) + interval %s second, "
+     "last_error = %s where outbox_id = %s and status = 'processing'", MemoryDatabase._mark_failed),
+)
+
+
+class MemoryCursor:
+    """
+    DictCursor-like cursor over a `MemoryDatabase`.
+    """
+
+    def __init__(self, database):
+        self._database = database
+        self._rows = []
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def execute(self, query, args=None):
+        rows, self.rowcount = self._database.execute(query, args)
+        self._rows = list(rows)
+        return self.rowcount
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        self._rows = []
+
+
+class MemoryConnection:
+    """
+    pymysql-like connection to a `MemoryDatabase`; `with connection:`
+    closes it, as with pymysql.
+    """
+
+    def __init__(self, database):
+        self._database = database
+        self.open = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cursor(self):
+        return MemoryCursor(self._database)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
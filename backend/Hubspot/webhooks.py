@@ -0,0 +1,294 @@
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from fastapi import APIRouter, HTTPException, Request, status
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from database.database import access_db
+from Authentication.redis_client import redis_cache_client, async_redis_client
+from Hubspot.batch import batch_read
+from Hubspot.hubspot_contacts import forget_contact_id
+from Hubspot.reconcile import Reconciler, SPECS
+from Hubspot.read_cache import hubspot_read_cache
+
+logger = logging.getLogger(__name__)
+
+hubspot_webhook_router = APIRouter(prefix="/hubspot", tags=["HubSpot Sync"])
+
+# Requests older than this are rejected (replay protection, per HubSpot)
+WEBHOOK_MAX_AGE_MS = 5 * 60 * 1000
+# Events are remembered this long for deduplication; HubSpot retries
+# failed deliveries for up to 24 hours.
+WEBHOOK_DEDUPE_SECONDS = 24 * 3600
+# An object is applied this long after its first event, so a burst of
+# property changes becomes one read and one local update.
+WEBHOOK_COALESCE_SECONDS = float(os.getenv("HUBSPOT_WEBHOOK_COALESCE_SECONDS", "5"))
+WEBHOOK_RETRY_SECONDS = 60
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_POLL_SECONDS = 1
+
+WEBHOOK_PENDING_KEY = "hubspot_webhook_pending"
+
+# subscription prefix / objectTypeId -> HubSpot object type
+WEBHOOK_OBJECT_TYPES = {
+    "contact": "contacts",
+    "ticket": "tickets",
+    "0-1": "contacts",
+    "0-5": "tickets",
+}
+
+# characters HubSpot decodes in the URI before signing (v3)
+_URI_DECODE = {
+    "%3A": ":", "%2F": "/", "%3F": "?", "%40": "@", "%21": "!", "%24": "$",
+    "%27": "'", "%28": "(", "%29": ")", "%2A": "*", "%2C": ",", "%3B": ";",
+}
+
+_events = Counter(
+    "hubspot_webhook_events_total",
+    "HubSpot webhook events received",
+    ["outcome"]
+)
+_applied = Counter(
+    "hubspot_webhook_objects_total",
+    "Objects applied from coalesced HubSpot webhook events",
+    ["object_type", "outcome"]
+)
+
+# Atomically take the objects whose coalescing window has passed
+_claim_due = redis_cache_client.register_script("""
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, ARGV[2])
+if #due > 0 then
+    redis.call('ZREM', KEYS[1], unpack(due))
+end
+return due
+""")
+
+
+def _signed_uri(request):
+    uri = os.getenv("HUBSPOT_WEBHOOK_URL") or str(request.url)
+    for encoded, char in _URI_DECODE.items():
+        uri = uri.replace(encoded, char).replace(encoded.lower(), char)
+    return uri
+
+
+def verify_signature(request, body):
+    """
+    Check the v3 signature of a HubSpot webhook request.
+
+    HubSpot signs `method + uri + body + timestamp` with the app's client
+    secret (HMAC-SHA256, base64). Set HUBSPOT_WEBHOOK_URL when the public
+    URL differs from what the app sees (e.g. behind a proxy).
+
+    Args:
+    - request (Request): Incoming request.
+    - body (bytes): Raw request body.
+
+    Returns:
+    - bool: True if the signature is valid and recent.
+    """
+
+    secret = os.getenv("HUBSPOT_CLIENT_SECRET")
+    signature = request.headers.get("X-HubSpot-Signature-v3")
+    timestamp = request.headers.get("X-HubSpot-Request-Timestamp")
+    if not secret or not signature or not timestamp or not timestamp.isdigit():
+        return False
+    if abs(time.time() * 1000 - int(timestamp)) > WEBHOOK_MAX_AGE_MS:
+        return False
+
+    source = f"{request.method}{_signed_uri(request)}".encode() + body + timestamp.encode()
+    expected = base64.b64encode(hmac.new(secret.encode(), source, hashlib.sha256).digest()).decode()
+    return hmac.compare_digest(expected, signature)
+
+
+def _object_key(event):
+    subscription = event.get("subscriptionType") or ""
+    hubspot_type = WEBHOOK_OBJECT_TYPES.get(subscription.split(".", 1)[0]) or WEBHOOK_OBJECT_TYPES.get(event.get("objectTypeId"))
+    if not hubspot_type or event.get("objectId") is None:
+        return None
+    return f"{hubspot_type}:{event['objectId']}"
+
+
+@hubspot_webhook_router.post("/webhooks")
+async def hubspot_webhook(request: Request):
+    """
+    Receive HubSpot webhook events for contacts and tickets.
+
+    Verifies the v3 signature, drops events already seen (by `eventId`),
+    and queues each changed object once; the webhook worker reads the
+    current object from HubSpot and updates the local row after the
+    coalescing window. Returns immediately so HubSpot does not time out.
+
+    Returns:
+    - dict: {"accepted": int, "duplicates": int, "ignored": int}
+
+    Raises:
+    - HTTPException (401): If the signature is missing, invalid or stale.
+    - HTTPException (400): If the body is not a JSON list of events.
+    """
+
+    body = await request.body()
+    if not verify_signature(request, body):
+        _events.labels("invalid_signature").inc()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid HubSpot signature")
+    try:
+        events = json.loads(body)
+    except ValueError:
+        events = None
+    if not isinstance(events, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Expected a list of events")
+
+    keyed = [(event, _object_key(event)) for event in events if isinstance(event, dict)]
+    ignored = len(events) - sum(1 for _, key in keyed if key)
+    keyed = [(event, key) for event, key in keyed if key]
+
+    accepted = [key for event, key in keyed if event.get("eventId") is None]
+    with_id = [(event, key) for event, key in keyed if event.get("eventId") is not None]
+    duplicates = 0
+    try:
+        if with_id:
+            async with async_redis_client.pipeline(transaction=False) as pipe:
+                for event, _ in with_id:
+                    pipe.set(f"hubspot_webhook_seen:{event['eventId']}", 1, nx=True, ex=WEBHOOK_DEDUPE_SECONDS)
+                fresh = await pipe.execute()
+            for (_, key), is_new in zip(with_id, fresh):
+                if is_new:
+                    accepted.append(key)
+                else:
+                    duplicates += 1
+        if accepted:
+            due = time.time() + WEBHOOK_COALESCE_SECONDS
+            # nx: a burst keeps the due time of its first event
+            await async_redis_client.zadd(WEBHOOK_PENDING_KEY, {key: due for key in accepted}, nx=True)
+    except RedisError as e:
+        # HubSpot retries non-2xx deliveries; an event marked seen but not
+        # queued is picked up by the reconciliation job instead
+        logger.warning("HubSpot webhook queueing failed: %s", e)
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Webhook queue unavailable")
+
+    _events.labels("accepted").inc(len(accepted))
+    _events.labels("duplicate").inc(duplicates)
+    _events.labels("ignored").inc(ignored)
+    return {"accepted": len(accepted), "duplicates": duplicates, "ignored": ignored}
+
+
+def _unlink(db, hubspot_type, row):
+    # the object was deleted (or merged away) in HubSpot
+    if hubspot_type == "contacts":
+        forget_contact_id(db, row["customer_email"], row["hubspot_contact_id"])
+        return
+    with db.cursor() as cursor:
+        cursor.execute(
+            "update ticket set hubspot_ticket_id = NULL, hubspot_sync_hash = NULL where ticket_id = %s",
+            (row["ticket_id"],)
+        )
+    db.commit()
+
+
+class WebhookWorker:
+    """
+    Background thread that applies coalesced HubSpot webhook events.
+
+    Due objects are claimed from a Redis sorted set, read from HubSpot
+    with one batch read per object type, and reconciled with their local
+    rows by hash (see `Reconciler`): HubSpot changes are pulled, echoes of
+    our own pushes are skipped, and conflicts are resolved by pushing
+    MySQL. Objects HubSpot no longer has are unlinked. Failed reads are
+    requeued; anything lost in a crash is picked up by the
+    reconciliation job.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """
+        Start the worker thread.
+        """
+
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hubspot-webhooks", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the worker thread after its current batch.
+        """
+
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=15)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                claimed = _claim_due(keys=[WEBHOOK_PENDING_KEY], args=[time.time(), WEBHOOK_BATCH_SIZE])
+                if claimed:
+                    self.apply(claimed)
+            except Exception:
+                logger.exception("HubSpot webhook worker failed")
+                claimed = []
+            if len(claimed) < WEBHOOK_BATCH_SIZE:
+                self._stop.wait(WEBHOOK_POLL_SECONDS)
+
+    def _requeue(self, keys):
+        try:
+            redis_cache_client.zadd(WEBHOOK_PENDING_KEY, {key: time.time() + WEBHOOK_RETRY_SECONDS for key in keys}, nx=True)
+        except RedisError as e:
+            logger.warning("Requeueing HubSpot webhook objects failed: %s", e)
+
+    def apply(self, keys):
+        """
+        Apply the current HubSpot state of the given objects locally.
+
+        Args:
+        - keys (list[str]): "<object type>:<HubSpot ID>" entries.
+        """
+
+        by_type = {}
+        for key in keys:
+            hubspot_type, _, hubspot_id = key.partition(":")
+            if hubspot_type in SPECS:
+                # changed in HubSpot: cached reads are stale
+                hubspot_read_cache.invalidate(hubspot_type, hubspot_id)
+                by_type.setdefault(hubspot_type, []).append(hubspot_id)
+
+        db = access_db()
+        with db:
+            for hubspot_type, ids in by_type.items():
+                spec = SPECS[hubspot_type]
+                reconciler = Reconciler(db, hubspot_type)
+                rows = reconciler.local_rows(ids)
+                if not rows:
+                    # objects we do not track locally
+                    _applied.labels(hubspot_type, "untracked").inc(len(ids))
+                    continue
+                results = batch_read(hubspot_type, list(rows), properties=list(spec.properties))
+                retry = []
+                for hubspot_id, row in rows.items():
+                    result = results[hubspot_id]
+                    if result.ok:
+                        reconciler.reconcile_object(row, (result.data or {}).get("properties") or {}, hubspot_id)
+                    elif result.status == 404:
+                        _unlink(db, hubspot_type, row)
+                        _applied.labels(hubspot_type, "unlinked").inc()
+                    else:
+                        retry.append(f"{hubspot_type}:{hubspot_id}")
+                if retry:
+                    self._requeue(retry)
+                    _applied.labels(hubspot_type, "retry").inc(len(retry))
+                report = reconciler.report
+                for outcome in ("in_sync", "pulled", "pushed", "conflicts", "errors"):
+                    if report[outcome]:
+                        _applied.labels(hubspot_type, outcome).inc(report[outcome])
+
+
+webhook_worker = WebhookWorker()
@@ -0,0 +1,298 @@
+import heapq
+import threading
+import time
+from database.database import access_db
+from Ticketing.events import subscribe
+
+# Load a ticket adds to its service person while it is not closed.
+PRIORITY_WEIGHT = {"High": 3, "Medium": 2, "Low": 1}
+ACTIVE_STATUSES = ("Open", "In_Progress")
+
+# Each worker process keeps its own heap; reseeding from MySQL picks up
+# assignments made by other workers.
+RESEED_INTERVAL_SECONDS = 300
+
+
+def ticket_load(state):
+    """
+    Return the load a ticket state contributes to its service person.
+
+    Args:
+    - state (dict | None): Ticket state with `service_person_emp_id`,
+      `priority` and `ticket_status`.
+
+    Returns:
+    - tuple: (service_person_emp_id, weight). weight is 0 for closed or
+      unassigned tickets.
+    """
+
+    if not state or not state.get("service_person_emp_id"):
+        return None, 0
+    if state.get("ticket_status") not in ACTIVE_STATUSES:
+        return state["service_person_emp_id"], 0
+    return state["service_person_emp_id"], PRIORITY_WEIGHT.get(state.get("priority"), PRIORITY_WEIGHT["Medium"])
+
+
+class AssignmentEngine:
+    """
+    Workload-aware ticket assignment for service persons.
+
+    Keeps a min-heap of (load, employee_id) where load is the priority
+    weighted sum of each service person's open tickets. The heap uses lazy
+    deletion: every load change pushes a fresh entry and stale entries are
+    discarded when they reach the top, so assignment and updates are
+    O(log n).
+
+    Weight reserved by `assign` for a ticket that is not committed yet is
+    also kept in `_pending` until the ticket's "created" event or
+    `release`, and re-applied on every reseed, since the database does not
+    show it yet.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # held across a reseed and the reservation that follows it
+        self._seed_lock = threading.Lock()
+        self._heap = []
+        self._load = {}
+        self._pending = {}
+        self._seeded_at = None
+
+    def seed(self, db):
+        """
+        Rebuild the heap from the `ticket` and `employee` tables.
+
+        Args:
+        - db: Database connection object.
+        """
+
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                select
+                    e.employee_id,
+                    coalesce(sum(case t.priority
+                        when 'High' then %s
+                        when 'Medium' then %s
+                        when 'Low' then %s
+                    end), 0) as workload
+                from employee e
+                join employee_type et on e.employee_type = et.employee_type_id
+                left join ticket t
+                    on t.service_person_emp_id = e.employee_id
+                    and t.ticket_status in ('Open', 'In_Progress')
+                where et.type_name = 'Service Person'
+                group by e.employee_id
+                """,
+                (PRIORITY_WEIGHT["High"], PRIORITY_WEIGHT["Medium"], PRIORITY_WEIGHT["Low"])
+            )
+            rows = cursor.fetchall()
+
+        with self._lock:
+            # a ticket committed after the query above and before its
+            # event is counted twice until the next reseed
+            self._load = {
+                row["employee_id"]: int(row["workload"]) + self._pending.get(row["employee_id"], 0)
+                for row in rows
+            }
+            self._heap = [(load, emp_id) for emp_id, load in self._load.items()]
+            heapq.heapify(self._heap)
+            self._seeded_at = time.monotonic()
+
+    def _ensure_seeded(self):
+        # callers hold self._seed_lock
+        if self._seeded_at is not None and time.monotonic() - self._seeded_at < RESEED_INTERVAL_SECONDS:
+            return
+        db = access_db()
+        with db:
+            self.seed(db)
+
+    def _settle(self, emp_id, weight):
+        # caller holds self._lock; the reservation is committed or undone
+        left = self._pending.get(emp_id, 0) - weight
+        if left > 0:
+            self._pending[emp_id] = left
+        else:
+            self._pending.pop(emp_id, None)
+
+    def _adjust(self, emp_id, delta):
+        # caller holds self._lock
+        if emp_id not in self._load or not delta:
+            return
+        self._load[emp_id] = max(self._load[emp_id] + delta, 0)
+        heapq.heappush(self._heap, (self._load[emp_id], emp_id))
+        if len(self._heap) > 2 * len(self._load) + 16:
+            self._heap = [(load, e) for e, load in self._load.items()]
+            heapq.heapify(self._heap)
+
+    def assign(self, priority):
+        """
+        Pick the least-loaded service person and reserve the ticket's weight.
+
+        Args:
+        - priority (str): Ticket priority ("Low", "Medium" or "High").
+
+        Returns:
+        - int | None: Employee ID of the chosen service person, or None if
+          there are no service persons.
+        """
+
+        weight = PRIORITY_WEIGHT.get(priority, PRIORITY_WEIGHT["Medium"])
+        with self._seed_lock:
+            self._ensure_seeded()
+            with self._lock:
+                while self._heap:
+                    load, emp_id = self._heap[0]
+                    if self._load.get(emp_id) != load:
+                        heapq.heappop(self._heap)
+                        continue
+                    heapq.heapreplace(self._heap, (load + weight, emp_id))
+                    self._load[emp_id] = load + weight
+                    self._pending[emp_id] = self._pending.get(emp_id, 0) + weight
+                    return emp_id
+                return None
+
+    def release(self, emp_id, priority):
+        """
+        Undo a reservation made by `assign` when the ticket was not created.
+
+        Args:
+        - emp_id (int | None): Employee ID returned by `assign`.
+        - priority (str): Priority passed to `assign`.
+        """
+
+        if emp_id is None:
+            return
+        weight = PRIORITY_WEIGHT.get(priority, PRIORITY_WEIGHT["Medium"])
+        with self._lock:
+            self._settle(emp_id, weight)
+            self._adjust(emp_id, -weight)
+
+    def add_service_person(self, emp_id):
+        """
+        Start assigning tickets to a newly registered service person.
+
+        Args:
+        - emp_id (int): Employee ID.
+        """
+
+        with self._lock:
+            if self._seeded_at is None or emp_id in self._load:
+                return
+            self._load[emp_id] = 0
+            heapq.heappush(self._heap, (0, emp_id))
+
+    def remove_service_person(self, emp_id):
+        """
+        Stop assigning tickets to a removed service person.
+
+        Args:
+        - emp_id (int): Employee ID.
+        """
+
+        with self._lock:
+            # heap entries become stale and are dropped on the next pop
+            self._load.pop(emp_id, None)
+
+    def on_ticket_event(self, event):
+        """
+        Apply a ticket lifecycle event to the in-memory workload.
+
+        Args:
+        - event (dict): Event published through `Ticketing.events.publish`.
+        """
+
+        if self._seeded_at is None or event["type"] not in ("created", "updated", "closed"):
+            return
+        if event["type"] == "created" and event.get("auto_assigned"):
+            # already reserved by assign(); now visible to a reseed
+            emp_id, weight = ticket_load(event.get("after"))
+            with self._lock:
+                self._settle(emp_id, weight)
+            return
+        old_emp, old_weight = ticket_load(event.get("before"))
+        new_emp, new_weight = ticket_load(event.get("after"))
+        with self._lock:
+            if old_emp == new_emp:
+                self._adjust(new_emp, new_weight - old_weight)
+            else:
+                self._adjust(old_emp, -old_weight)
+                self._adjust(new_emp, new_weight)
+
+    def workload(self):
+        """
+        Return the current load of every service person.
+
+        Returns:
+        - list[dict]: `emp_id` and `load`, least loaded first.
+        """
+
+        with self._seed_lock:
+            self._ensure_seeded()
+        with self._lock:
+            return [
+                {"emp_id": emp_id, "load": load}
+                for emp_id, load in sorted(self._load.items(), key=lambda item: (item[1], item[0]))
+            ]
+
+    def rebalance_suggestions(self, db):
+        """
+        Suggest moving not-yet-started tickets from overloaded service persons.
+
+        Repeatedly takes the most and least loaded service persons and
+        proposes moving the heaviest `Open` ticket of the former that still
+        narrows the gap, until no move improves the balance.
+
+        Args:
+        - db: Database connection object.
+
+        Returns:
+        - list[dict]: Suggested moves with `ticket_id`, `priority`,
+          `from_emp_id` and `to_emp_id`.
+        """
+
+        loads = {row["emp_id"]: row["load"] for row in self.workload()}
+        if len(loads) < 2:
+            return []
+
+        with db.cursor() as cursor:
+            cursor.execute(
+                """
+                select ticket_id, priority, service_person_emp_id
+                from ticket
+                where ticket_status = 'Open' and service_person_emp_id is not null
+                """
+            )
+            movable = {}
+            for row in cursor.fetchall():
+                if row["service_person_emp_id"] in loads:
+                    movable.setdefault(row["service_person_emp_id"], []).append(row)
+
+        for tickets in movable.values():
+            tickets.sort(key=lambda t: PRIORITY_WEIGHT[t["priority"]], reverse=True)
+
+        suggestions = []
+        while True:
+            src = max(loads, key=loads.get)
+            dst = min(loads, key=loads.get)
+            gap = loads[src] - loads[dst]
+            candidate = next(
+                (t for t in movable.get(src, []) if 0 < PRIORITY_WEIGHT[t["priority"]] < gap),
+                None
+            )
+            if candidate is None:
+                return suggestions
+            weight = PRIORITY_WEIGHT[candidate["priority"]]
+            movable[src].remove(candidate)
+            loads[src] -= weight
+            loads[dst] += weight
+            suggestions.append({
+                "ticket_id": candidate["ticket_id"],
+                "priority": candidate["priority"],
+                "from_emp_id": src,
+                "to_emp_id": dst,
+            })
+
+
+assignment_engine = AssignmentEngine()
+subscribe(assignment_engine.on_ticket_event)
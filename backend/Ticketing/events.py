@@ -0,0 +1,69 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+_listeners = []
+
+
+def subscribe(listener):
+    """
+    Register a listener for ticket lifecycle events.
+
+    Listeners are called synchronously, in registration order, with the
+    event dict passed to `publish`. Can be used as a decorator.
+
+    Args:
+    - listener (callable): Function accepting a single event dict.
+
+    Returns:
+    - callable: The listener, unchanged.
+    """
+
+    _listeners.append(listener)
+    return listener
+
+
+def publish(event):
+    """
+    Deliver a ticket lifecycle event to every subscribed listener.
+
+    Events are published by the ticket routes after the database
+    transaction has committed. A failing listener is logged and never
+    breaks the request that published the event.
+
+    Event format:
+    - type (str): "created", "updated" or "closed".
+    - ticket_id (int): Local ticket ID.
+    - before (dict | None): Previous `service_person_emp_id`, `priority`
+      and `ticket_status` of the ticket (None for "created").
+    - after (dict): Current values of the same fields.
+    - auto_assigned (bool, optional): True when the assignee was picked
+      by the assignment engine.
+
+    Args:
+    - event (dict): Event payload.
+    """
+
+    for listener in list(_listeners):
+        try:
+            listener(event)
+        except Exception:
+            logger.exception("Ticket event listener %r failed", listener)
+
+
+def ticket_state(ticket):
+    """
+    Extract the fields tracked by ticket lifecycle events from a ticket row.
+
+    Args:
+    - ticket (dict): Ticket record or dict with the same keys.
+
+    Returns:
+    - dict: `service_person_emp_id`, `priority` and `ticket_status`.
+    """
+
+    return {
+        "service_person_emp_id": ticket.get("service_person_emp_id"),
+        "priority": ticket.get("priority"),
+        "ticket_status": ticket.get("ticket_status"),
+    }
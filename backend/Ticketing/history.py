@@ -0,0 +1,172 @@
+import threading
+from cachetools import TTLCache
+from Ticketing.rollups import bump_volume_rollups
+
+METRICS_CACHE_SECONDS = 60
+
+# group_by values accepted by ticket_time_metrics -> column in `durations`
+METRIC_DIMENSIONS = {
+    "priority": "priority",
+    "employee": "service_person_emp_id",
+}
+
+_metrics_cache = TTLCache(maxsize=64, ttl=METRICS_CACHE_SECONDS)
+_metrics_lock = threading.Lock()
+
+
+def record_ticket_event(cursor, ticket_id, before, after, actor_emp_id=None):
+    """
+    Append a row to `ticket_event` for a ticket state change.
+
+    Must be called with the cursor of the transaction that performs the
+    change, before it commits, so the history can never disagree with the
+    ticket row. The hourly and daily volume rollups are updated in the
+    same transaction. Nothing is written when status, priority and
+    assignee are all unchanged.
+
+    Args:
+    - cursor: Cursor of the open transaction.
+    - ticket_id (int): Local ticket ID.
+    - before (dict | None): Previous `ticket_status`, `priority` and
+      `service_person_emp_id` (None when the ticket is being created).
+    - after (dict): New values of the same fields.
+    - actor_emp_id (int, optional): Employee that made the change.
+
+    Returns:
+    - bool: True if an event row was written.
+    """
+
+    before = before or {}
+    if before and all(before.get(k) == after.get(k) for k in ("ticket_status", "priority", "service_person_emp_id")):
+        return False
+
+    if not before:
+        event_type = "created"
+    elif before.get("ticket_status") != after.get("ticket_status"):
+        event_type = "status"
+    elif before.get("service_person_emp_id") != after.get("service_person_emp_id"):
+        event_type = "assignee"
+    else:
+        event_type = "priority"
+
+    cursor.execute(
+        """
+        insert into ticket_event (
+            ticket_id,
+            event_type,
+            old_ticket_status,
+            new_ticket_status,
+            old_priority,
+            new_priority,
+            old_service_person_emp_id,
+            new_service_person_emp_id,
+            actor_emp_id
+        ) values (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+        """,
+        (
+            ticket_id,
+            event_type,
+            before.get("ticket_status"),
+            after.get("ticket_status"),
+            before.get("priority"),
+            after.get("priority"),
+            before.get("service_person_emp_id"),
+            after.get("service_person_emp_id"),
+            actor_emp_id,
+        )
+    )
+
+    closed = after.get("ticket_status") == "Close" and before.get("ticket_status") != "Close"
+    if event_type == "created" or closed:
+        bump_volume_rollups(cursor, ticket_id, created=int(event_type == "created"), closed=int(closed))
+    return True
+
+
+def _query_time_metrics(db, column):
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            with milestones as (
+                select
+                    ticket_id,
+                    min(case when event_type = 'created' then event_datetime end) as created_at,
+                    min(case when old_ticket_status = 'Open' and new_ticket_status <> 'Open'
+                        then event_datetime end) as first_response_at,
+                    min(case when new_ticket_status = 'Close' then event_datetime end) as closed_at
+                from ticket_event
+                group by ticket_id
+            ),
+            durations as (
+                select
+                    t.priority,
+                    t.service_person_emp_id,
+                    'time_to_first_response' as metric,
+                    timestampdiff(second, coalesce(m.created_at, t.generate_datetime), m.first_response_at) as seconds
+                from ticket t
+                join milestones m on m.ticket_id = t.ticket_id
+                union all
+                select
+                    t.priority,
+                    t.service_person_emp_id,
+                    'time_to_close' as metric,
+                    timestampdiff(second, coalesce(m.created_at, t.generate_datetime), m.closed_at) as seconds
+                from ticket t
+                join milestones m on m.ticket_id = t.ticket_id
+            ),
+            ranked as (
+                select
+                    {column} as group_key,
+                    metric,
+                    seconds,
+                    row_number() over (partition by {column}, metric order by seconds) as rn,
+                    count(*) over (partition by {column}, metric) as samples
+                from durations
+                where seconds is not null
+            )
+            select
+                group_key,
+                metric,
+                max(samples) as samples,
+                max(case when rn = ceil(0.50 * samples) then seconds end) as p50_seconds,
+                max(case when rn = ceil(0.95 * samples) then seconds end) as p95_seconds
+            from ranked
+            group by group_key, metric
+            order by group_key, metric
+            """
+        )
+        return cursor.fetchall()
+
+
+def ticket_time_metrics(db, group_by="priority"):
+    """
+    Median and p95 time-to-first-response and time-to-close.
+
+    Durations are derived from `ticket_event` and ranked with SQL window
+    functions. Results are cached per `group_by` for
+    METRICS_CACHE_SECONDS, so dashboards polling the endpoint do not
+    re-aggregate the event table on every request.
+
+    Args:
+    - db: Database connection object.
+    - group_by (str): "priority" or "employee" (assigned service person).
+
+    Returns:
+    - list[dict]: One row per group and metric with `group_key`, `metric`,
+      `samples`, `p50_seconds` and `p95_seconds`.
+
+    Raises:
+    - ValueError: If `group_by` is not supported.
+    """
+
+    if group_by not in METRIC_DIMENSIONS:
+        raise ValueError(f"group_by must be one of {sorted(METRIC_DIMENSIONS)}")
+
+    with _metrics_lock:
+        cached = _metrics_cache.get(group_by)
+    if cached is not None:
+        return cached
+
+    rows = _query_time_metrics(db, METRIC_DIMENSIONS[group_by])
+    with _metrics_lock:
+        _metrics_cache[group_by] = rows
+    return rows
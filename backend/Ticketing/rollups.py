@@ -0,0 +1,99 @@
+from datetime import timedelta
+
+# granularity -> (rollup table, bucket expression)
+ROLLUP_TABLES = {
+    "hour": ("ticket_volume_hourly", "date_format({ts}, '%%Y-%%m-%%d %%H:00:00')"),
+    "day": ("ticket_volume_daily", "date({ts})"),
+}
+
+ROLLUP_GROUPS = {
+    "none": "'all'",
+    "priority": "priority",
+    "issue_type": "issue_type",
+}
+
+# hourly buckets are kept for long ranges but a single query is capped
+MAX_HOURLY_RANGE = timedelta(days=93)
+
+DEFAULT_RANGE = timedelta(days=30)
+
+
+def bump_volume_rollups(cursor, ticket_id, created=0, closed=0):
+    """
+    Incrementally update the hourly and daily ticket volume rollups.
+
+    Runs inside the transaction that records the ticket event. Created
+    tickets are bucketed by `generate_datetime`, closed tickets by the
+    time of the close.
+
+    Args:
+    - cursor: Cursor of the open transaction.
+    - ticket_id (int): Local ticket ID.
+    - created (int): 1 if the ticket was created.
+    - closed (int): 1 if the ticket was closed.
+    """
+
+    for column, ts, count in (("created_count", "generate_datetime", created), ("closed_count", "now()", closed)):
+        if not count:
+            continue
+        for table, bucket in ROLLUP_TABLES.values():
+            cursor.execute(
+                f"""
+                insert into {table} (bucket_start, priority, issue_type, {column})
+                select {bucket.format(ts=ts)}, priority, issue_type, %s
+                from ticket
+                where ticket_id = %s
+                on duplicate key update {column} = {column} + %s
+                """,
+                (count, ticket_id, count)
+            )
+
+
+def ticket_volume_timeseries(db, start, end, granularity="day", group_by="none"):
+    """
+    Read created/closed ticket counts per time bucket from the rollups.
+
+    Args:
+    - db: Database connection object.
+    - start (datetime): Inclusive range start.
+    - end (datetime): Exclusive range end.
+    - granularity (str): "hour" or "day".
+    - group_by (str): "none", "priority" or "issue_type".
+
+    Returns:
+    - list[dict]: `bucket_start`, `group_key`, `created` and `closed`,
+      ordered by bucket. Buckets without tickets are omitted.
+
+    Raises:
+    - ValueError: On an unsupported granularity or group_by, or an
+      invalid range.
+    """
+
+    if granularity not in ROLLUP_TABLES:
+        raise ValueError(f"granularity must be one of {sorted(ROLLUP_TABLES)}")
+    if group_by not in ROLLUP_GROUPS:
+        raise ValueError(f"group_by must be one of {sorted(ROLLUP_GROUPS)}")
+    if end <= start:
+        raise ValueError("end must be after start")
+    if granularity == "hour" and end - start > MAX_HOURLY_RANGE:
+        raise ValueError(f"hourly range is limited to {MAX_HOURLY_RANGE.days} days")
+
+    table = ROLLUP_TABLES[granularity][0]
+    group = ROLLUP_GROUPS[group_by]
+    with db.cursor() as cursor:
+        cursor.execute(
+            f"""
+            select
+                bucket_start,
+                {group} as group_key,
+                sum(created_count) as created,
+                sum(closed_count) as closed
+            from {table}
+            where bucket_start >= %s and bucket_start < %s
+            group by bucket_start, group_key
+            order by bucket_start, group_key
+            """,
+            (start, end)
+        )
+        return cursor.fetchall()
+
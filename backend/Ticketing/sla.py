@@ -0,0 +1,403 @@
+import heapq
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from database.database import access_db
+from Ticketing.events import subscribe, publish, ticket_state
+from Ticketing.history import record_ticket_event
+
+logger = logging.getLogger(__name__)
+
+# response: how long a ticket may stay "Open"
+# resolution: how long until it must be "Close", counted from creation
+SLA_POLICIES = {
+    "High": {"response": timedelta(hours=1), "resolution": timedelta(hours=8)},
+    "Medium": {"response": timedelta(hours=4), "resolution": timedelta(hours=24)},
+    "Low": {"response": timedelta(hours=8), "resolution": timedelta(hours=72)},
+}
+
+ESCALATED_PRIORITY = {"Low": "Medium", "Medium": "High"}
+
+# sender_id stored on ticket_message rows written by the system
+SYSTEM_SENDER_ID = 0
+
+
+def sla_due(created_at, priority, kind):
+    """
+    Return when a ticket breaches its SLA.
+
+    Args:
+    - created_at (datetime): Ticket `generate_datetime`.
+    - priority (str): Ticket priority.
+    - kind (str): "response" or "resolution".
+
+    Returns:
+    - datetime: Due time of the SLA.
+    """
+
+    return created_at + SLA_POLICIES.get(priority, SLA_POLICIES["Medium"])[kind]
+
+
+class SlaScheduler:
+    """
+    Keeps SLA due-times of active tickets in a priority queue.
+
+    The ticket table is scanned once at start-up; afterwards the queue is
+    maintained from ticket lifecycle events, so the scheduler only wakes
+    up when the earliest deadline is reached. Every ticket carries a
+    version that is bumped on each change, which invalidates queued
+    deadlines computed from older state.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._tickets = {}
+        self._inbox = deque()
+        self._thread = None
+        self._stopped = False
+
+    def start(self):
+        """
+        Seed the queue from the database and start the scheduler thread.
+        """
+
+        if self._thread:
+            return
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="sla-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop the scheduler thread.
+        """
+
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def on_ticket_event(self, event):
+        """
+        Queue a ticket lifecycle event for the scheduler thread.
+
+        Args:
+        - event (dict): Event published through `Ticketing.events.publish`.
+        """
+
+        if event["type"] not in ("created", "updated", "closed"):
+            return
+        with self._cond:
+            self._inbox.append(event)
+            self._cond.notify()
+
+    def _track(self, ticket):
+        # caller holds self._cond
+        ticket_id = ticket["ticket_id"]
+        previous = self._tickets.get(ticket_id)
+        version = previous["version"] + 1 if previous else 0
+        if ticket["ticket_status"] not in ("Open", "In_Progress"):
+            self._tickets.pop(ticket_id, None)
+            return
+        entry = {
+            "version": version,
+            "created_at": ticket["generate_datetime"],
+            "priority": ticket["priority"],
+            "ticket_status": ticket["ticket_status"],
+            "escalated": previous["escalated"] if previous else set(),
+        }
+        self._tickets[ticket_id] = entry
+        kinds = ["resolution"]
+        if ticket["ticket_status"] == "Open":
+            kinds.append("response")
+        for kind in kinds:
+            if kind in entry["escalated"]:
+                # one escalation per SLA; the bumped priority must not
+                # immediately breach again against its tighter policy
+                continue
+            due = sla_due(entry["created_at"], entry["priority"], kind)
+            heapq.heappush(self._heap, (due, ticket_id, kind, version))
+
+    def _seed(self):
+        db = access_db()
+        with db:
+            with db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    select ticket_id, priority, ticket_status, generate_datetime
+                    from ticket
+                    where ticket_status in ('Open', 'In_Progress')
+                    """
+                )
+                rows = cursor.fetchall()
+        with self._cond:
+            for row in rows:
+                self._track(row)
+
+    def _apply_event(self, event):
+        ticket_id = event["ticket_id"]
+        with self._cond:
+            known = self._tickets.get(ticket_id)
+        if known:
+            ticket = dict(event["after"], ticket_id=ticket_id, generate_datetime=known["created_at"])
+        else:
+            db = access_db()
+            with db:
+                with db.cursor() as cursor:
+                    cursor.execute(
+                        "select ticket_id, priority, ticket_status, generate_datetime from ticket where ticket_id = %s",
+                        (ticket_id,)
+                    )
+                    ticket = cursor.fetchone()
+            if not ticket:
+                return
+        with self._cond:
+            self._track(ticket)
+
+    def _next_due(self):
+        # caller holds self._cond; drops stale deadlines
+        while self._heap:
+            due, ticket_id, kind, version = self._heap[0]
+            entry = self._tickets.get(ticket_id)
+            if entry and entry["version"] == version:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                self._seed()
+                break
+            except Exception:
+                logger.exception("SLA scheduler seeding failed, retrying")
+                time.sleep(30)
+
+        while True:
+            with self._cond:
+                while not self._stopped and not self._inbox:
+                    head = self._next_due()
+                    if head:
+                        wait = (head[0] - datetime.now()).total_seconds()
+                        if wait <= 0:
+                            break
+                        self._cond.wait(timeout=min(wait, 60))
+                    else:
+                        self._cond.wait(timeout=60)
+                if self._stopped:
+                    return
+                events = list(self._inbox)
+                self._inbox.clear()
+                due_now = []
+                if not events:
+                    head = self._next_due()
+                    if head and head[0] <= datetime.now():
+                        due_now.append(heapq.heappop(self._heap))
+
+            for event in events:
+                try:
+                    self._apply_event(event)
+                except Exception:
+                    logger.exception("SLA scheduler failed to apply %r", event)
+            for due, ticket_id, kind, version in due_now:
+                try:
+                    self._escalate(ticket_id, kind, due)
+                except Exception:
+                    logger.exception("SLA escalation failed for ticket %s", ticket_id)
+
+    def _escalate(self, ticket_id, kind, due):
+        """
+        Escalate a ticket that breached its SLA.
+
+        The ticket is re-read to confirm it is still in breach and a row is
+        claimed in `ticket_sla_escalation`, so each SLA escalates at most
+        once even across restarts and workers. Then its priority is
+        bumped one level (Low -> Medium -> High) and a System message is
+        added to its conversation so agents see it in `/agent_tickets`.
+        An "sla_breached" event is published for other listeners.
+        """
+
+        db = access_db()
+        with db:
+            with db.cursor() as cursor:
+                cursor.execute("select * from ticket where ticket_id = %s for update", (ticket_id,))
+                ticket = cursor.fetchone()
+                if not ticket:
+                    return
+                still_breached = (
+                    ticket["ticket_status"] == "Open" if kind == "response"
+                    else ticket["ticket_status"] in ("Open", "In_Progress")
+                )
+                if not still_breached:
+                    db.rollback()
+                    return
+
+                # once per ticket and SLA, across restarts and workers
+                cursor.execute(
+                    "insert ignore into ticket_sla_escalation (ticket_id, sla_kind, due_datetime) values (%s, %s, %s)",
+                    (ticket_id, kind, due)
+                )
+                if not cursor.rowcount:
+                    db.rollback()
+                    with self._cond:
+                        entry = self._tickets.get(ticket_id)
+                        if entry:
+                            entry["escalated"].add(kind)
+                    return
+
+                new_priority = ESCALATED_PRIORITY.get(ticket["priority"], ticket["priority"])
+                if new_priority != ticket["priority"]:
+                    cursor.execute(
+                        "update ticket set priority = %s where ticket_id = %s",
+                        (new_priority, ticket_id)
+                    )
+                    record_ticket_event(
+                        cursor,
+                        ticket_id,
+                        ticket_state(ticket),
+                        dict(ticket_state(ticket), priority=new_priority)
+                    )
+                label = "first response" if kind == "response" else "resolution"
+                cursor.execute(
+                    """
+                    INSERT INTO ticket_message
+                    (ticket_id, sender_role, sender_id, message)
+                    VALUES (%s, 'System', %s, %s)
+                    """,
+                    (
+                        ticket_id,
+                        SYSTEM_SENDER_ID,
+                        f"SLA breached: {label} for {ticket['priority']} priority was due at "
+                        f"{due:%Y-%m-%d %H:%M}. Priority is now {new_priority}."
+                    )
+                )
+                db.commit()
+
+        with self._cond:
+            entry = self._tickets.get(ticket_id)
+            if entry:
+                entry["escalated"].add(kind)
+
+        updated = dict(ticket, priority=new_priority)
+        publish({
+            "type": "sla_breached",
+            "ticket_id": ticket_id,
+            "kind": kind,
+            "due": due,
+            "before": ticket_state(ticket),
+            "after": ticket_state(updated),
+        })
+        if new_priority != ticket["priority"]:
+            publish({
+                "type": "updated",
+                "ticket_id": ticket_id,
+                "before": ticket_state(ticket),
+                "after": ticket_state(updated),
+            })
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+    - values (list[float]): Sample values.
+    - pct (float): Percentile between 0 and 100.
+
+    Returns:
+    - float | None: The percentile, or None for an empty sample.
+    """
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(int(-(-pct * len(ordered) // 100)), 1)
+    return ordered[rank - 1]
+
+
+def sla_breach_report(db, since=None):
+    """
+    Compute SLA compliance per priority from the `ticket_event` history.
+
+    First response is the first transition out of "Open"; resolution is
+    the first transition to "Close". Tickets still waiting count as
+    breached once their SLA due time has passed.
+
+    Args:
+    - db: Database connection object.
+    - since (datetime, optional): Only tickets generated at or after this time.
+
+    Returns:
+    - dict: Per priority, ticket count, breach counts and p50/p90/p95/p99
+      minutes for first response and resolution.
+    """
+
+    since = since or datetime(1970, 1, 1)
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            select
+                t.ticket_id,
+                t.priority,
+                t.generate_datetime,
+                m.first_response_datetime,
+                m.resolution_datetime
+            from ticket t
+            left join (
+                select
+                    ticket_id,
+                    min(case when old_ticket_status = 'Open' and new_ticket_status <> 'Open'
+                        then event_datetime end) as first_response_datetime,
+                    min(case when new_ticket_status = 'Close'
+                        then event_datetime end) as resolution_datetime
+                from ticket_event
+                -- a ticket's events are no older than the ticket, so the
+                -- same bound keeps the aggregate to the reported tickets
+                where event_datetime >= %s
+                group by ticket_id
+            ) m on m.ticket_id = t.ticket_id
+            where t.generate_datetime >= %s
+            """,
+            (since, since)
+        )
+        rows = cursor.fetchall()
+
+    now = datetime.now()
+    report = {}
+    for priority in SLA_POLICIES:
+        report[priority] = {
+            "tickets": 0,
+            "response_breaches": 0,
+            "resolution_breaches": 0,
+            "_response": [],
+            "_resolution": [],
+        }
+
+    for row in rows:
+        bucket = report.get(row["priority"])
+        if bucket is None or row["generate_datetime"] is None:
+            continue
+        bucket["tickets"] += 1
+        for kind, done_at in (("response", row["first_response_datetime"]), ("resolution", row["resolution_datetime"])):
+            due = sla_due(row["generate_datetime"], row["priority"], kind)
+            if done_at is not None:
+                bucket[f"_{kind}"].append((done_at - row["generate_datetime"]).total_seconds() / 60)
+            if (done_at or now) > due:
+                bucket[f"{kind}_breaches"] += 1
+
+    for bucket in report.values():
+        for kind in ("response", "resolution"):
+            minutes = bucket.pop(f"_{kind}")
+            bucket[f"{kind}_minutes"] = {
+                f"p{pct}": percentile(minutes, pct) for pct in (50, 90, 95, 99)
+            }
+    return report
+
+
+sla_scheduler = SlaScheduler()
+subscribe(sla_scheduler.on_ticket_event)
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of per-request authorization overhead.
+
+Compares the old pattern (full HS256 decode in every role dependency)
+with `require()` policies backed by the verified-token cache and
+`request.state`. Redis is not contacted: the session cache is warmed
+first, which is the steady state for a logged-in user.
+
+Run from the backend directory:
+    python -m benchmarks.bench_auth
+"""
+import asyncio
+import timeit
+from types import SimpleNamespace
+from jose import jwt
+from Authentication.auth import create_access_token, SECRET_KEY, ALGORITHM
+from Authentication.dependencies import require
+from Authentication.token_cache import session_cache
+
+N = 20000
+
+
+def fake_request():
+    return SimpleNamespace(state=SimpleNamespace())
+
+
+def main():
+    token = create_access_token({"emp_id": 1, "role": "Admin"})
+    credentials = SimpleNamespace(credentials=token)
+    session_cache.put(token, jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM]))
+
+    admin_policy = require(roles={"Admin"})
+    staff_policy = require(roles={"Admin", "Agent"})
+    loop = asyncio.new_event_loop()
+
+    def legacy(n):
+        # old get_current_user + role dependency: two decodes per request
+        for _ in range(n):
+            jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            payload["role"] in ["Admin", "Agent"]
+
+    async def one_policy(n):
+        for _ in range(n):
+            await admin_policy(fake_request(), credentials)
+
+    async def two_policies(n):
+        for _ in range(n):
+            request = fake_request()
+            await admin_policy(request, credentials)
+            await staff_policy(request, credentials)
+
+    runs = (
+        ("legacy double decode", lambda: legacy(N)),
+        ("require() x1", lambda: loop.run_until_complete(one_policy(N))),
+        ("require() x2 same request", lambda: loop.run_until_complete(two_policies(N))),
+    )
+    for name, fn in runs:
+        seconds = timeit.timeit(fn, number=1)
+        print(f"{name:28s} {seconds / N * 1e6:8.2f} us/request")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the customer session check.
+
+Compares the old customer policy (a full `jwt.decode` per request,
+signature and expiry only) with the session-checked policy. The steady state is measured with warm caches
+over a pool of distinct customer tokens, as seen by the customer portal.
+If Redis is reachable, the cold path (one EXISTS per cache miss) is
+measured as well.
+
+Run from the backend directory:
+    python -m benchmarks.bench_customer_sessions
+"""
+import asyncio
+import timeit
+from types import SimpleNamespace
+from jose import jwt
+from Authentication.auth import create_access_token, SECRET_KEY, ALGORITHM
+from Authentication.dependencies import require
+from Authentication.session_store import create_session, revoke_sessions
+from Authentication.token_cache import session_cache, claims_cache, decode_token
+
+N = 20000
+CUSTOMERS = 2000
+
+
+def fake_request():
+    return SimpleNamespace(state=SimpleNamespace())
+
+
+async def signature_only(request, credentials):
+    # the old customer_required: no claims cache, no session lookup
+    payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
+    if payload.get("role") != "Customer":
+        raise PermissionError("Customer only")
+    return payload
+
+
+async def store_sessions(tokens):
+    await asyncio.gather(*(create_session(t, i, scope="customer") for i, t in enumerate(tokens)))
+
+
+async def run(policy, credentials, n):
+    for i in range(n):
+        await policy(fake_request(), credentials[i % len(credentials)])
+
+
+def main():
+    tokens = [create_access_token({"emp_id": i, "role": "Customer"}) for i in range(CUSTOMERS)]
+    credentials = [SimpleNamespace(credentials=token) for token in tokens]
+    for token in tokens:
+        session_cache.put(token, decode_token(token))
+
+    session_checked = require(roles={"Customer"})
+    loop = asyncio.new_event_loop()
+
+    runs = [
+        ("signature only (old)", lambda: loop.run_until_complete(run(signature_only, credentials, N))),
+        ("session checked, warm", lambda: loop.run_until_complete(run(session_checked, credentials, N))),
+    ]
+    for name, fn in runs:
+        seconds = timeit.timeit(fn, number=1)
+        print(f"{name:28s} {seconds / N * 1e6:8.2f} us/request")
+
+    try:
+        loop.run_until_complete(store_sessions(tokens))
+    except Exception as e:
+        print(f"{'session checked, cold':28s} skipped (Redis unavailable: {e})")
+    else:
+        session_cache.clear()
+        claims_cache.clear()
+        seconds = timeit.timeit(lambda: loop.run_until_complete(run(session_checked, credentials, CUSTOMERS)), number=1)
+        print(f"{'session checked, cold':28s} {seconds / CUSTOMERS * 1e6:8.2f} us/request")
+        loop.run_until_complete(revoke_sessions(tokens))
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Load benchmark of the HubSpot outbox delivery against the local simulator.
+
+Drives the outbox's own delivery code, with HubSpot replaced by the
+simulator and MySQL by the in-memory tables of `Hubspot.simulator_db`:
+
+- ticket creates: `_create_ticket_async` (which resolves the contact with
+  `async_resolve_contact_id`) for tickets of customers whose contacts
+  exist in HubSpot but are not linked locally yet, run concurrently with
+  an `AsyncHubSpotClient` under the outbox delivery deadline;
+- contact syncs: the claimed `contact.sync` entries of every customer
+  delivered with `OutboxWorkerPool._deliver_contact_batch` (batch read by
+  email, batch create for misses, batch update for hits).
+
+Each runs once against a healthy simulated HubSpot and once against a
+degraded one (slow, 5xx, random 429s); throughput, delivery latency and
+the responses HubSpot returned are reported. Nothing leaves the machine.
+The contact ID cache uses Redis when it is reachable and misses
+otherwise.
+
+Run from the backend directory:
+    python -m benchmarks.bench_hubspot
+"""
+import asyncio
+import logging
+import time
+import requests
+from Hubspot.client import HubSpotClient
+from Hubspot.async_client import AsyncHubSpotClient
+from Hubspot.scheduler import RateLimitScheduler
+from Hubspot.simulator import SimulatorServer, SimulatorConfig
+from Hubspot.simulator_db import MemoryDatabase
+from Hubspot.outbox import (
+    OutboxWorkerPool, enqueue, _create_ticket_async,
+    HUBSPOT_OUTBOX_CONCURRENCY, OUTBOX_DELIVERY_SECONDS
+)
+
+TICKETS = 200
+CUSTOMERS = 200
+# concurrent ticket deliveries, as in one outbox worker
+CONCURRENCY = HUBSPOT_OUTBOX_CONCURRENCY
+# the simulator's limits, shared by the client-side scheduler
+REQUESTS_PER_10S = 1000
+SEARCH_PER_SECOND = 50
+
+SCENARIOS = (
+    ("healthy", SimulatorConfig(latency_ms=50)),
+    ("degraded", SimulatorConfig(latency_ms=150, latency_sigma=0.8, error_rate=0.05, rate_limit_rate=0.02)),
+)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else 0.0
+
+
+def seed(database, store, name):
+    # every other customer already has a HubSpot contact we have not linked
+    for n in range(CUSTOMERS):
+        email = f"{name}-customer{n}@example.com"
+        database.add_customer(n + 1, email, customer_name=f"Customer {n}")
+        if n % 2 == 0:
+            store.create("contacts", {"email": email})
+    for n in range(TICKETS):
+        # tickets of the customers HubSpot knows, so creates can associate
+        customer_id = (n * 2) % CUSTOMERS + 1
+        database.add_ticket(n + 1, customer_id, issue_title=f"Ticket {n}", issue_description="Benchmark")
+
+
+async def create_tickets(database, client):
+    slots = asyncio.Semaphore(CONCURRENCY)
+    latencies = []
+    failures = 0
+
+    async def deliver(ticket_id):
+        nonlocal failures
+        async with slots:
+            db = database.connect()
+            start = time.perf_counter()
+            try:
+                with client.deadline(OUTBOX_DELIVERY_SECONDS):
+                    await _create_ticket_async(db, ticket_id, {}, client)
+            except Exception:
+                failures += 1
+                return
+            finally:
+                db.close()
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(deliver(ticket_id) for ticket_id in database.tickets))
+    return latencies, failures
+
+
+def sync_contacts(database, pool):
+    db = database.connect()
+    with db.cursor() as cursor:
+        for customer_id in database.customers:
+            enqueue(cursor, "contact", customer_id, "contact.sync")
+    claimed = 0
+    # one claim per HubSpot batch; failed entries wait for their retry
+    while entries := pool._claim(db):
+        claimed += len(entries)
+        pool._deliver_batch(db, "_deliver_contact_batch", entries)
+    return sum(1 for e in database.outbox.values() if e["status"] == "done"), claimed
+
+
+def responses(sim):
+    counts = {}
+    for endpoint, by_code in requests.get(f"{sim.base_url}/_simulator/stats").json().items():
+        for code, count in by_code.items():
+            counts[f"{endpoint} {code}"] = counts.get(f"{endpoint} {code}", 0) + count
+    return counts
+
+
+def run(name, config):
+    config.requests_per_10s = REQUESTS_PER_10S
+    config.search_per_second = SEARCH_PER_SECOND
+    with SimulatorServer(config) as sim:
+        database = MemoryDatabase()
+        seed(database, sim.app.state.store, name)
+        scheduler = RateLimitScheduler(
+            per_10s=REQUESTS_PER_10S, search_per_second=SEARCH_PER_SECOND, max_concurrency=CONCURRENCY
+        )
+        client = AsyncHubSpotClient(base_url=sim.base_url, token="local", scheduler=scheduler, concurrency=CONCURRENCY)
+
+        async def tickets():
+            try:
+                return await create_tickets(database, client)
+            finally:
+                await client.aclose()
+
+        start = time.perf_counter()
+        latencies, failures = asyncio.run(tickets())
+        ticket_elapsed = time.perf_counter() - start
+        ticket_responses = responses(sim)
+        sim.app.state.stats.clear()
+
+        pool = OutboxWorkerPool(workers=1, client=HubSpotClient(base_url=sim.base_url, token="local", scheduler=scheduler))
+        start = time.perf_counter()
+        synced, claimed = sync_contacts(database, pool)
+        contact_elapsed = time.perf_counter() - start
+        contact_responses = responses(sim)
+
+    linked = sum(1 for t in database.tickets.values() if t["hubspot_ticket_id"])
+    print(f"\n{name}: {TICKETS} ticket creates ({CONCURRENCY} concurrent), {CUSTOMERS} contact syncs")
+    print(f"tickets  linked {linked}  failed {failures}  throughput {len(latencies) / ticket_elapsed:6.1f} tickets/s")
+    print(f"         delivery latency p50 {percentile(latencies, 50) * 1000:7.1f} ms  p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+    print(f"         HubSpot responses {dict(sorted(ticket_responses.items()))}")
+    print(f"contacts synced {synced}/{claimed} in {contact_elapsed * 1000:7.1f} ms")
+    print(f"         HubSpot responses {dict(sorted(contact_responses.items()))}")
+
+
+def main():
+    # the contact ID and read caches log every failed Redis call
+    for cache in ("Hubspot.contact_map", "Hubspot.read_cache"):
+        logging.getLogger(cache).setLevel(logging.ERROR)
+    for name, config in SCENARIOS:
+        run(name, config)
+
+
+if __name__ == "__main__":
+    main()
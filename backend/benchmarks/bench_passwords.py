@@ -0,0 +1,96 @@
+"""
+Benchmark of password hashing cost and login behaviour under a burst.
+
+Prints the cost of one argon2id hash for a few time_cost values (to
+calibrate PASSWORD_HASH_TIME_COST to ~50 ms), then fires a
+credential-stuffing burst of concurrent verifications at the bounded
+password executor and reports accepted-call latency, throughput, shed
+calls and the worst event-loop stall.
+
+Run from the backend directory:
+    python -m benchmarks.bench_passwords
+"""
+import asyncio
+import time
+from argon2 import PasswordHasher
+from Authentication.passwords import (
+    PasswordHasherBusy,
+    verify_password,
+    password_hasher,
+    PASSWORD_HASH_MEMORY_KIB,
+    PASSWORD_HASH_PARALLELISM,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_QUEUE_LIMIT,
+)
+
+BURST = 500
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(round(p / 100 * len(samples) + 0.5)) - 1)]
+
+
+def calibrate():
+    for time_cost in (1, 2, 3, 4):
+        hasher = PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=PASSWORD_HASH_MEMORY_KIB,
+            parallelism=PASSWORD_HASH_PARALLELISM,
+        )
+        start = time.perf_counter()
+        for _ in range(5):
+            hasher.hash("correct horse battery staple")
+        print(f"time_cost={time_cost} memory={PASSWORD_HASH_MEMORY_KIB} KiB: "
+              f"{(time.perf_counter() - start) / 5 * 1000:7.1f} ms/hash")
+
+
+async def loop_lag(stop):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - start - 0.001)
+    return worst
+
+
+async def burst():
+    stored = password_hasher.hash("correct horse battery staple")
+    latencies = []
+    shed = 0
+
+    async def attempt():
+        nonlocal shed
+        start = time.perf_counter()
+        try:
+            await verify_password(stored, "wrong password")
+        except PasswordHasherBusy:
+            shed += 1
+            return
+        latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    # arrivals spread over ~1 s rather than all in the same instant
+    tasks = []
+    for _ in range(BURST):
+        tasks.append(asyncio.create_task(attempt()))
+        await asyncio.sleep(1 / BURST)
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    stop.set()
+
+    print(f"\nburst of {BURST} logins, {PASSWORD_HASH_WORKERS} workers, queue limit {PASSWORD_HASH_QUEUE_LIMIT}")
+    print(f"accepted {len(latencies)}  shed {shed}  throughput {len(latencies) / elapsed:6.1f}/s")
+    print(f"latency p50 {percentile(latencies, 50) * 1000:7.1f} ms  p99 {percentile(latencies, 99) * 1000:7.1f} ms")
+    print(f"worst event loop stall {await lag * 1000:7.1f} ms")
+
+
+def main():
+    calibrate()
+    asyncio.run(burst())
+
+
+if __name__ == "__main__":
+    main()
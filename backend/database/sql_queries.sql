@@ -373,3 +373,117 @@ CREATE TABLE ticket_message (
     FOREIGN KEY (ticket_id) REFERENCES ticket(ticket_id)
 );
 
+
+-- Work-queue claim (/tickets/claim_next): the unassigned and the caller's
+-- queue are looked up separately, each an equality on (ticket_status,
+-- service_person_emp_id), so the index returns rows in priority,
+-- generate_datetime order and SKIP LOCKED scans stay short.
+CREATE INDEX idx_ticket_claim
+    ON ticket (ticket_status, service_person_emp_id, priority, generate_datetime);
+
+-- SLA escalations already performed (one row per ticket and SLA kind)
+CREATE TABLE ticket_sla_escalation (
+    ticket_id INT NOT NULL,
+    sla_kind ENUM('response','resolution') NOT NULL,
+    due_datetime DATETIME NOT NULL,
+    escalated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (ticket_id, sla_kind),
+    FOREIGN KEY (ticket_id) REFERENCES ticket(ticket_id)
+);
+
+-- Append-only ticket history, written in the same transaction as each
+-- status, priority or assignee change (see Ticketing/history.py).
+CREATE TABLE ticket_event (
+    ticket_event_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    ticket_id INT NOT NULL,
+    event_type ENUM('created','status','priority','assignee') NOT NULL,
+    old_ticket_status ENUM('Open','In_Progress','Close'),
+    new_ticket_status ENUM('Open','In_Progress','Close') NOT NULL,
+    old_priority ENUM('High','Medium','Low'),
+    new_priority ENUM('High','Medium','Low') NOT NULL,
+    old_service_person_emp_id INT,
+    new_service_person_emp_id INT,
+    actor_emp_id INT,
+    event_datetime DATETIME(3) DEFAULT CURRENT_TIMESTAMP(3),
+
+    KEY idx_ticket_event_ticket (ticket_id, event_datetime),
+    FOREIGN KEY (ticket_id) REFERENCES ticket(ticket_id)
+);
+
+-- Pre-aggregated ticket volume for /stats/timeseries, maintained
+-- incrementally by Ticketing/rollups.py.
+CREATE TABLE ticket_volume_hourly (
+    bucket_start DATETIME NOT NULL,
+    priority ENUM('High','Medium','Low') NOT NULL,
+    issue_type VARCHAR(20) NOT NULL,
+    created_count INT NOT NULL DEFAULT 0,
+    closed_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, priority, issue_type)
+);
+
+CREATE TABLE ticket_volume_daily (
+    bucket_start DATE NOT NULL,
+    priority ENUM('High','Medium','Low') NOT NULL,
+    issue_type VARCHAR(20) NOT NULL,
+    created_count INT NOT NULL DEFAULT 0,
+    closed_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket_start, priority, issue_type)
+);
+
+-- One-off backfill of the rollups from existing tickets
+INSERT INTO ticket_volume_hourly (bucket_start, priority, issue_type, created_count, closed_count)
+SELECT bucket_start, priority, issue_type, SUM(created_count), SUM(closed_count)
+FROM (
+    SELECT DATE_FORMAT(generate_datetime, '%Y-%m-%d %H:00:00') AS bucket_start, priority, issue_type,
+           1 AS created_count, 0 AS closed_count
+    FROM ticket
+    UNION ALL
+    SELECT DATE_FORMAT(solve_datetime, '%Y-%m-%d %H:00:00'), priority, issue_type, 0, 1
+    FROM ticket
+    WHERE solve_datetime IS NOT NULL
+) v
+GROUP BY bucket_start, priority, issue_type;
+
+INSERT INTO ticket_volume_daily (bucket_start, priority, issue_type, created_count, closed_count)
+SELECT DATE(bucket_start), priority, issue_type, SUM(created_count), SUM(closed_count)
+FROM ticket_volume_hourly
+GROUP BY DATE(bucket_start), priority, issue_type;
+
+-- Transactional outbox for HubSpot sync (see Hubspot/outbox.py). Rows are
+-- inserted in the same transaction as the local change and delivered by
+-- background workers, in order per object.
+CREATE TABLE hubspot_outbox (
+    outbox_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    object_type ENUM('contact','ticket') NOT NULL,
+    object_id INT NOT NULL,
+    operation VARCHAR(30) NOT NULL,
+    payload JSON,
+    status ENUM('pending','processing','done','dead') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    locked_until DATETIME(3),
+    last_error VARCHAR(500),
+    created_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    processed_at DATETIME(3),
+
+    KEY idx_outbox_due (status, next_attempt_at),
+    KEY idx_outbox_object (object_type, object_id, status, outbox_id)
+);
+
+-- xxh3 hash of the HubSpot properties last synced for each row (see
+-- Hubspot/change_detection.py); syncs with an unchanged hash are skipped.
+ALTER TABLE customer
+ADD COLUMN hubspot_sync_hash CHAR(16);
+ALTER TABLE ticket
+ADD COLUMN hubspot_sync_hash CHAR(16);
+
+-- Resume position of the HubSpot reconciliation job per object type (see
+-- Hubspot/reconcile.py): HubSpot last-modified watermark, search paging
+-- cursor, and last local primary key checked.
+CREATE TABLE hubspot_reconcile_state (
+    object_type VARCHAR(20) PRIMARY KEY,
+    watermark_ms BIGINT NOT NULL DEFAULT 0,
+    after_cursor VARCHAR(64),
+    local_cursor INT NOT NULL DEFAULT 0,
+    updated_at DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) ON UPDATE CURRENT_TIMESTAMP(3)
+);
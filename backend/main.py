@@ -1,14 +1,27 @@
 from fastapi import FastAPI, Depends
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import os
 from Hubspot.hubspot_tickets import hubspot_ticket_router
+from Hubspot.reconcile import hubspot_reconcile_router
+from Hubspot.webhooks import hubspot_webhook_router, webhook_worker
+from Hubspot.read_cache import start_invalidation_listener
+from Hubspot.async_client import async_hubspot_client
 from routes.employee import employee_router
 from routes.customer import customer_router
 from routes.ticket import ticket_router
+from routes.stats import stats_router
+from routes.sessions import session_router
 from AI.ai_chat import ai_chat_router
 from Authentication.dependencies import HTTPAuthorizationCredentials, security
-from Authentication.redis_client import redis_client
+from Authentication.session_store import revoke_session, run_session_cleanup, SessionStoreUnavailable
+from Authentication.redis_client import async_redis_pool
+from Authentication.token_cache import start_revocation_listener
+from prometheus_client import make_asgi_app
+from Ticketing.sla import sla_scheduler
+from Hubspot.outbox import outbox_workers
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 load_dotenv(os.path.join(BASE_DIR, ".env"), override=True)
@@ -16,7 +29,27 @@ load_dotenv(os.path.join(BASE_DIR, ".env"), override=True)
 env_path = os.path.join(BASE_DIR, ".env")
 HUBSPOT_TOKEN = repr(os.getenv("HUBSPOT_TOKEN"))
 
-app = FastAPI(title="Smart Support Desk")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start and stop background workers with the application.
+    """
+
+    start_revocation_listener()
+    start_invalidation_listener()
+    sla_scheduler.start()
+    outbox_workers.start()
+    webhook_worker.start()
+    session_cleanup = asyncio.create_task(run_session_cleanup())
+    yield
+    session_cleanup.cancel()
+    sla_scheduler.stop()
+    outbox_workers.stop()
+    webhook_worker.stop()
+    await async_hubspot_client.aclose()
+    await async_redis_pool.disconnect()
+
+app = FastAPI(title="Smart Support Desk", lifespan=lifespan)
 
 
 app.add_middleware(
@@ -32,16 +65,24 @@ app.include_router(employee_router)
 app.include_router(customer_router)
 app.include_router(ticket_router)
 app.include_router(hubspot_ticket_router)
+app.include_router(hubspot_reconcile_router)
+app.include_router(hubspot_webhook_router)
+app.include_router(stats_router)
+app.include_router(session_router)
+app.mount("/metrics", make_asgi_app())
 
 @app.post("/logout", tags=["Logout"])
-def logout(
+async def logout(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     Log out the current user by deleting their session token from Redis.
 
     This endpoint invalidates the user's JWT access token, effectively
-    logging them out and preventing further use of the token.
+    logging them out and preventing further use of the token. A
+    revocation message is published so every worker evicts the token
+    from its verified-token cache. If Redis is unavailable the token is
+    revoked locally and the revocation is replayed once Redis recovers.
 
     Args:
     - credentials (HTTPAuthorizationCredentials, Depends): Extracted JWT token from the Authorization header.
@@ -53,5 +94,8 @@ def logout(
     - No explicit exceptions; if the token does not exist in Redis, the operation is idempotent.
     """
 
-    redis_client.delete(credentials.credentials)
+    try:
+        await revoke_session(credentials.credentials)
+    except SessionStoreUnavailable:
+        pass
     return {"message": "Logged out successfully"}
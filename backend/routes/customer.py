@@ -1,16 +1,25 @@
 from fastapi import status,Depends, HTTPException, APIRouter
+from fastapi.concurrency import run_in_threadpool
+from anyio import from_thread
 from database.database import access_db
 from Authentication.dependencies import admin_required, admin_agent_required
 from pydantic import BaseModel
 from Authentication.auth import create_access_token
-from Hubspot.hubspot_contacts import sync_contact
+from Authentication.session_store import create_session, revoke_user_sessions_after_commit, SessionStoreUnavailable
+from Authentication.rate_limit import rate_limit, Limit
+from Hubspot.hubspot_contacts import async_sync_contact
 from Hubspot.hubspot_contacts import fetch_contact_by_id
-from Hubspot.hubspot_delete import delete_hubspot_object
+from Hubspot.bulkhead import hubspot_bulkhead, HUBSPOT_CALL_DEADLINE_SECONDS
+from Hubspot.async_client import async_hubspot_client
+from Hubspot.outbox import enqueue
 from typing import Optional
 
 
 customer_router = APIRouter()
 
+# per client IP; slows down guessing customer emails and mobile numbers
+login_rate_limit = rate_limit("customer_login", Limit(10, 60))
+
 class CustomerLogin(BaseModel):
     email_or_mobile : str
 
@@ -66,13 +75,23 @@ def fetch_all_customers(user=Depends(admin_agent_required),db = Depends(access_d
         detail=str(e)
     )
  
-def sync_single_customer(customer_id: int):
+def fetch_customer(db, customer_id):
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT * FROM customer WHERE customer_id = %s",
+            (customer_id,)
+        )
+        return cursor.fetchone()
+
+
+async def sync_single_customer(customer_id: int):
     """
     Synchronize a single customer record with HubSpot.
 
     This function retrieves a customer from the local database using the
     provided `customer_id` and synchronizes the customer data with HubSpot
-    via the `sync_contact` utility.
+    via `async_sync_contact`, within HUBSPOT_CALL_DEADLINE_SECONDS. No
+    thread is held while HubSpot answers.
 
     Args:
     - customer_id (int): Unique identifier of the customer to be synchronized.
@@ -88,19 +107,15 @@ def sync_single_customer(customer_id: int):
     """
 
     try:
-        db = access_db()
-        cursor = db.cursor()
-
-        cursor.execute(
-            "SELECT * FROM customer WHERE customer_id = %s",
-            (customer_id,)
-        )
-        customer = cursor.fetchone()
+        db = await run_in_threadpool(access_db)
+        with db:
+            customer = await run_in_threadpool(fetch_customer, db, customer_id)
 
-        if not customer:
-            return {"error": "Customer not found"}
+            if not customer:
+                return {"error": "Customer not found"}
 
-        sync_contact(customer, db)
+            with async_hubspot_client.deadline(HUBSPOT_CALL_DEADLINE_SECONDS):
+                await async_sync_contact(customer, db)
 
         return {"success": True}
 
@@ -118,8 +133,8 @@ def customer_registration(data:CustomerRegister,user=Depends(admin_agent_require
 
     This endpoint allows an admin or agent to create a new customer record
     in the local database after validating email uniqueness and mobile
-    number format. Upon successful creation, the customer is automatically
-    synchronized with HubSpot.
+    number format. A HubSpot sync is queued in the same transaction and
+    delivered by the outbox workers after the response.
 
     Dependencies:
     - admin_agent_required: Ensures the requester is an authenticated admin or agent.
@@ -137,8 +152,7 @@ def customer_registration(data:CustomerRegister,user=Depends(admin_agent_require
     Raises:
     - HTTPException (400): If the mobile number is invalid.
     - HTTPException (409): If the email already exists.
-    - HTTPException (500): If an unexpected error occurs during registration
-      or synchronization.
+    - HTTPException (500): If an unexpected error occurs during registration.
     """
 
     try:
@@ -176,9 +190,8 @@ def customer_registration(data:CustomerRegister,user=Depends(admin_agent_require
                           data.country,
                           data.address)
                 cursor.execute(query,values)
+                enqueue(cursor, "contact", cursor.lastrowid, "contact.sync")
                 db.commit()
-                customer_id = cursor.lastrowid
-                sync_single_customer(customer_id)
 
                 return {"status_code":status.HTTP_201_CREATED, "message":"Customer registered"}
     except Exception as e:
@@ -188,14 +201,37 @@ def customer_registration(data:CustomerRegister,user=Depends(admin_agent_require
     )
 
 
-@customer_router.post("/customer_login", tags=["Customer"])
-def customer_login(data: CustomerLogin, db=Depends(access_db)):
+def fetch_login_customer(db, email_or_mobile):
+    """
+    Look up a customer by email address or mobile number.
+
+    Args:
+    - db: Database connection object.
+    - email_or_mobile (str): Customer email address or mobile number.
+
+    Returns:
+    - dict | None: customer_id and customer_email, or None if no
+      customer matches.
+    """
+
+    with db.cursor() as cursor:
+        cursor.execute("""
+            select customer_id, customer_email
+            from customer
+            where customer_email=%s or customer_mobile_number=%s
+        """, (email_or_mobile, email_or_mobile))
+        return cursor.fetchone()
+
+
+@customer_router.post("/customer_login", tags=["Customer"], dependencies=[Depends(login_rate_limit)])
+async def customer_login(data: CustomerLogin, db=Depends(access_db)):
     """
     Authenticate a customer and issue an access token.
 
     This endpoint validates a customer using either email address or
     mobile number and returns a JWT access token upon successful
-    authentication.
+    authentication. The token is stored as a customer session in Redis,
+    so it can be revoked like an employee session.
 
     Dependencies:
     - access_db: Provides a database connection.
@@ -209,24 +245,27 @@ def customer_login(data: CustomerLogin, db=Depends(access_db)):
 
     Raises:
     - HTTPException (401): If the provided email or mobile number is invalid.
+    - HTTPException (429): If the client exceeded the login rate limit.
+    - HTTPException (503): If the session store is unavailable.
     """
 
     try:
-        cursor = db.cursor()
-        cursor.execute("""
-            select customer_id, customer_email
-            from customer
-            where customer_email=%s or customer_mobile_number=%s
-        """, (data.email_or_mobile, data.email_or_mobile))
-
-        customer = cursor.fetchone()
+        customer = await run_in_threadpool(fetch_login_customer, db, data.email_or_mobile)
         if not customer:
             raise HTTPException(401, "Invalid customer")
 
-        return {"access_token": create_access_token({
+        token = create_access_token({
             "emp_id": customer["customer_id"],
             "role": "Customer"
-        })}
+        })
+        await create_session(token, customer["customer_id"], scope="customer")
+        return {"access_token": token}
+    except SessionStoreUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         return str(e)
 
@@ -248,8 +287,8 @@ def update_customer(data : Update_customer,user=Depends(admin_agent_required),db
     This endpoint allows an admin or agent to update customer information
     based on the customer's email address. Only provided (non-empty) fields
     are updated; missing or empty fields retain their existing values.
-    After a successful update, the customer record is synchronized with
-    HubSpot.
+    A HubSpot sync is queued in the same transaction and delivered by the
+    outbox workers after the response.
 
     Dependencies:
     - admin_agent_required: Ensures the requester is an authenticated admin or agent.
@@ -261,13 +300,11 @@ def update_customer(data : Update_customer,user=Depends(admin_agent_required),db
 
     Returns:
     - dict:
-        - message (str): Confirmation message indicating successful update
-          and synchronization.
+        - message (str): Confirmation message indicating successful update.
 
     Raises:
     - HTTPException (404): If no customer exists with the provided email.
-    - HTTPException (500): If an unexpected error occurs during update or
-      synchronization.
+    - HTTPException (500): If an unexpected error occurs during update.
     """
 
     try:
@@ -294,20 +331,9 @@ def update_customer(data : Update_customer,user=Depends(admin_agent_required),db
                               data.address if data.address != "" and data.address is not None else d['customer_address'],
                               data.email)
                     cursor.execute(query,values)
+                    enqueue(cursor, "contact", d['customer_id'], "contact.sync")
                     db.commit()
-                    # 🔥 Fetch updated row
-                    cursor.execute(
-                        "SELECT * FROM customer WHERE customer_id = %s",
-                        (d['customer_id'],)
-                    )
-                    customer = cursor.fetchone()
-
-                    # 🔥 Sync HubSpot (safe)
-                    try:
-                        sync_contact(customer,db)
-                    except Exception as e:
-                        pass
-                    return {"message": "Customer updated & synced"}
+                    return {"message": "Customer updated, HubSpot sync queued"}
 
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -330,7 +356,8 @@ def remove_customer(data : DeleteUser,user=Depends(admin_required),db = Depends(
     This endpoint allows an authorized admin user to remove a customer
     from the database using the customer's email address. The operation
     is restricted based on the requesting employee's role; service
-    persons are not permitted to delete customers.
+    persons are not permitted to delete customers. All of the customer's
+    sessions are revoked after deletion.
 
     Dependencies:
     - admin_required: Ensures the requester is an authenticated admin.
@@ -360,11 +387,12 @@ def remove_customer(data : DeleteUser,user=Depends(admin_required),db = Depends(
                         status_code=status.HTTP_401_UNAUTHORIZED,
                         detail="You have not permit"
                     )
-                cursor.execute("select customer_email from customer where customer_email = %s",(data.email,))
+                cursor.execute("select customer_id, customer_email from customer where customer_email = %s",(data.email,))
                 d = cursor.fetchone()
                 if d:
                     cursor.execute("delete from customer where customer_email = %s",(data.email))
                     db.commit()
+                    from_thread.run(revoke_user_sessions_after_commit, "customer", d["customer_id"])
                     return status.HTTP_200_OK
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -378,7 +406,7 @@ def remove_customer(data : DeleteUser,user=Depends(admin_required),db = Depends(
 
 
 @customer_router.post("/sync-customer/{customer_id}", tags=["Customer"])
-def sync_customer(customer_id: int,
+async def sync_customer(customer_id: int,
     user=Depends(admin_agent_required)):
     """
     Synchronize a customer with HubSpot by customer ID.
@@ -398,10 +426,11 @@ def sync_customer(customer_id: int,
     - HTTPException (500): If an unexpected error occurs during synchronization.
     """
 
-    return sync_single_customer(customer_id)
+    return await sync_single_customer(customer_id)
 
 
 @customer_router.get("/hubspot/customer/{customer_id}", tags=["Customer"])
+@hubspot_bulkhead
 def get_customer_from_hubspot(
     customer_id: int,
     user=Depends(admin_agent_required),
@@ -455,6 +484,7 @@ def get_customer_from_hubspot(
 
 
 @customer_router.get("/hubspot/customer_email/{customer_email}", tags=["Customer"])
+@hubspot_bulkhead
 def get_customer_from_hubspot_by_email(
     customer_email: str,
     user=Depends(admin_agent_required),
@@ -482,9 +512,11 @@ def delete_customer_from_hubspot(customer_id:int,db=Depends(access_db)):
     """
     Delete a customer from HubSpot using the local customer ID.
 
-    This endpoint deletes a HubSpot contact associated with a given local
-    customer ID. It first retrieves the HubSpot contact ID from the local
-    database and then calls the HubSpot API to delete the contact.
+    This endpoint deletes the HubSpot contact associated with a given
+    local customer ID. The HubSpot contact ID is read from the local
+    database and the deletion is queued in the HubSpot outbox, whose
+    workers archive queued contacts with HubSpot batch calls and then
+    unlink them locally.
 
     Dependencies:
     - access_db: Provides a database connection.
@@ -494,37 +526,35 @@ def delete_customer_from_hubspot(customer_id:int,db=Depends(access_db)):
       contact will be deleted.
 
     Returns:
-    - dict: Result of the HubSpot deletion operation, typically:
-        - {"status": "success", "message": "Deleted successfully"} on success
-        - {"status": "error", "status_code": int, "detail": str} on failure
+    - dict: {"status": "success", "message": "HubSpot contact deletion queued"}
 
     Raises:
-    - HTTPException (400): If an error occurs during database access or
-      deletion in HubSpot.
+    - HTTPException (404): If the customer is not synced to HubSpot.
+    - HTTPException (500): If an error occurs during database access.
     """
 
     try:
-        with db.cursor() as cursor:
-            cursor.execute(
-                "SELECT hubspot_contact_id FROM customer WHERE customer_id=%s",
-                (customer_id,)
-            )
-            hubspot_id = cursor.fetchone()
-            if not hubspot_id or not hubspot_id.get("hubspot_contact_id"):
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="Customer not synced to HubSpot"
+        with db:
+            with db.cursor() as cursor:
+                cursor.execute(
+                    "SELECT customer_email, hubspot_contact_id FROM customer WHERE customer_id=%s",
+                    (customer_id,)
                 )
-
-            return delete_hubspot_object(object_type="contacts",object_id=hubspot_id['hubspot_contact_id'])
+                hubspot_id = cursor.fetchone()
+                if not hubspot_id or not hubspot_id.get("hubspot_contact_id"):
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="Customer not synced to HubSpot"
+                    )
+                enqueue(cursor, "contact", customer_id, "contact.archive", {
+                    "hubspot_contact_id": hubspot_id["hubspot_contact_id"],
+                    "email": hubspot_id["customer_email"]
+                })
+            db.commit()
+        return {"status": "success", "message": "HubSpot contact deletion queued"}
     except HTTPException:
         raise
-    except RuntimeError as e:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=str(e)
-        )
-    except Exception as e:
+    except Exception:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to delete customer from HubSpot"
@@ -1,13 +1,21 @@
 from fastapi import status,Depends, HTTPException, APIRouter
+from fastapi.concurrency import run_in_threadpool
+from anyio import from_thread
 from database.database import access_db
 from Authentication.dependencies import admin_required, employee_create_permission
 from pydantic import BaseModel
 from enum import Enum
 from Authentication.auth import create_access_token
-from Authentication.redis_client import redis_client
+from Authentication.session_store import create_session, revoke_user_sessions_after_commit, SessionStoreUnavailable
+from Authentication.rate_limit import rate_limit, Limit
+from Authentication.passwords import hash_password, verify_password, PasswordHasherBusy
+from Ticketing.assignment import assignment_engine
 
 employee_router = APIRouter()
 
+# per client IP; slows down password guessing
+login_rate_limit = rate_limit("employee_login", Limit(10, 60))
+
 
 class Login(BaseModel):
     email: str
@@ -22,7 +30,7 @@ class EmployeeRegister(BaseModel):
     name : str | None
     email : str | None
     mobile_number : str | None 
-    password : str | None
+    password : str
     type : UserRole
 
 class DeleteUser(BaseModel):
@@ -43,8 +51,8 @@ def employee_registration(
 
     This endpoint allows Admins or Agents (with restrictions) to create
     a new employee record. Agents can only register Service Persons.
-    The employee's type, email, password, and other details are stored
-    in the database.
+    The employee's type, email, argon2 password hash, and other details
+    are stored in the database.
 
     Args:
     - data (EmployeeRegister): Employee registration details.
@@ -92,10 +100,14 @@ def employee_registration(
                     (employee_name, employee_email, employee_mobile_number,
                      employee_password, employee_type)
                     values (%s,%s,%s,%s,%s)""",
-                    (data.name, data.email, data.mobile_number, data.password, type_id)
+                    (data.name, data.email, data.mobile_number, hash_password(data.password), type_id)
                 )
+                emp_id = cursor.lastrowid
                 db.commit()
 
+        if data.type == UserRole.service_person:
+            assignment_engine.add_service_person(emp_id)
+
         return {"message": "Employee registered successfully"}
     except Exception as e:
         return str(e)
@@ -137,13 +149,68 @@ def fetch_all_employees(user=Depends(admin_required),db = Depends(access_db)):
     )
     
 
-@employee_router.post("/employee_login", tags=["Employee"])
-def employee_login(data: Login, db=Depends(access_db)):
+def fetch_login_employee(db, email):
+    """
+    Fetch the login record of an employee by email.
+
+    Args:
+    - db (Connection): Database connection (closed afterwards).
+    - email (str): Employee email.
+
+    Returns:
+    - dict | None: employee_id, employee_email, employee_password and
+      employee_type (role name), or None if no employee matches.
+    """
+
+    with db:
+        with db.cursor() as cursor:
+            cursor.execute("""
+                    SELECT 
+                        e.employee_id,
+                        e.employee_email,
+                        e.employee_password,
+                        et.type_name as employee_type
+                    FROM employee e
+                    JOIN employee_type et
+                        ON e.employee_type = et.employee_type_id
+                    WHERE e.employee_email = %s
+                """, (email,))
+            return cursor.fetchone()
+
+
+def store_password_hash(emp_id, old_value, new_hash):
+    """
+    Replace an employee's stored password with a fresh hash.
+
+    The update only applies if the stored value is unchanged, so it never
+    overwrites a password changed concurrently.
+
+    Args:
+    - emp_id (int): Employee ID.
+    - old_value (str): Stored value the hash was derived from.
+    - new_hash (str): New argon2 hash.
+    """
+
+    db = access_db()
+    with db:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "update employee set employee_password=%s where employee_id=%s and employee_password=%s",
+                (new_hash, emp_id, old_value)
+            )
+        db.commit()
+
+@employee_router.post("/employee_login", tags=["Employee"], dependencies=[Depends(login_rate_limit)])
+async def employee_login(data: Login, db=Depends(access_db)):
     """
     Authenticate an employee and return a JWT access token.
 
     This endpoint validates employee credentials (email and password),
     generates a JWT token, and stores it in Redis for session management.
+    The database lookup runs in the threadpool, the password is verified
+    on the bounded password executor and the session is written through
+    the async Redis pool, so the event loop is never blocked. Plaintext
+    or outdated hashes are replaced with a fresh argon2 hash on success.
 
     Args:
     - data (Login): Employee login credentials.
@@ -157,44 +224,45 @@ def employee_login(data: Login, db=Depends(access_db)):
 
     Raises:
     - HTTPException (401): If credentials are invalid.
+    - HTTPException (429): If the client exceeded the login rate limit.
+    - HTTPException (503): If the password hashing queue is full or the
+      session store is unavailable.
     - HTTPException (500): If an unexpected error occurs.
     """
 
     try:
-        with db:
-            with db.cursor() as cursor:
-                cursor.execute("""
-                        SELECT 
-                            e.employee_id,
-                            e.employee_email,
-                            e.employee_password,
-                            et.type_name as employee_type
-                        FROM employee e
-                        JOIN employee_type et
-                            ON e.employee_type = et.employee_type_id
-                        WHERE e.employee_email = %s
-                    """, (data.email,))
-                user = cursor.fetchone()
-
-                if not user or user["employee_password"] != data.password:
-                    raise HTTPException(status_code=401, detail="Invalid credentials")
-
-                token_data = {
-                    "emp_id": user["employee_id"],
-                    "role": user["employee_type"]
-                }
-
-                token = create_access_token(token_data)
-
-                # store token in redis
-                redis_client.setex(token, 1800, user["employee_id"])
-
-                return {
-                    "access_token": token,
-                    "token_type": "bearer",
-                    "emp_id": user["employee_id"],
-                    "role": user["employee_type"]
-                }
+        user = await run_in_threadpool(fetch_login_employee, db, data.email)
+
+        valid, new_hash = await verify_password(user and user["employee_password"], data.password)
+        if not valid:
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        if new_hash:
+            await run_in_threadpool(store_password_hash, user["employee_id"], user["employee_password"], new_hash)
+
+        token_data = {
+            "emp_id": user["employee_id"],
+            "role": user["employee_type"]
+        }
+
+        token = create_access_token(token_data)
+
+        # store token in redis
+        await create_session(token, user["employee_id"], scope="employee")
+
+        return {
+            "access_token": token,
+            "token_type": "bearer",
+            "emp_id": user["employee_id"],
+            "role": user["employee_type"]
+        }
+    except HTTPException:
+        raise
+    except (PasswordHasherBusy, SessionStoreUnavailable):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login temporarily unavailable",
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         raise HTTPException(
         status_code=500,
@@ -207,7 +275,8 @@ def update_employee(data : EmployeeRegister,user=Depends(admin_required),db = De
     Update an existing employee's information.
 
     Only Admin users can update employee records. Fields that are left
-    empty in the request will retain their current values.
+    empty in the request will retain their current values. Changing the
+    password or role logs the employee out of every session.
 
     Args:
     - data (EmployeeRegister): Employee details to update.
@@ -233,11 +302,14 @@ def update_employee(data : EmployeeRegister,user=Depends(admin_required),db = De
                     values = (
                         data.name if data.name != "" else d['employee_name'],
                         data.mobile_number if data.mobile_number != "" else d['employee_mobile_number'],
-                        data.password if data.password != "" else d['employee_password'],
+                        hash_password(data.password) if data.password else d['employee_password'],
                         type_id if data.type != "" else d['employee_type'],
                         data.email if data.email != "" else d['employee_email'])
                     cursor.execute("update employee set employee_name=%s,employee_mobile_number=%s,employee_password=%s,employee_type=%s where employee_email=%s",values)
                     db.commit()
+                    if data.password or type_id != d['employee_type']:
+                        # existing tokens carry the old credentials/role
+                        from_thread.run(revoke_user_sessions_after_commit, "employee", d["employee_id"])
                     return status.HTTP_202_ACCEPTED
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -258,7 +330,8 @@ def remove_employee(data : DeleteUser,user=Depends(admin_required),db = Depends(
     Delete an employee from the system.
 
     Only Admin users can remove employees. The endpoint checks if the
-    employee exists before deletion.
+    employee exists before deletion, and revokes all of the employee's
+    sessions afterwards.
 
     Args:
     - data (DeleteUser): Email of the employee to delete.
@@ -276,11 +349,13 @@ def remove_employee(data : DeleteUser,user=Depends(admin_required),db = Depends(
     try:
         with db:
             with db.cursor() as cursor:
-                cursor.execute("select employee_email from employee where employee_email = %s",(data.email,))
+                cursor.execute("select employee_id, employee_email from employee where employee_email = %s",(data.email,))
                 d = cursor.fetchone()
                 if d:
                     cursor.execute("delete from employee where employee_email = %s",(data.email,))
                     db.commit()
+                    assignment_engine.remove_service_person(d["employee_id"])
+                    from_thread.run(revoke_user_sessions_after_commit, "employee", d["employee_id"])
                     return status.HTTP_200_OK
                 raise HTTPException(
                     status_code=404,
@@ -0,0 +1,89 @@
+from fastapi import status, Depends, HTTPException, APIRouter
+from typing import Literal
+from Authentication.dependencies import admin_required
+from Authentication.session_store import list_user_sessions, revoke_user_sessions
+
+
+session_router = APIRouter(prefix="/admin/sessions", tags=["Sessions"])
+
+
+@session_router.get("/{scope}/{user_id}")
+async def fetch_user_sessions(
+    scope: Literal["employee", "customer"],
+    user_id: int,
+    user=Depends(admin_required)
+):
+    """
+    List the active sessions of an employee or customer.
+
+    Sessions are read from the user's Redis session index, so no key
+    scan is needed. Tokens are never returned; each session is
+    identified by the SHA-256 hash of its token.
+
+    Access Control:
+        - Admin
+
+    Args:
+        scope (str):
+            "employee" or "customer".
+        user_id (int):
+            Employee or customer ID.
+        user (dict):
+            Authenticated Admin payload.
+
+    Returns:
+        dict:
+            - sessions: `session_id` and `expires_at` (epoch seconds)
+              of every active session
+
+    Raises:
+        HTTPException:
+            500 - If Redis is unavailable.
+    """
+    try:
+        return {"sessions": await list_user_sessions(scope, user_id)}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+
+
+@session_router.delete("/{scope}/{user_id}")
+async def delete_user_sessions(
+    scope: Literal["employee", "customer"],
+    user_id: int,
+    user=Depends(admin_required)
+):
+    """
+    Log an employee or customer out of every session.
+
+    All sessions in the user's index are deleted atomically and their
+    revocations are broadcast to every worker in one pipeline.
+
+    Access Control:
+        - Admin
+
+    Args:
+        scope (str):
+            "employee" or "customer".
+        user_id (int):
+            Employee or customer ID.
+        user (dict):
+            Authenticated Admin payload.
+
+    Returns:
+        dict:
+            - revoked: number of sessions revoked
+
+    Raises:
+        HTTPException:
+            500 - If Redis is unavailable.
+    """
+    try:
+        return {"revoked": await revoke_user_sessions(scope, user_id)}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
@@ -0,0 +1,176 @@
+from fastapi import status, Depends, HTTPException, APIRouter
+from database.database import access_db
+from Authentication.dependencies import admin_agent_required
+from datetime import datetime
+from typing import Literal, Optional
+from Ticketing.sla import sla_breach_report, SLA_POLICIES
+from Ticketing.history import ticket_time_metrics
+from Ticketing.rollups import ticket_volume_timeseries, DEFAULT_RANGE
+
+
+stats_router = APIRouter(prefix="/stats", tags=["Stats"])
+
+
+@stats_router.get("/sla_breaches")
+def sla_breaches(
+    since: Optional[datetime] = None,
+    user=Depends(admin_agent_required),
+    db=Depends(access_db)
+):
+    """
+    Report SLA compliance per ticket priority.
+
+    First-response and resolution times are computed from the
+    `ticket_event` status transitions and compared with the SLA policy
+    of each priority.
+
+    Access Control:
+        - Admin
+        - Agent
+
+    Args:
+        since (datetime, optional):
+            Only include tickets generated at or after this time.
+        user (dict):
+            Authenticated Admin or Agent payload.
+        db:
+            Database connection dependency.
+
+    Returns:
+        dict:
+            - policies: SLA response/resolution minutes per priority
+            - report: per priority ticket count, breach counts and
+              p50/p90/p95/p99 minutes for first response and resolution
+
+    Raises:
+        HTTPException:
+            500 - If a database or server error occurs.
+    """
+    try:
+        with db:
+            report = sla_breach_report(db, since)
+        return {
+            "policies": {
+                priority: {kind: limit.total_seconds() / 60 for kind, limit in policy.items()}
+                for priority, policy in SLA_POLICIES.items()
+            },
+            "report": report
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+@stats_router.get("/ticket_metrics")
+def ticket_metrics(
+    group_by: Literal["priority", "employee"] = "priority",
+    user=Depends(admin_agent_required),
+    db=Depends(access_db)
+):
+    """
+    Median and p95 time-to-first-response and time-to-close.
+
+    Durations come from the append-only `ticket_event` history: first
+    response is the first transition out of "Open", close is the first
+    transition to "Close". Percentiles are computed in SQL with window
+    functions and served from a short-lived cache.
+
+    Access Control:
+        - Admin
+        - Agent
+
+    Args:
+        group_by (str):
+            "priority" or "employee" (currently assigned service person).
+        user (dict):
+            Authenticated Admin or Agent payload.
+        db:
+            Database connection dependency.
+
+    Returns:
+        list[dict]:
+            One row per group and metric with `group_key`, `metric`,
+            `samples`, `p50_seconds` and `p95_seconds`.
+
+    Raises:
+        HTTPException:
+            400 - If `group_by` is not supported.
+            500 - If a database or server error occurs.
+    """
+    try:
+        with db:
+            return ticket_time_metrics(db, group_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
+
+@stats_router.get("/timeseries")
+def timeseries(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    granularity: Literal["hour", "day"] = "day",
+    group_by: Literal["none", "priority", "issue_type"] = "none",
+    user=Depends(admin_agent_required),
+    db=Depends(access_db)
+):
+    """
+    Tickets created and closed per hour or day, for trend charts.
+
+    Counts are read from the `ticket_volume_hourly` / `ticket_volume_daily`
+    rollup tables, which are maintained incrementally as tickets are
+    created and closed, so a 12-month daily chart is a short primary-key
+    range scan instead of an aggregation over the ticket table.
+
+    Access Control:
+        - Admin
+        - Agent
+
+    Args:
+        start (datetime, optional):
+            Inclusive range start. Defaults to 30 days before `end`.
+        end (datetime, optional):
+            Exclusive range end. Defaults to now.
+        granularity (str):
+            "hour" (range limited to 93 days) or "day".
+        group_by (str):
+            "none", "priority" or "issue_type".
+        user (dict):
+            Authenticated Admin or Agent payload.
+        db:
+            Database connection dependency.
+
+    Returns:
+        list[dict]:
+            `bucket_start`, `group_key`, `created` and `closed` per bucket.
+            Buckets without activity are omitted.
+
+    Raises:
+        HTTPException:
+            400 - If the range, granularity or group_by is invalid.
+            500 - If a database or server error occurs.
+    """
+    try:
+        end = end or datetime.now()
+        start = start or end - DEFAULT_RANGE
+        with db:
+            return ticket_volume_timeseries(db, start, end, granularity, group_by)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
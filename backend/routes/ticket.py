@@ -1,12 +1,14 @@
 from fastapi import status,Depends, HTTPException, APIRouter
 from database.database import access_db
-from Authentication.dependencies import get_current_user,admin_agent_required, customer_required, admin_agent_customer_required
+from Authentication.dependencies import get_current_user,admin_required,admin_agent_required, customer_required, admin_agent_customer_required, service_person_required
 from pydantic import BaseModel
 from typing import Optional
 from enum import Enum
 from datetime import datetime
-from Hubspot.hubspot_tickets import hubspot_create_ticket, hubspot_close_ticket, hubspot_update_ticket
-from Hubspot.hubspot_contacts import get_contact_id_by_email
+from Hubspot.outbox import enqueue
+from Ticketing.assignment import assignment_engine
+from Ticketing.events import publish, ticket_state
+from Ticketing.history import record_ticket_event
 
 
 ticket_router = APIRouter()
@@ -82,17 +84,21 @@ def ticket_registration(data:TicketRegister,user=Depends(admin_agent_required),d
     """
     Create a new ticket and sync it to HubSpot.
 
+    The ticket is assigned to the least-loaded service person (weighted
+    by priority) through the in-memory assignment engine. The HubSpot
+    ticket is created by the outbox workers after the local transaction
+    commits, so the response never waits on HubSpot.
+
     Args:
     - data (TicketRegister): Ticket data including customer email, issue details, priority, and generate datetime.
     - user (dict, Depends(admin_agent_required)): Current authenticated user (Admin or Agent).
     - db (Connection, Depends(access_db)): Database connection.
 
     Returns:
-    - dict: Status message indicating success and HubSpot ticket ID.
+    - dict: Status message indicating success.
 
     Raises:
     - HTTPException 404: If customer does not exist.
-    - HTTPException 400: If HubSpot API call fails.
     - HTTPException 500: For unexpected errors.
     """
 
@@ -102,39 +108,7 @@ def ticket_registration(data:TicketRegister,user=Depends(admin_agent_required),d
                 customer = cursor.execute("select * from customer where customer_email = %s",(data.customer_email,))
                 if customer:
                     customer = cursor.fetchone()
-                    # 3️⃣ Prepare ticket payload for HubSpot
-                    hubspot_contact_id = get_contact_id_by_email(data.customer_email)
-                    ticket_payload = {
-                        "properties": {
-                            "subject": data.issue_title,
-                            "content": data.issue_description,
-                            "hs_pipeline": "0",
-                            "hs_pipeline_stage": "1",
-                            "hs_ticket_priority": data.priority.upper(),
-                            "hubspot_owner_id": 87397359
-                        },
-                        "associations": [
-                            {
-                                "to": {"id": hubspot_contact_id},
-                                "types": [
-                                    {
-                                        "associationCategory": "HUBSPOT_DEFINED",
-                                        "associationTypeId": 16
-                                    }
-                                ]
-                            }
-                        ]
-                    }
-
-                    # 4️⃣ Create ticket in HubSpot
-                    response = hubspot_create_ticket(
-                        ticket_payload
-                    )
-                    if response.status_code != 201:
-                        raise HTTPException(status_code=400, detail=response.text)
-
-                    hubspot_ticket_id = response.json()["id"]
-
+                    service_person_emp_id = assignment_engine.assign(data.priority.value)
                     query = '''insert into ticket(
                     issue_title,
                     issue_type,
@@ -142,9 +116,9 @@ def ticket_registration(data:TicketRegister,user=Depends(admin_agent_required),d
                     priority,
                     generate_datetime,
                     ticket_status,
+                    service_person_emp_id,
                     creater_emp_id,
-                    customer_id,
-                    hubspot_ticket_id
+                    customer_id
                     ) values (%s,%s,%s,%s,%s,%s,%s,%s,%s)'''
                     values = (data.issue_title,
                         data.issue_type,
@@ -152,16 +126,35 @@ def ticket_registration(data:TicketRegister,user=Depends(admin_agent_required),d
                         data.priority.value,
                         data.generate_datetime,
                         "Open",
+                        service_person_emp_id,
                         user["emp_id"],
-                        customer["customer_id"],
-                        hubspot_ticket_id)
-                    cursor.execute(query,values)
-                    ticket_id = cursor.lastrowid 
-                    db.commit()
+                        customer["customer_id"])
+                    created = {
+                        "service_person_emp_id": service_person_emp_id,
+                        "priority": data.priority.value,
+                        "ticket_status": "Open"
+                    }
+                    try:
+                        cursor.execute(query,values)
+                        ticket_id = cursor.lastrowid 
+                        record_ticket_event(cursor, ticket_id, None, created, user["emp_id"])
+                        enqueue(cursor, "ticket", ticket_id, "ticket.create")
+                        db.commit()
+                    except Exception:
+                        assignment_engine.release(service_person_emp_id, data.priority.value)
+                        raise
+
+                    publish({
+                        "type": "created",
+                        "ticket_id": ticket_id,
+                        "before": None,
+                        "after": created,
+                        "auto_assigned": True
+                    })
 
                     return {
                         "status": "success",
-                        "message": "Ticket generated & synced to HubSpot"
+                        "message": "Ticket generated, HubSpot sync queued"
                     }
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
@@ -186,6 +179,7 @@ def ticket_registration_gform(data: TicketRegister, db=Depends(access_db)):
     - Linked to the customer using email
     - Created with status set to 'Open'
     - Assigned a default creator employee ID
+    - Assigned to the least-loaded service person by the assignment engine
 
     Args:
         data (TicketRegister):
@@ -212,6 +206,7 @@ def ticket_registration_gform(data: TicketRegister, db=Depends(access_db)):
                 )
                 if customer:
                     customer = cursor.fetchone()
+                    service_person_emp_id = assignment_engine.assign(data.priority.value)
                     query = '''insert into ticket(
                         issue_title,
                         issue_type,
@@ -219,9 +214,10 @@ def ticket_registration_gform(data: TicketRegister, db=Depends(access_db)):
                         priority,
                         generate_datetime,
                         ticket_status,
+                        service_person_emp_id,
                         creater_emp_id,
                         customer_id
-                    ) values (%s,%s,%s,%s,%s,%s,%s,%s)'''
+                    ) values (%s,%s,%s,%s,%s,%s,%s,%s,%s)'''
                     values = (
                         data.issue_title,
                         data.issue_type,
@@ -229,11 +225,31 @@ def ticket_registration_gform(data: TicketRegister, db=Depends(access_db)):
                         data.priority.value,
                         data.generate_datetime,
                         "Open",
+                        service_person_emp_id,
                         1,
                         customer["customer_id"]
                     )
-                    cursor.execute(query, values)
-                    db.commit()
+                    created = {
+                        "service_person_emp_id": service_person_emp_id,
+                        "priority": data.priority.value,
+                        "ticket_status": "Open"
+                    }
+                    try:
+                        cursor.execute(query, values)
+                        ticket_id = cursor.lastrowid
+                        record_ticket_event(cursor, ticket_id, None, created)
+                        db.commit()
+                    except Exception:
+                        assignment_engine.release(service_person_emp_id, data.priority.value)
+                        raise
+
+                    publish({
+                        "type": "created",
+                        "ticket_id": ticket_id,
+                        "before": None,
+                        "after": created,
+                        "auto_assigned": True
+                    })
                     return {
                         "status_code": status.HTTP_201_CREATED,
                         "message": "Ticket generated"
@@ -265,13 +281,17 @@ def update_ticket(data: TicketUpdate, user=Depends(get_current_user), db=Depends
 
     Behavior depends on the employee role:
     - Service Person (employee_type == 3):
-        Can assign themselves and update all ticket fields.
+        Can assign themselves to an unassigned ticket and update all
+        ticket fields. An existing assignment is never overwritten; use
+        `/tickets/claim_next` to pick up new work.
     - Admin / Agent:
         Can update ticket fields except service person assignment.
 
-    If the ticket is already synced with HubSpot:
-    - Ticket status updates are propagated to HubSpot
-    - Closing a ticket triggers HubSpot close action
+    If the ticket is synced with HubSpot (possibly by a create still in
+    the outbox), the changes are queued in the HubSpot outbox in the same
+    transaction and delivered in order by the outbox workers:
+    - Priority, status (closing included) and reason are propagated to
+      HubSpot
 
     Args:
         data (TicketUpdate):
@@ -289,7 +309,7 @@ def update_ticket(data: TicketUpdate, user=Depends(get_current_user), db=Depends
     Raises:
         HTTPException:
             404 - If ticket or employee does not exist.
-            500 - If a database, HubSpot, or server error occurs.
+            500 - If a database or server error occurs.
     """
     try:
         with db:
@@ -307,8 +327,9 @@ def update_ticket(data: TicketUpdate, user=Depends(get_current_user), db=Depends
                     e = cursor.fetchone()
                     if e:
                         if e['employee_type'] == 3:
+                            # keep an existing assignee; unassigned tickets go to the caller
                             query = '''update ticket set 
-                                service_person_emp_id = %s,
+                                service_person_emp_id = coalesce(service_person_emp_id, %s),
                                 issue_type = %s,
                                 issue_description = %s,
                                 priority = %s,
@@ -342,17 +363,29 @@ def update_ticket(data: TicketUpdate, user=Depends(get_current_user), db=Depends
                             )
 
                         cursor.execute(query, values)
+                        cursor.execute(
+                            "select * from ticket where ticket_id = %s",
+                            (data.ticket_id,)
+                        )
+                        updated = cursor.fetchone()
+                        record_ticket_event(
+                            cursor,
+                            data.ticket_id,
+                            ticket_state(ticket),
+                            ticket_state(updated),
+                            user["emp_id"]
+                        )
+                        # delivered to HubSpot if/when the ticket is linked;
+                        # the sync sends the ticket's current state, closes included
+                        enqueue(cursor, "ticket", data.ticket_id, "ticket.update")
                         db.commit()
 
-                        # Sync with HubSpot if ticket is linked
-                        if ticket["hubspot_ticket_id"]:
-                            if data.ticket_status and data.ticket_status.value == "Close":
-                                hubspot_close_ticket(ticket["hubspot_ticket_id"])
-
-                            hubspot_update_ticket(
-                                ticket["hubspot_ticket_id"],
-                                data
-                            )
+                        publish({
+                            "type": "closed" if updated["ticket_status"] == "Close" and ticket["ticket_status"] != "Close" else "updated",
+                            "ticket_id": data.ticket_id,
+                            "before": ticket_state(ticket),
+                            "after": ticket_state(updated)
+                        })
 
                         return {
                             "status_code": status.HTTP_202_ACCEPTED,
@@ -375,6 +408,122 @@ def update_ticket(data: TicketUpdate, user=Depends(get_current_user), db=Depends
         )
 
 
+# priority is ENUM('High','Medium','Low'): ascending enum order is
+# High -> Low, and the claim index orders it that way
+CLAIM_PRIORITY_ORDER = ("High", "Medium", "Low")
+
+
+def _claim_candidate(cursor, assignee_filter, args):
+    # the first open ticket matching the assignee filter that no concurrent
+    # claim holds; equality on (ticket_status, service_person_emp_id) lets
+    # idx_ticket_claim serve the order by without a filesort
+    cursor.execute(
+        f"""
+        select ticket_id, service_person_emp_id, priority, generate_datetime
+        from ticket
+        where ticket_status = 'Open' and {assignee_filter}
+        order by priority, generate_datetime, ticket_id
+        limit 1
+        for update skip locked
+        """,
+        args
+    )
+    return cursor.fetchone()
+
+
+def _claim_order(ticket):
+    return (CLAIM_PRIORITY_ORDER.index(ticket["priority"]), ticket["generate_datetime"], ticket["ticket_id"])
+
+
+@ticket_router.post("/tickets/claim_next", tags=["Ticket"])
+def claim_next_ticket(user=Depends(service_person_required), db=Depends(access_db)):
+    """
+    Atomically claim the next open ticket for the logged-in service person.
+
+    The highest-priority, oldest open ticket without a service person and
+    the caller's own highest-priority, oldest open (not yet started)
+    ticket, which the assignment engine may already have given them, are
+    each locked with `SELECT ... FOR UPDATE SKIP LOCKED`, and the better
+    of the two is returned. An unassigned ticket is assigned to the
+    caller in the same transaction; the caller's own ticket is returned
+    as is (`already_assigned` is true) and keeps coming back ahead of
+    lower-priority or newer unassigned work until they start it. Rows
+    already locked by a concurrent claim are skipped instead of waited
+    on, so many service persons can poll this endpoint at once without
+    blocking each other or claiming the same ticket twice.
+
+    Args:
+        user (dict):
+            Authenticated Service Person payload obtained from
+            `service_person_required`. Must contain `emp_id`.
+        db:
+            Database connection dependency.
+
+    Returns:
+        dict:
+            The claimed ticket record, plus `already_assigned` (bool):
+            whether the ticket was already the caller's.
+
+    Raises:
+        HTTPException:
+            404 - If no open ticket is available to the caller.
+            500 - If a database or server error occurs.
+    """
+    try:
+        with db:
+            with db.cursor() as cursor:
+                # two lookups rather than one OR filter, so each walks
+                # idx_ticket_claim in (priority, generate_datetime) order
+                unassigned = _claim_candidate(cursor, "service_person_emp_id is null", ())
+                own = _claim_candidate(cursor, "service_person_emp_id = %s", (user["emp_id"],))
+                candidates = [ticket for ticket in (unassigned, own) if ticket]
+                if not candidates:
+                    db.rollback()
+                    raise HTTPException(
+                        status_code=status.HTTP_404_NOT_FOUND,
+                        detail="No open ticket available"
+                    )
+                ticket = min(candidates, key=_claim_order)
+
+                if ticket is own:
+                    cursor.execute("select * from ticket where ticket_id = %s", (ticket["ticket_id"],))
+                    claimed = cursor.fetchone()
+                    db.commit()
+                    return dict(claimed, already_assigned=True)
+
+                cursor.execute(
+                    "update ticket set service_person_emp_id = %s where ticket_id = %s",
+                    (user["emp_id"], ticket["ticket_id"])
+                )
+                cursor.execute(
+                    "select * from ticket where ticket_id = %s",
+                    (ticket["ticket_id"],)
+                )
+                claimed = cursor.fetchone()
+                record_ticket_event(
+                    cursor,
+                    claimed["ticket_id"],
+                    dict(ticket_state(claimed), service_person_emp_id=None),
+                    ticket_state(claimed),
+                    user["emp_id"]
+                )
+                db.commit()
+
+                publish({
+                    "type": "updated",
+                    "ticket_id": claimed["ticket_id"],
+                    "before": dict(ticket_state(claimed), service_person_emp_id=None),
+                    "after": ticket_state(claimed)
+                })
+                return dict(claimed, already_assigned=False)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
+
 @ticket_router.post("/ticket_analysis_per_emp", tags=["Ticket"])
 def ticket_analysis_per_emp(emp_id: int, db=Depends(access_db)):
     """
@@ -861,3 +1010,44 @@ def agent_tickets(
             detail=str(e)
         )
 
+@ticket_router.get("/tickets/rebalance_suggestions", tags=["Ticket"])
+def rebalance_suggestions(user=Depends(admin_required), db=Depends(access_db)):
+    """
+    Show service person workload and suggested ticket moves to rebalance it.
+
+    Workload is the priority-weighted count of each service person's
+    open and in-progress tickets, as tracked by the assignment engine.
+    Suggestions only move tickets that are still `Open` and are not
+    applied automatically.
+
+    Access Control:
+        - Admin
+
+    Args:
+        user (dict):
+            Authenticated Admin payload provided by `admin_required`.
+        db:
+            Database connection dependency.
+
+    Returns:
+        dict:
+            - workload: list of `emp_id` / `load`, least loaded first
+            - suggestions: list of `ticket_id`, `priority`,
+              `from_emp_id` and `to_emp_id`
+
+    Raises:
+        HTTPException:
+            500 - If a database or server error occurs.
+    """
+    try:
+        with db:
+            suggestions = assignment_engine.rebalance_suggestions(db)
+        return {
+            "workload": assignment_engine.workload(),
+            "suggestions": suggestions
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=str(e)
+        )
@@ -0,0 +1,59 @@
+import uuid
+import pytest
+from Hubspot.client import HubSpotClient
+from Hubspot.async_client import AsyncHubSpotClient
+from Hubspot.scheduler import RateLimitScheduler
+from Hubspot.simulator import SimulatorServer, SimulatorConfig
+from Hubspot.simulator_db import MemoryDatabase
+
+
+@pytest.fixture(scope="session")
+def simulator_server():
+    with SimulatorServer() as sim:
+        yield sim
+
+
+@pytest.fixture
+def sim(simulator_server):
+    """
+    The simulator with an empty store and no latency, errors or limits;
+    tests change `sim.app.state.config` as needed.
+    """
+
+    state = simulator_server.app.state
+    state.config = SimulatorConfig(
+        latency_ms=0, latency_sigma=0, search_latency_ms=0,
+        requests_per_10s=0, daily_limit=0, search_per_second=0
+    )
+    state.store.reset()
+    state.limits.reset()
+    state.stats.clear()
+    return simulator_server
+
+
+@pytest.fixture
+def scheduler():
+    return RateLimitScheduler(per_10s=1000, search_per_second=100, max_concurrency=10)
+
+
+@pytest.fixture
+def client(sim, scheduler):
+    return HubSpotClient(base_url=sim.base_url, token="test", scheduler=scheduler)
+
+
+@pytest.fixture
+def async_client(sim, scheduler, client):
+    # own breakers, so failures of one test do not open another's circuit
+    return AsyncHubSpotClient(base_url=sim.base_url, token="test", scheduler=scheduler, breakers=client)
+
+
+@pytest.fixture
+def database():
+    return MemoryDatabase()
+
+
+@pytest.fixture
+def email():
+    # unique per test: the contact ID cache outlives a test
+    return f"customer-{uuid.uuid4().hex[:12]}@example.com"
+
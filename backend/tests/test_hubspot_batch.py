@@ -0,0 +1,68 @@
+from Hubspot.batch import batch_create, batch_read, batch_update, batch_archive
+
+
+def test_update_maps_missing_ids_to_404(sim, client):
+    store = sim.app.state.store
+    first = store.create("contacts", {"email": "first@example.com"})["id"]
+    second = store.create("contacts", {"email": "second@example.com"})["id"]
+
+    results = batch_update("contacts", [
+        {"id": first, "properties": {"customer_city": "Pune"}},
+        {"id": "999999", "properties": {"customer_city": "Pune"}},
+        {"id": second, "properties": {"customer_city": "Delhi"}},
+    ], client=client)
+
+    assert results[first].ok and results[second].ok
+    assert not results["999999"].ok
+    assert results["999999"].status == 404
+    assert store.objects["contacts"][second]["properties"]["customer_city"] == "Delhi"
+
+
+def test_read_by_email_maps_hits_and_misses(sim, client):
+    contact_id = sim.app.state.store.create("contacts", {"email": "known@example.com"})["id"]
+
+    results = batch_read(
+        "contacts", ["known@example.com", "unknown@example.com"], properties=["email"],
+        id_property="email", client=client
+    )
+
+    assert results["known@example.com"].ok
+    assert results["known@example.com"].id == contact_id
+    assert not results["unknown@example.com"].ok
+    assert results["unknown@example.com"].status == 404
+    assert results["unknown@example.com"].id is None
+
+
+def test_create_maps_errors_to_their_input(sim, client):
+    sim.app.state.store.create("contacts", {"email": "taken@example.com"})
+
+    results = batch_create("contacts", [
+        {"properties": {"email": "new1@example.com"}},
+        {"properties": {"email": "taken@example.com"}},
+        {"properties": {"email": "new2@example.com"}},
+    ], client=client)
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert "already exists" in results[1].error
+    contacts = sim.app.state.store.objects["contacts"]
+    assert contacts[results[0].id]["properties"]["email"] == "new1@example.com"
+    assert contacts[results[2].id]["properties"]["email"] == "new2@example.com"
+
+
+def test_failed_call_fails_every_input(sim, client):
+    sim.app.state.config.error_rate = 1.0
+    client.max_retries = 0
+
+    results = batch_create("contacts", [{"properties": {"email": "a@example.com"}}] * 2, client=client)
+
+    assert all(not r.ok and r.status >= 500 for r in results)
+    assert not sim.app.state.store.objects["contacts"]
+
+
+def test_archive_reports_every_id(sim, client):
+    contact_id = sim.app.state.store.create("contacts", {"email": "gone@example.com"})["id"]
+
+    results = batch_archive("contacts", [contact_id, "999999"], client=client)
+
+    assert results[contact_id].ok and results["999999"].ok
+    assert contact_id not in sim.app.state.store.objects["contacts"]
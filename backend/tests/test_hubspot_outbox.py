@@ -0,0 +1,150 @@
+import asyncio
+from datetime import datetime
+import pytest
+from Hubspot import outbox
+from Hubspot.outbox import OutboxWorkerPool, enqueue, OUTBOX_MAX_ATTEMPTS
+
+
+@pytest.fixture
+def pool(client, database, monkeypatch):
+    # ticket creates open their own connection per delivery
+    monkeypatch.setattr(outbox, "access_db", database.connect)
+    return OutboxWorkerPool(workers=1, client=client)
+
+
+def queue(database, object_type, object_id, operation):
+    with database.connect().cursor() as cursor:
+        enqueue(cursor, object_type, object_id, operation)
+
+
+def make_due(database):
+    for entry in database.outbox.values():
+        entry["next_attempt_at"] = datetime.now()
+
+
+@pytest.fixture
+def deliver(pool, database, async_client):
+    """
+    Run one claim the way a worker does: batches, then ticket creates on
+    the worker's event loop.
+    """
+
+    loop = asyncio.new_event_loop()
+
+    def run():
+        db = database.connect()
+        claimed = pool._claim(db)
+        batches = {}
+        for entry in claimed:
+            if entry["operation"] in outbox.BATCH_OPERATIONS:
+                batches.setdefault(outbox.BATCH_OPERATIONS[entry["operation"]], []).append(entry)
+        for method, entries in batches.items():
+            pool._deliver_batch(db, method, entries)
+        singles = [e for e in claimed if e["operation"] not in outbox.BATCH_OPERATIONS]
+        if singles:
+            unstarted, failed = loop.run_until_complete(pool._deliver_concurrently(singles, async_client))
+            assert not unstarted and not failed
+        return claimed
+
+    yield run
+    loop.run_until_complete(async_client.aclose())
+    loop.close()
+
+
+def test_claim_holds_one_entry_per_object(pool, database):
+    queue(database, "ticket", 1, "ticket.create")
+    queue(database, "ticket", 1, "ticket.update")
+    queue(database, "ticket", 2, "ticket.create")
+
+    claimed = pool._claim(database.connect())
+
+    assert [(e["object_id"], e["operation"]) for e in claimed] == [(1, "ticket.create"), (2, "ticket.create")]
+    assert not pool._claim(database.connect())
+
+
+def test_ticket_create_links_ticket(sim, pool, database, deliver, email):
+    contact_id = sim.app.state.store.create("contacts", {"email": email})["id"]
+    database.add_customer(1, email)
+    database.add_ticket(7, 1, issue_title="Printer", priority="High")
+    queue(database, "ticket", 7, "ticket.create")
+
+    deliver()
+
+    hubspot_ticket_id = database.tickets[7]["hubspot_ticket_id"]
+    ticket = sim.app.state.store.objects["tickets"][hubspot_ticket_id]
+    assert ticket["properties"]["local_ticket_id"] == "7"
+    assert sim.app.state.store.associated("tickets", hubspot_ticket_id, "contacts") == [contact_id]
+    assert database.customers[1]["hubspot_contact_id"] == contact_id
+    assert [e["status"] for e in database.outbox.values()] == ["done"]
+
+
+def test_failed_create_is_retried_until_dead(sim, pool, database, deliver, email, monkeypatch):
+    monkeypatch.setattr(outbox, "retry_delay", lambda attempts: 60)
+    # no HubSpot contact: every create is rejected
+    database.add_customer(1, email)
+    database.add_ticket(7, 1)
+    queue(database, "ticket", 7, "ticket.create")
+    queue(database, "ticket", 7, "ticket.update")
+    create, update = database.outbox.values()
+
+    deliver()
+    assert (create["status"], create["attempts"]) == ("pending", 1)
+    assert create["next_attempt_at"] > datetime.now()
+    assert "HubSpot ticket create failed: 400" in create["last_error"]
+    # not due yet, and the update waits behind it
+    assert not pool._claim(database.connect())
+
+    for _ in range(OUTBOX_MAX_ATTEMPTS - 1):
+        make_due(database)
+        assert deliver()[0]["outbox_id"] == create["outbox_id"]
+        assert "HubSpot ticket create failed: 400" in create["last_error"]
+
+    assert (create["status"], create["attempts"]) == ("dead", OUTBOX_MAX_ATTEMPTS)
+    # a dead entry no longer blocks its object
+    assert [e["outbox_id"] for e in pool._claim(database.connect())] == [update["outbox_id"]]
+
+
+def test_retried_create_links_the_ticket_hubspot_already_has(sim, pool, database, deliver, email):
+    sim.app.state.store.create("contacts", {"email": email})
+    database.add_customer(1, email)
+    database.add_ticket(7, 1)
+    queue(database, "ticket", 7, "ticket.create")
+    deliver()
+    hubspot_ticket_id = database.tickets[7]["hubspot_ticket_id"]
+
+    # the first attempt's link was lost after HubSpot created the ticket
+    database.tickets[7].update(hubspot_ticket_id=None, ticket_status="In_Progress")
+    entry = next(iter(database.outbox.values()))
+    entry.update(status="pending", attempts=1)
+    deliver()
+
+    assert database.tickets[7]["hubspot_ticket_id"] == hubspot_ticket_id
+    assert len(sim.app.state.store.objects["tickets"]) == 1
+    # HubSpot has the state of the first attempt: the change is pushed
+    assert [e["operation"] for e in database.outbox.values() if e["status"] == "pending"] == ["ticket.update"]
+    deliver()
+    assert sim.app.state.store.objects["tickets"][hubspot_ticket_id]["properties"]["hs_pipeline_stage"] == "3"
+
+
+def test_contact_batch_fails_only_the_stale_contact(sim, pool, database, deliver, email):
+    store = sim.app.state.store
+    linked = store.create("contacts", {"email": f"linked-{email}"})["id"]
+    database.add_customer(1, f"linked-{email}", hubspot_contact_id=linked)
+    # linked to a contact deleted in HubSpot
+    database.add_customer(2, f"stale-{email}", hubspot_contact_id="999999")
+    database.add_customer(3, f"new-{email}")
+    for customer_id in (1, 2, 3):
+        queue(database, "contact", customer_id, "contact.sync")
+
+    deliver()
+
+    statuses = [(e["object_id"], e["status"]) for e in database.outbox.values()]
+    assert statuses == [(1, "done"), (2, "pending"), (3, "done")]
+    assert database.customers[2]["hubspot_contact_id"] is None
+    assert database.customers[3]["hubspot_contact_id"] in store.objects["contacts"]
+
+    # the retry finds no contact by email and creates one
+    make_due(database)
+    deliver()
+    assert database.customers[2]["hubspot_contact_id"] in store.objects["contacts"]
+    assert all(e["status"] == "done" for e in database.outbox.values())
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+import time
+
+ENDPOINT = "GET /crm/v3/objects/contacts/{id}"
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def rate_limit_once(sim):
+    # answer 429 with Retry-After: 1 until the first one was sent
+    config = sim.app.state.config
+    config.retry_after = True
+    config.rate_limit_rate = 1.0
+    return lambda: setattr(config, "rate_limit_rate", 0.0)
+
+
+def test_retry_after_pauses_every_caller(sim, client, scheduler):
+    contact_id = sim.app.state.store.create("contacts", {"email": "paced@example.com"})["id"]
+    stats = sim.app.state.stats
+    lift = rate_limit_once(sim)
+    outcome = {}
+
+    def first_call():
+        start = time.monotonic()
+        outcome["response"] = client.get(f"/crm/v3/objects/contacts/{contact_id}", "contacts.get")
+        outcome["elapsed"] = time.monotonic() - start
+
+    thread = threading.Thread(target=first_call)
+    thread.start()
+    wait_for(lambda: stats[(ENDPOINT, 429)])
+    lift()
+    wait_for(lambda: scheduler.status()["paused_for"] > 0)
+
+    # a caller that never saw the 429 waits out the same pause
+    paused_for = scheduler.status()["paused_for"]
+    start = time.monotonic()
+    response = client.get(f"/crm/v3/objects/contacts/{contact_id}", "contacts.get")
+    waited = time.monotonic() - start
+    thread.join(timeout=5)
+
+    assert outcome["response"].status_code == 200
+    assert outcome["elapsed"] >= 1.0
+    assert response.status_code == 200
+    assert waited >= paused_for - 0.05
+    assert stats[(ENDPOINT, 429)] == 1
+    assert stats[(ENDPOINT, 200)] == 2
+
+
+def test_async_client_waits_retry_after(sim, async_client, scheduler):
+    contact_id = sim.app.state.store.create("contacts", {"email": "paced@example.com"})["id"]
+    stats = sim.app.state.stats
+    lift = rate_limit_once(sim)
+
+    async def call():
+        try:
+            task = asyncio.create_task(async_client.get(f"/crm/v3/objects/contacts/{contact_id}", "contacts.get"))
+            start = time.monotonic()
+            while not stats[(ENDPOINT, 429)]:
+                await asyncio.sleep(0.01)
+            lift()
+            return await task, time.monotonic() - start
+        finally:
+            await async_client.aclose()
+
+    response, elapsed = asyncio.run(call())
+
+    assert response.status_code == 200
+    assert elapsed >= 1.0
+    assert stats[(ENDPOINT, 429)] == 1
+    assert scheduler.status()["queue_depth"] == 0
+
+
+def test_async_waiters_count_in_queue_depth(sim, async_client, scheduler):
+    contact_id = sim.app.state.store.create("contacts", {"email": "paced@example.com"})["id"]
+    lift = rate_limit_once(sim)
+    stats = sim.app.state.stats
+
+    async def calls():
+        try:
+            first = asyncio.create_task(async_client.get(f"/crm/v3/objects/contacts/{contact_id}", "contacts.get"))
+            while not stats[(ENDPOINT, 429)]:
+                await asyncio.sleep(0.01)
+            lift()
+            while not scheduler.status()["paused_for"]:
+                await asyncio.sleep(0.01)
+            # deferred by the pause: counted while they wait
+            waiting = [
+                asyncio.create_task(async_client.get(f"/crm/v3/objects/contacts/{contact_id}", "contacts.get"))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0.1)
+            depth = scheduler.status()["queue_depth"]
+            await asyncio.gather(first, *waiting)
+            return depth
+        finally:
+            await async_client.aclose()
+
+    assert asyncio.run(calls()) >= 3
+    assert scheduler.status()["queue_depth"] == 0
@@ -0,0 +1,146 @@
+import base64
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from Hubspot import webhooks
+
+SECRET = "test-client-secret"
+URL = "http://testserver/hubspot/webhooks"
+
+
+class MemoryRedis:
+    """
+    The Redis commands the webhook endpoint uses.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.sorted_sets = {}
+
+    def pipeline(self, transaction=True):
+        return MemoryPipeline(self)
+
+    async def zadd(self, key, mapping, nx=False):
+        members = self.sorted_sets.setdefault(key, {})
+        added = [member for member in mapping if not (nx and member in members)]
+        for member in added:
+            members[member] = mapping[member]
+        return len(added)
+
+
+class MemoryPipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def set(self, key, value, nx=False, ex=None):
+        self._commands.append((key, value, nx))
+
+    async def execute(self):
+        results = []
+        for key, value, nx in self._commands:
+            if nx and key in self._redis.values:
+                results.append(None)
+                continue
+            self._redis.values[key] = value
+            results.append(True)
+        return results
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = MemoryRedis()
+    monkeypatch.setattr(webhooks, "async_redis_client", redis)
+    return redis
+
+
+@pytest.fixture
+def http(monkeypatch, redis):
+    monkeypatch.setenv("HUBSPOT_CLIENT_SECRET", SECRET)
+    monkeypatch.delenv("HUBSPOT_WEBHOOK_URL", raising=False)
+    app = FastAPI()
+    app.include_router(webhooks.hubspot_webhook_router)
+    return TestClient(app)
+
+
+def signed(body, url=URL, timestamp=None, secret=SECRET):
+    timestamp = str(timestamp or int(time.time() * 1000))
+    source = f"POST{url}".encode() + body + timestamp.encode()
+    return {
+        "X-HubSpot-Signature-v3": base64.b64encode(hmac.new(secret.encode(), source, hashlib.sha256).digest()).decode(),
+        "X-HubSpot-Request-Timestamp": timestamp,
+        "Content-Type": "application/json",
+    }
+
+
+def events(*event_ids, object_id=1001):
+    return json.dumps([
+        {"eventId": event_id, "subscriptionType": "contact.propertyChange", "objectId": object_id}
+        for event_id in event_ids
+    ]).encode()
+
+
+def test_valid_signature_queues_the_object(http, redis):
+    body = events(1)
+
+    response = http.post("/hubspot/webhooks", content=body, headers=signed(body))
+
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 1, "duplicates": 0, "ignored": 0}
+    assert list(redis.sorted_sets[webhooks.WEBHOOK_PENDING_KEY]) == ["contacts:1001"]
+
+
+@pytest.mark.parametrize("headers", [
+    lambda body: signed(body, secret="other-secret"),
+    lambda body: signed(b"[]"),
+    lambda body: signed(body, timestamp=int(time.time() * 1000) - webhooks.WEBHOOK_MAX_AGE_MS - 60000),
+    lambda body: {"Content-Type": "application/json"},
+], ids=["wrong secret", "other body", "stale", "unsigned"])
+def test_invalid_signature_is_rejected(http, redis, headers):
+    body = events(1)
+
+    response = http.post("/hubspot/webhooks", content=body, headers=headers(body))
+
+    assert response.status_code == 401
+    assert not redis.sorted_sets
+
+
+def test_signature_covers_the_decoded_uri(http, redis):
+    # HubSpot signs the URI with these characters decoded
+    body = events(1)
+    query = "?portal=a%3Ab"
+
+    response = http.post(f"/hubspot/webhooks{query}", content=body, headers=signed(body, url=f"{URL}?portal=a:b"))
+
+    assert response.status_code == 200
+
+
+def test_redelivered_events_are_dropped(http, redis):
+    first = events(1, 2)
+    http.post("/hubspot/webhooks", content=first, headers=signed(first))
+
+    # HubSpot retries event 2 along with a new event for the same contact
+    retry = events(2, 3)
+    response = http.post("/hubspot/webhooks", content=retry, headers=signed(retry))
+
+    assert response.json() == {"accepted": 1, "duplicates": 1, "ignored": 0}
+    # one pending entry per object, due at its first event's time
+    assert list(redis.sorted_sets[webhooks.WEBHOOK_PENDING_KEY]) == ["contacts:1001"]
+
+
+def test_unknown_objects_are_ignored(http, redis):
+    body = json.dumps([{"eventId": 9, "subscriptionType": "deal.creation", "objectId": 5}]).encode()
+
+    response = http.post("/hubspot/webhooks", content=body, headers=signed(body))
+
+    assert response.json() == {"accepted": 0, "duplicates": 0, "ignored": 1}
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+from prometheus_client import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_state_gauge = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["name"]
+)
+_open_seconds = Gauge(
+    "circuit_breaker_open_seconds_total",
+    "Total seconds the circuit breaker spent not closed (running degraded)",
+    ["name"]
+)
+_opened = Counter(
+    "circuit_breaker_opened_total",
+    "Times the circuit breaker opened",
+    ["name"]
+)
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call is rejected because the circuit is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    callers should take their fallback path without touching the
+    dependency. After `reset_timeout` seconds one probe call is let
+    through (half-open); its success closes the circuit, its failure
+    re-opens it.
+
+    Callers report outcomes themselves:
+
+        if not breaker.allow():
+            return fallback()
+        try:
+            result = call()
+        except ConnectionError:
+            breaker.record_failure()
+            return fallback()
+        breaker.record_success()
+
+    Thread-safe; time spent open or half-open is exported as
+    `circuit_breaker_open_seconds_total{name}`.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=10.0, on_state_change=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._on_state_change = on_state_change
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._degraded_since = None
+        self._degraded_seconds = 0.0
+        self._probe_in_flight = False
+
+        _state_gauge.labels(name).set_function(lambda: _STATE_VALUES[self._state])
+        _open_seconds.labels(name).set_function(self.degraded_seconds)
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def _transition(self, state):
+        # caller holds self._lock; returns the old state for the callback
+        old, self._state = self._state, state
+        now = time.monotonic()
+        if state == OPEN:
+            self._opened_at = now
+            if old == CLOSED:
+                self._degraded_since = now
+                _opened.labels(self.name).inc()
+                logger.warning("Circuit %s opened", self.name)
+        elif state == CLOSED and self._degraded_since is not None:
+            self._degraded_seconds += now - self._degraded_since
+            logger.warning("Circuit %s closed after %.1fs", self.name, now - self._degraded_since)
+            self._degraded_since = None
+        return old
+
+    def _notify(self, old, new):
+        if self._on_state_change is not None and old != new:
+            try:
+                self._on_state_change(old, new)
+            except Exception:
+                logger.exception("Circuit %s state change callback failed", self.name)
+
+    def allow(self):
+        """
+        Return whether a call to the protected dependency may be made.
+
+        In the half-open state only one probe is allowed at a time.
+        """
+
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._transition(HALF_OPEN)
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        """
+        Report a successful call.
+        """
+
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            old = self._state
+            if old != CLOSED:
+                self._transition(CLOSED)
+        self._notify(old, CLOSED)
+
+    def record_failure(self):
+        """
+        Report a failed call (error or timeout of the dependency).
+        """
+
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            old = self._state
+            if old == HALF_OPEN or (old == CLOSED and self._failures >= self.failure_threshold):
+                self._transition(OPEN)
+            new = self._state
+        self._notify(old, new)
+
+    def cancel(self):
+        """
+        Give back a permission from `allow()` without reporting an outcome
+        (the call never reached the dependency).
+        """
+
+        with self._lock:
+            self._probe_in_flight = False
+
+    def degraded_seconds(self):
+        """
+        Return the total time spent open or half-open, including now.
+        """
+
+        with self._lock:
+            total = self._degraded_seconds
+            if self._degraded_since is not None:
+                total += time.monotonic() - self._degraded_since
+            return total